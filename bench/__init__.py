@@ -0,0 +1 @@
+"""Gerador de .out sintéticos (synth) e benchmark do ETL (run)."""
@@ -0,0 +1,202 @@
+"""
+Benchmark do ETL sobre .out sintéticos (bench.synth) em tamanhos de rede realistas.
+
+Para cada tamanho mede, cada caso num processo novo:
+
+    parse:<bloco>         LineHandler do bloco sobre o arquivo (leitura incluída)
+    write:<bloco>:<fmt>   write_outputs do bloco (parse fora do tempo)
+    etl:all               etl.run --block all, ponta a ponta (imports incluídos)
+
+e reporta MB/s, linhas/s (linhas das tabelas produzidas) e pico de RSS do
+processo (ru_maxrss, com o interpretador e os imports). O tempo é o melhor
+de --repeat rodadas.
+
+Os resultados vão para bench/results/<commit>.json (fora do git, ver
+.gitignore); --compare A.json B.json mostra a razão de throughput por caso
+(< 1 = B mais lento).
+
+    python -m bench.run --sizes small medium
+    python -m bench.run --compare bench/results/before.json bench/results/after.json
+"""
+
+import argparse
+import json
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import List, Optional
+
+from .synth import generate
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+# tamanho -> parâmetros do gerador
+SIZES = {
+    "small": dict(n=8, sweeps=10),
+    "medium": dict(n=32, sweeps=2000, rs_blocks=20, q_blocks=10),
+    "large": dict(n=64, sweeps=10000, rs_blocks=30, q_blocks=12),
+}
+
+BLOCK_NAMES = ["out_simulations", "summary", "averages", "correlations", "k_space_variables", "real_space_variables"]
+
+
+def _peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1 << 20) if sys.platform == "darwin" else rss / 1024  # bytes no macOS, KB no Linux
+
+
+def _child(case: str, path: str) -> dict:
+    """Roda um caso no processo atual; devolve segundos, linhas e pico de RSS."""
+    if case == "etl:all":
+        t0 = time.perf_counter()
+        from etl import run
+        with tempfile.TemporaryDirectory() as out:
+            # sem o cache de parse (blocks.cache): as rodadas repetidas mediriam só a leitura dele
+            sys.argv = ["etl.run", "--block", "all", "--input", path, "--outdir", out, "--no-cache"]
+            run.main()
+        return {"seconds": time.perf_counter() - t0, "rows": None, "peak_rss_mb": _peak_rss_mb()}
+
+    from blocks.reader import iter_lines
+    from etl.engine import BLOCKS
+
+    kind, block, *fmt = case.split(":")
+    mod = BLOCKS[block]
+
+    def parse():
+        h = mod.LineHandler()
+        for ln in iter_lines(path):
+            h.feed(ln)
+        return h.finish()
+
+    if kind == "parse":
+        t0 = time.perf_counter()
+        parsed = parse()
+        seconds = time.perf_counter() - t0
+    else:
+        parsed = parse()
+        with tempfile.TemporaryDirectory() as out:
+            t0 = time.perf_counter()
+            mod.write_outputs(parsed, path, out, fmt == ["parquet"])
+            seconds = time.perf_counter() - t0
+    rows = sum(len(df) for df in mod.to_tables(parsed, path).values())
+    return {"seconds": seconds, "rows": rows, "peak_rss_mb": _peak_rss_mb()}
+
+
+def measure(case: str, path: str) -> dict:
+    """Um caso num processo novo (o pico de RSS não herda os casos anteriores)."""
+    proc = subprocess.run([sys.executable, "-m", "bench.run", "--child", case, path],
+                          cwd=ROOT, capture_output=True, text=True)
+    if proc.returncode:
+        raise RuntimeError(f"{case} falhou:\n{proc.stderr}")
+    return json.loads(proc.stdout.splitlines()[-1])
+
+
+def cases(formats: List[str]) -> List[str]:
+    out = [f"parse:{b}" for b in BLOCK_NAMES]
+    out += [f"write:{b}:{fmt}" for fmt in formats for b in BLOCK_NAMES]
+    return out + ["etl:all"]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "describe", "--always", "--dirty"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_bench(sizes: List[str], formats: List[str], repeat: int, workdir: str) -> List[dict]:
+    results = []
+    for size in sizes:
+        path = str(Path(workdir) / f"synth_{size}.out")
+        with open(path, "w") as f:
+            counts = generate(f, **SIZES[size])
+        nbytes = Path(path).stat().st_size
+        total_rows = sum(counts.values()) + 1  # + run_header
+        print(f"== {size}: {nbytes / 1e6:.1f} MB, {total_rows} linhas ({SIZES[size]})")
+        for case in cases(formats):
+            runs = [measure(case, path) for _ in range(repeat)]
+            best = min(runs, key=lambda r: r["seconds"])
+            rows = best["rows"] if best["rows"] is not None else total_rows
+            r = {
+                "size": size, "case": case, "bytes": nbytes, "rows": rows,
+                "seconds": best["seconds"],
+                "mb_s": nbytes / 1e6 / best["seconds"],
+                "rows_s": rows / best["seconds"],
+                "peak_rss_mb": max(x["peak_rss_mb"] for x in runs),
+            }
+            results.append(r)
+            print(f"  {case:<36} {r['seconds'] * 1e3:9.1f} ms {r['mb_s']:9.1f} MB/s "
+                  f"{r['rows_s']:12.0f} linhas/s {r['peak_rss_mb']:8.1f} MB RSS")
+    return results
+
+
+def save(results: List[dict], sizes: List[str], dest: Optional[str] = None) -> Path:
+    commit = git_commit()
+    target = Path(dest) if dest else RESULTS_DIR / f"{commit}.json"
+    target.parent.mkdir(parents=True, exist_ok=True)
+    doc = {
+        "commit": commit,
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": f"{platform.system()} {platform.machine()} {platform.node()}",
+        "sizes": {s: SIZES[s] for s in sizes},
+        "results": results,
+    }
+    target.write_text(json.dumps(doc, indent=1))
+    return target
+
+
+def compare(base: str, new: str, threshold: float = 0.9) -> int:
+    """Razão de throughput (MB/s novo / base) e de RSS por caso; retorna nº de regressões."""
+    a, b = (json.loads(Path(p).read_text()) for p in (base, new))
+    old = {(r["size"], r["case"]): r for r in a["results"]}
+    print(f"{a['commit']} -> {b['commit']}")
+    slower = 0
+    for r in b["results"]:
+        o = old.get((r["size"], r["case"]))
+        if o is None:
+            continue
+        speed = r["mb_s"] / o["mb_s"]
+        rss = r["peak_rss_mb"] / o["peak_rss_mb"]
+        flag = "  <-- regressão" if speed < threshold else ""
+        slower += speed < threshold
+        print(f"  {r['size']:<7} {r['case']:<36} x{speed:5.2f} throughput  x{rss:5.2f} RSS{flag}")
+    return slower
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Benchmark dos parsers e writers sobre .out sintéticos")
+    parser.add_argument("--sizes", nargs="+", default=["small", "medium"], choices=list(SIZES))
+    parser.add_argument("--formats", nargs="+", default=["csv", "parquet"], choices=["csv", "parquet"],
+                        help="Formatos dos writers")
+    parser.add_argument("--repeat", type=int, default=3, help="Rodadas por caso (vale a mais rápida)")
+    parser.add_argument("--workdir", default=None, help="Onde gerar os .out (padrão: diretório temporário)")
+    parser.add_argument("--save", default=None, help="Arquivo de resultados (padrão: bench/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NOVO"), help="Compara dois arquivos de resultados")
+    parser.add_argument("--child", nargs=2, metavar=("CASO", "ARQUIVO"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(_child(*args.child)))
+        return
+    if args.compare:
+        sys.exit(1 if compare(*args.compare) else 0)
+
+    if args.workdir:
+        Path(args.workdir).mkdir(parents=True, exist_ok=True)
+        results = run_bench(args.sizes, args.formats, args.repeat, args.workdir)
+    else:
+        with tempfile.TemporaryDirectory() as tmp:
+            results = run_bench(args.sizes, args.formats, args.repeat, tmp)
+    print(f"[OK] {save(results, args.sizes, args.save)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+Gerador de .out sintéticos no formato do holstein6 (ver examples/test.out).
+
+Cabeçalho com parâmetros quebrados em duas linhas, registros de sweep,
+linhas "Average ... = v +- e" (uma fração quebrada com o erro na linha de
+baixo), blocos de espaço real (cunha 0 <= i <= j <= n/2, rede n/2+1 e rede
+n x n), blocos (q), n(q) e o rodapé das ondas s/d. Números no formato de
+saída livre do Fortran (F com 15 dígitos ou E com expoente de 3 dígitos).
+
+    python -m bench.synth --n 32 --sweeps 2000 --out /tmp/synth.out
+"""
+
+import argparse
+import random
+import sys
+from typing import IO, Dict, List, Optional, Tuple
+
+# blocos de espaço real na ordem em que o código imprime: (cabeçalho, forma)
+# forma: "wedge" (i <= j <= n/2), "half" ((n/2+1)²), "full" (n²), "pair" (SRW up-up/up-dn)
+REAL_SPACE = [
+    (" Green's function:", "wedge"),
+    (" density-density correlation fn: (up-up,up-dn)", "pair"),
+    (" density-density correlation function:", "wedge"),
+    (" bond-bond correlation function:", "wedge"),
+    (" bond_allx-bond_allx correlation function:", "half"),
+    (" bond_ally-bond_ally correlation function:", "half"),
+    (" bond_xy-bond_xy correlation function:", "half"),
+    (" bond0_xx-bond0_xx correlation function:", "full"),
+    (" bond0_xy-bond0_xy correlation function:", "full"),
+    ("bonds x:", "full"),
+    (" bonds y", "full"),
+]
+
+# blocos (q) impressos depois dos de espaço real
+K_SPACE = [
+    (" Bondx(q): ", "half"),
+    (" Bondy(q): ", "half"),
+    (" Bond(q): ", "wedge"),
+    (" Scdw(q): ", "wedge"),
+    (" Sxx(q): ", "wedge"),
+]
+
+AVERAGES = [
+    "up sign", "total sign", "density", "up occupancy", "phonon displacement ",
+    "Holstein phonon displacement ", "phonon displacement (xx) ", "phonon displacement (yy) ",
+    "Energy", "Kinetic Energy", "Kinetic Energy(xx)", "Kinetic Energy(yy)",
+    "EL-PH PE Holstein", "EL-PH PE (xx)", "EL-PH PE (yy)", "Nup*Ndn", "PH PE Holstein",
+    "Phonon PE", "PH KE Holstein", "Phonon KE", "Phonon PE (xx)", "Phonon PE (yy)",
+    "Phonon KE virial", "Phonon KE virial (xx)", "Phonon KE virial (yy)",
+]
+
+CORRELATIONS = [
+    "Bondx correlation function", "Bondy correlation function",
+    "AF correlation function (xx) ", "AF correlation function (zz) ",
+    "AF correlation function (Avg) ", "CDW correlation function",
+]
+
+SUSCEPTIBILITIES = ["AF susceptibility (xx)", "CDW susceptibility"]
+
+FERRO = ["Ferro correlation function(xx)", "Ferro correlation function(zz)"]
+
+
+def fortran(x: float) -> str:
+    """Um real como na saída livre do gfortran (F com 5 espaços à direita ou E)."""
+    a = abs(x)
+    if 0.1 <= a < 1e15:
+        digits = len(str(int(a))) if a >= 1 else 0
+        return f"{x:.{15 - digits}f}".rjust(19) + " " * 5
+    mant, exp = f"{x:.15E}".split("E")
+    return f" {mant:>18}E{int(exp):+04d}"
+
+
+def _pm(name: str, value: float, error: float, wrap: bool, sign: str = "+-") -> str:
+    line = f" {name}={fortran(value)}  {sign} "
+    return line + "\n" + fortran(error) if wrap else line + fortran(error)
+
+
+def _cells(shape: str, n: int) -> List[Tuple[int, int]]:
+    h = n // 2
+    if shape in ("wedge", "pair"):
+        return [(i, j) for i in range(h + 1) for j in range(i, h + 1)]
+    side = h + 1 if shape == "half" else n
+    return [(i, j) for i in range(side) for j in range(side)]
+
+
+def _block(out: List[str], rng: random.Random, header: str, shape: str, n: int) -> int:
+    out.append(header)
+    cells = _cells(shape, n)
+    for i, j in cells:
+        v, e = rng.gauss(0.25, 0.5), abs(rng.gauss(0, 1e-3))
+        if shape == "pair":
+            v2, e2 = rng.gauss(0.25, 0.01), abs(rng.gauss(0, 1e-5))
+            out.append(f"{i:4d}{j:4d}{v:16.6f} +-{e:13.6f}{v2:16.6f} +-{e2:13.6f}")
+        else:
+            out.append(f"{i:12d}{j:12d}{fortran(v)}  +- {fortran(e)}")
+    return len(cells)
+
+
+def _header(n: int, l: int, warms: int, sweeps: int, lambdax: float, iran: int, outname: str) -> List[str]:
+    return [
+        " Version holstein6",
+        " 7/23 -- Writes certain measurements at each sweep",
+        " 2/21/91 -- Inputs random site impurities",
+        "  ",
+        f" n={n:12d}   l={l:12d}",
+        "  ",
+        " afeps =   0.0000000E+00",
+        f" warms={warms:12d}   sweeps={sweeps:12d}",
+        f" t={fortran(1.0)}  omega={fortran(1.0)}  lambdax=",
+        f"{fortran(lambdax)}  move={fortran(1.0)}  dens=",
+        fortran(0.0),
+        f" dtlan={fortran(5e-4)}  lambda0={fortran(0.0)}  omega0=",
+        f" {fortran(1.0)}",
+        f" dtau={fortran(0.05)}  nwrap =          10  difflim= ",
+        f"{fortran(1e-4)}  errrat= {fortran(1e-4)}",
+        " doauto has been zeroed",
+        f"  doauto=            0  orthlen=            8  eorth= {fortran(1e-6)}",
+        "  dopair=            1  numpair=            1",
+        "  torth=            5",
+        " errpam is    9999999827968.00     ",
+        f" iran={iran:12d}",
+        " outname=",
+        f" {outname:<79}",
+        "  ",
+        " tausk=         200",
+        " phonskip=           2",
+        " numtry,gsize",
+        f"           7 {fortran(0.0)}",
+        f" lambda0 is {fortran(0.0)}",
+        " istart is           1",
+        f" initial phonon scale is {fortran(1.41421356528801)}",
+        f" initial phonon scale is {fortran(1.41421356528801)}",
+        f" initial bond field X {fortran(0.4)}",
+        f" initial bond field Y {fortran(0.0)}",
+        f" Using mu = {fortran(0.0)}",
+        " after warmups, accept holstein ratio is   0.4747475    ",
+        " after warmups, accept2 SSH ratio is   0.2667631    ",
+        " after warmups, accept2 Holstein ratio is    1.000000    ",
+        f" gamma is {fortran(0.0)}",
+        " redo ratio is   1.3172338E-03",
+    ]
+
+
+def generate(f: IO[str], n: int = 8, sweeps: int = 10, q_blocks: int = len(K_SPACE),
+             rs_blocks: int = len(REAL_SPACE), wrap: float = 0.5, seed: int = 0,
+             l: int = 400, lambdax: float = 0.7745966692, iran: int = -147,
+             outname: Optional[str] = None) -> Dict[str, int]:
+    """
+    Escreve um .out sintético em `f`: `sweeps` registros de sweep,
+    `rs_blocks` blocos de espaço real e `q_blocks` blocos (q) (além dos
+    padrões, os extras ganham nomes numerados), `wrap` = fração das linhas
+    "= v +- e" com o erro quebrado para a linha seguinte.
+    Retorna as linhas de dados esperadas por tabela (para conferência).
+    """
+    rng = random.Random(seed)
+    outname = outname or f"n{n}L{l}w1.0lssh{lambdax}s1r{abs(iran)}.out"
+    step = 400
+    out = _header(n, l, step * sweeps, step * sweeps, lambdax, iran, outname)
+
+    for s in range(1, sweeps + 1):
+        out += [
+            f" Finished measurement sweep {step * s:12d}",
+            f"asgn, asgnp: {1.0:8.3f} {1.0:8.3f} ;accept holstein ,redo ratios: "
+            f"{rng.uniform(0.4, 0.5):11.4f} {rng.uniform(0, 0.002):11.4f}",
+            f" Total_meas= {16000:11d}",
+            f" nwrap, torth = {30:11d} {8:11d}",
+        ]
+    out += [
+        " At end, redo ratio is   2.9727400E-04",
+        " Accept2 SSH=  0.2677476    ",
+        " Accept2 Hol.=   1.000000    ",
+    ]
+
+    counts = {"sweeps": sweeps, "summary": 0, "averages": 0, "correlations": 0, "kspace": 0, "realspace": 0}
+
+    def pm(name: str, sign: str = "+-") -> None:
+        out.append(_pm(name, rng.gauss(0.5, 1.0), abs(rng.gauss(0, 1e-3)), rng.random() < wrap, sign))
+
+    for name in AVERAGES:
+        pm(f"Average {name}")
+    counts["averages"] = len(AVERAGES)
+    for name in CORRELATIONS:
+        pm(name)
+    for name in SUSCEPTIBILITIES:
+        pm(name, "+/-")
+    for name in FERRO:
+        pm(name)
+    counts["correlations"] = len(CORRELATIONS) + len(FERRO) + 1  # + RMS AF
+
+    real = REAL_SPACE[:rs_blocks] + [
+        (f" bond{k}_xx-bond{k}_xx correlation function:", "full")
+        for k in range(1, rs_blocks - len(REAL_SPACE) + 1)
+    ]
+    kspace = K_SPACE[:q_blocks] + [
+        (f" S{k}xx(q): ", "wedge") for k in range(1, q_blocks - len(K_SPACE) + 1)
+    ]
+    for header, shape in real[:1]:
+        counts["realspace"] += _block(out, rng, header, shape, n)
+    if len(real) > 1:
+        out.append(" SRW CODE")
+    for header, shape in real[1:]:
+        counts["realspace"] += _block(out, rng, header, shape, n)
+    for header, shape in kspace:
+        counts["kspace"] += _block(out, rng, header, shape, n)
+    counts["realspace"] += _block(out, rng, " xx Spin correlation function:", "wedge", n)
+    pm("RMS AF correlation function (xx) ")
+    out.append("  ")
+
+    out.append("n(q):")
+    cells = _cells("wedge", n)
+    for i, j in cells:
+        out.append(f"{i:5d}{j:5d}{rng.uniform(0, 1):14.4f}{abs(rng.gauss(0, 1e-3)):14.4f}")
+    counts["kspace"] += _block(out, rng, " chiafxx(q):", "wedge", n)
+
+    for wave in ("s-wave: (corr. fn, no vertex)", "s*-wave: (suscept., no vertex)",
+                 "dx2y2-wave: (suscept., no vertex)", "dxy-wave: (suscept., no vertex)"):
+        out.append(f" {wave}")
+        if wave.startswith("s-wave"):
+            out.append("         (suscept., no vertex)")
+        for _ in range(2):
+            out.append("".join(f"{rng.uniform(0, 1):12.5f} +- {rng.uniform(0, 0.02):12.5f}   " for _ in range(2)))
+        for key in ("Peff=", "GmP= ", "P0GP="):
+            out.append(f" {key}{fortran(rng.gauss(0, 0.5))}")
+    # summary: Accept2 (2), médias, correlações, susceptibilidades e Peff/GmP/P0GP por simetria
+    counts["summary"] = 2 + counts["averages"] + counts["correlations"] + len(SUSCEPTIBILITIES) + 4 * 3
+    out.append(f" saf with no vertex is {fortran(0.632915049212420)}")
+    out.append(f" Time: {fortran(rng.uniform(1e3, 1e5))}")
+
+    f.write("\n".join(out) + "\n")
+    return counts
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Gera um .out sintético no formato do holstein6")
+    parser.add_argument("--n", type=int, default=8, help="Lado da rede")
+    parser.add_argument("--sweeps", type=int, default=10, help="Nº de registros de sweep")
+    parser.add_argument("--q-blocks", type=int, default=len(K_SPACE), help="Nº de blocos (q) (além de n(q) e chiafxx(q))")
+    parser.add_argument("--rs-blocks", type=int, default=len(REAL_SPACE),
+                        help="Nº de blocos de espaço real (além do xx Spin)")
+    parser.add_argument("--wrap", type=float, default=0.5, help="Fração das linhas '+-' quebradas")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="-", help="Arquivo de saída ('-' = stdout)")
+    args = parser.parse_args(argv)
+
+    kw = dict(n=args.n, sweeps=args.sweeps, q_blocks=args.q_blocks,
+              rs_blocks=args.rs_blocks, wrap=args.wrap, seed=args.seed)
+    if args.out == "-":
+        counts = generate(sys.stdout, **kw)
+    else:
+        with open(args.out, "w") as f:
+            counts = generate(f, **kw)
+    print(f"[OK] {args.out}: " + ", ".join(f"{k}={v}" for k, v in counts.items()), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,15 @@
 """
 Blocos:s
-Expõe: parse_block (parser) e run_etl (cola ETL para salvar em arquivos).
+Expõe: parse_block (parser), parse_file / parse_stream (leitura linha a linha;
+o stream gera registros um a um), LineHandler (parser incremental, linha a linha),
+from_source (o mesmo resultado a partir do bloco summary, do qual este é uma visão),
+run_etl (cola ETL para salvar em arquivos), write_outputs (só a etapa Load)
+e to_tables (DataFrames consolidáveis, usados pelo etl.batch).
 """
-from .parser import parse_block
-from .etl import run_etl
+from .parser import parse_block, parse_file, parse_stream, LineHandler, PARSER_VERSION, from_source
+from .etl import run_etl, write_outputs, to_tables
 
-__all__ = ["parse_block", "run_etl"]
+__all__ = ["parse_block", "parse_file", "parse_stream", "LineHandler", "PARSER_VERSION", "from_source", "run_etl", "write_outputs", "to_tables"]
 
 
 ## __all_ : define o que vai ser exportado quando fizer from blocks.out_simulations import *
\ No newline at end of file
@@ -1,50 +1,27 @@
 # etl.py
 """
-Executa o ETL do bloco averages:
-- lê o arquivo de entrada (.out)
-- aplica o parser (parser.parse)
-- salva em CSV
+Executa o ETL do bloco averages, visão do summary: parse e gravação são os
+do summary (blocks.summary.etl), só com a tabela e o sufixo "averages".
 """
 
-from pathlib import Path
-import csv
-from .parser import parse_block
+from typing import Optional
+from blocks.summary import etl as summary
+from .parser import parse_file
 
 
-def run_etl(input_path: str, outdir: str, to_parquet: bool = False):
-    # lê texto do arquivo
-    text = Path(input_path).read_text(errors="ignore")
-    parsed = parse_block(text)  # retorna dict {"block": "averages", "items": [...]}
+def run_etl(input_path: str, outdir: Optional[str], to_parquet: bool = False):
+    parsed = parse_file(input_path)  # retorna dict {"block": "averages", "items": [...]}
+    # outdir=None: não grava nada, devolve as tabelas (unidade de trabalho do etl.batch)
+    if outdir is None:
+        return to_tables(parsed, input_path)
+    write_outputs(parsed, input_path, outdir, to_parquet)
 
-    items = parsed.get("items", [])
 
-    out = Path(outdir)
-    out.mkdir(parents=True, exist_ok=True)
+def to_tables(parsed: dict, input_path: str) -> dict:
+    """Tabelas consolidáveis: {"averages": DataFrame(source_file, name, key, value, error)}."""
+    return summary.to_tables(parsed, input_path, table="averages")
 
-    # nome do arquivo de saída
-    out_csv = out / (Path(input_path).stem + "_averages.csv")
 
-    # escreve CSV
-    with out_csv.open("w", newline="") as f:
-        writer = csv.DictWriter(
-            f, fieldnames=["filename", "name", "key", "value", "error"]
-        )
-        writer.writeheader()
-        for it in items:
-            writer.writerow({
-                "filename": Path(input_path).name,
-                "name": it.get("name"),
-                "key": it.get("key"),
-                "value": it.get("value"),
-                "error": it.get("error"),
-            })
-
-    print(f"[OK] {len(items)} métricas salvas em {out_csv}")
-
-    # opcional: salvar parquet
-    if to_parquet:
-        import pandas as pd
-        df = pd.DataFrame(items)
-        out_parquet = out / (Path(input_path).stem + "_averages.parquet")
-        df.to_parquet(out_parquet, index=False)
-        print(f"[OK] parquet salvo em {out_parquet}")
\ No newline at end of file
+def write_outputs(parsed: dict, input_path: str, outdir: str, to_parquet: bool = False):
+    """Etapa Load: grava o resultado de parse_block (ou LineHandler.finish)."""
+    summary.write_outputs(parsed, input_path, outdir, to_parquet, table="averages")
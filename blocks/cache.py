@@ -0,0 +1,298 @@
+"""
+Cache em disco dos resultados de parse (Arrow IPC), para não repetir as regex
+quando o mesmo arquivo inalterado é lido de novo (notebooks, etl.run repetido).
+
+Chave: sha256 do conteúdo da entrada + bloco + impressão digital do parser:
+PARSER_VERSION de todos os blocos, versões do Python, NumPy, pandas e
+pyarrow, e o código-fonte de todo o pacote blocks/ (parsers, a normalização
+de linhas do blocks.reader) e do etl/engine.py, cujo roteamento de linhas
+também produz os resultados guardados. Editar qualquer módulo desses ou
+atualizar uma dessas bibliotecas invalida todas as entradas. Código de fora
+do repositório (outras dependências) não entra: na dúvida, clear() (ou
+apague o diretório) ou --no-cache.
+
+    from blocks import k_space_variables
+    k_space_variables.parse_block("run.out")   # 1ª vez: parse; depois: leitura mapeada
+
+Usam o cache os parse_block/parse_file dos blocos (decorador `cached`) e o
+etl.engine (python -m etl.run/etl.batch), que só lê o arquivo para os blocos
+que não estão no cache. Entradas abertas ou "-" não passam pelo cache.
+
+Diretório: $ETL_PARSE_CACHE, ou ~/.cache/etl-parse ($XDG_CACHE_HOME);
+ETL_PARSE_CACHE=off desliga (ou CACHE_DIR = None, --no-cache no etl.run/etl.batch).
+Tamanho máximo: MAX_BYTES ($ETL_PARSE_CACHE_MB); passando dele, as entradas
+usadas há mais tempo (mtime, renovado a cada leitura) são apagadas.
+
+Formatos guardados (um .arrow por tabela):
+    lines   {bloco: [linhas]} dos blocos de matriz -> coluna "line", contagens nos metadados
+    items   {"block", "count", "items"} do summary e visões -> name, key, value, error
+    frames  tupla de DataFrames (out_simulations) -> um arquivo por DataFrame
+Sem pyarrow o cache fica desligado.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import sys
+from os import PathLike
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from blocks.reader import is_stdin
+
+FORMAT = 1  # incrementar quando o formato dos arquivos mudar
+
+
+def _default_dir() -> Optional[Path]:
+    env = os.environ.get("ETL_PARSE_CACHE")
+    if env is not None:
+        return None if env.strip().lower() in ("", "0", "off", "no", "false") else Path(env)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "etl-parse"
+
+
+CACHE_DIR: Optional[Path] = _default_dir()
+MAX_BYTES = int(float(os.environ.get("ETL_PARSE_CACHE_MB", 2048)) * (1 << 20))
+
+MISS = object()
+
+# (caminho absoluto, size, mtime_ns) -> sha256: o mesmo arquivo não é lido de novo para cada bloco
+_DIGESTS: Dict[Tuple[str, int, int], str] = {}
+
+
+def enabled() -> bool:
+    if CACHE_DIR is None:
+        return False
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def disable() -> None:
+    """Desliga o cache neste processo e nos que ele criar (workers do etl.batch)."""
+    global CACHE_DIR
+    CACHE_DIR = None
+    os.environ["ETL_PARSE_CACHE"] = "off"
+
+
+def source_digest(source: Any) -> Optional[str]:
+    """sha256 do arquivo `source` (caminho); None se não é um arquivo em disco (stdin, aberto...)."""
+    if not isinstance(source, (str, PathLike)) or is_stdin(source):
+        return None
+    try:
+        st = os.stat(source)
+    except OSError:
+        return None
+    memo = (os.path.abspath(source), st.st_size, st.st_mtime_ns)
+    digest = _DIGESTS.get(memo)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(source, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = _DIGESTS[memo] = h.hexdigest()
+    return digest
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8", errors="surrogatepass")).hexdigest()
+
+
+# fontes que decidem o resultado de um parse: todos os módulos de blocks/ (os parsers
+# importam uns aos outros, às vezes dentro de funções) e o roteamento do etl.engine
+_ROOT = Path(__file__).resolve().parent.parent
+_SOURCE_GLOBS = ("blocks/**/*.py", "etl/engine.py")
+
+
+@functools.lru_cache(maxsize=None)
+def _sources_digest() -> str:
+    h = hashlib.sha256()
+    for pattern in _SOURCE_GLOBS:
+        for path in sorted(_ROOT.glob(pattern)):
+            h.update(path.relative_to(_ROOT).as_posix().encode())
+            h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+# bibliotecas que convertem os resultados (DataFrames, Arrow) guardados
+_LIBRARIES = ("numpy", "pandas", "pyarrow")
+
+
+@functools.lru_cache(maxsize=None)
+def _versions() -> str:
+    """Python, _LIBRARIES e PARSER_VERSION de cada bloco (blocks/<bloco>/parser.py)."""
+    import importlib
+
+    parts = [f"python={sys.version_info[0]}.{sys.version_info[1]}.{sys.version_info[2]}"]
+    for name in _LIBRARIES:
+        try:
+            parts.append(f"{name}={importlib.import_module(name).__version__}")
+        except ImportError:
+            parts.append(f"{name}=")
+    for path in sorted(_ROOT.glob("blocks/*/parser.py")):
+        parser = importlib.import_module(f"blocks.{path.parent.name}.parser")
+        parts.append(f"{path.parent.name}={getattr(parser, 'PARSER_VERSION', '')}")
+    return ";".join(parts)
+
+
+@functools.lru_cache(maxsize=None)
+def fingerprint(module: str) -> str:
+    """PARSER_VERSION do módulo + _versions() + código-fonte de blocks/ e etl/engine.py (ver _SOURCE_GLOBS)."""
+    version = getattr(sys.modules[module], "PARSER_VERSION", "")
+    key = f"{FORMAT}:{module}:{version}:{_versions()}:{_sources_digest()}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+def _key(block: str, module: str, kind: str, digest: str) -> str:
+    return hashlib.sha256(f"{block}\0{kind}\0{fingerprint(module)}\0{digest}".encode()).hexdigest()
+
+
+# -- conversão resultado <-> tabelas Arrow --------------------------------------------
+
+def _encode(result) -> List[Any]:
+    import pyarrow as pa
+
+    if isinstance(result, tuple):
+        tables = [pa.Table.from_pandas(df) for df in result]
+        meta = {b"etl.shape": b"frames", b"etl.parts": str(len(tables)).encode()}
+        return [t.replace_schema_metadata({**t.schema.metadata, **meta}) for t in tables]
+    if isinstance(result, dict) and "items" in result:
+        items = result["items"]
+        table = pa.table({
+            "name": pa.array([it["name"] for it in items], pa.string()),
+            "key": pa.array([it["key"] for it in items], pa.string()),
+            "value": pa.array([it["value"] for it in items], pa.float64()),
+            "error": pa.array([it["error"] for it in items], pa.float64()),
+        })
+        return [table.replace_schema_metadata({b"etl.shape": b"items", b"etl.block": result["block"].encode()})]
+    counts = [[name, len(lines)] for name, lines in result.items()]
+    lines = [ln for block in result.values() for ln in block]
+    table = pa.table({"line": pa.array(lines, pa.large_string())})
+    return [table.replace_schema_metadata({b"etl.shape": b"lines", b"etl.counts": json.dumps(counts).encode()})]
+
+
+def _decode(tables: List[Any]):
+    meta = tables[0].schema.metadata
+    shape = meta[b"etl.shape"]
+    if shape == b"frames":
+        if len(tables) != int(meta[b"etl.parts"]):
+            raise KeyError("etl.parts")  # parte já despejada: entrada incompleta
+        return tuple(t.to_pandas() for t in tables)
+    if shape == b"items":
+        items = tables[0].to_pylist()
+        return {"block": meta[b"etl.block"].decode(), "count": len(items), "items": items}
+    lines = tables[0].column("line").to_pylist()
+    out, k = {}, 0
+    for name, n in json.loads(meta[b"etl.counts"]):
+        out[name] = lines[k:k + n]
+        k += n
+    return out
+
+
+# -- leitura/gravação -----------------------------------------------------------------
+
+def _parts(key: str) -> List[Path]:
+    return sorted(CACHE_DIR.glob(f"{key}.*.arrow"))
+
+
+def load(block: str, module: str, digest: str, kind: str = "source"):
+    """Resultado guardado (mapeado da memória) ou MISS."""
+    if not enabled():
+        return MISS
+    import pyarrow as pa
+
+    parts = _parts(_key(block, module, kind, digest))
+    if not parts:
+        return MISS
+    try:
+        tables = []
+        for path in parts:
+            with pa.memory_map(str(path)) as src:
+                tables.append(pa.ipc.open_file(src).read_all())
+        result = _decode(tables)
+        for path in parts:
+            os.utime(path)  # LRU: usado agora
+    except (OSError, ValueError, KeyError, pa.ArrowException):
+        # entrada incompleta (apagada pela metade por outro processo) ou corrompida
+        for path in parts:
+            _unlink(path)
+        return MISS
+    return result
+
+
+def store(block: str, module: str, digest: str, result, kind: str = "source") -> None:
+    """Guarda `result`; o que não dá para guardar (tipos mistos, disco cheio) só fica de fora."""
+    if not enabled():
+        return
+    import pyarrow as pa
+
+    key = _key(block, module, kind, digest)
+    try:
+        tables = _encode(result)
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        for k, table in enumerate(tables):
+            path = CACHE_DIR / f"{key}.{k}.arrow"
+            tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+                writer.write_table(table)
+            os.replace(tmp, path)
+    except (OSError, ValueError, TypeError, pa.ArrowException):
+        return
+    evict()
+
+
+def evict(max_bytes: Optional[int] = None) -> None:
+    """Apaga as entradas usadas há mais tempo até o cache caber em `max_bytes` (padrão MAX_BYTES)."""
+    limit = MAX_BYTES if max_bytes is None else max_bytes
+    try:
+        files = [(e.stat().st_mtime_ns, e.stat().st_size, e.path)
+                 for e in os.scandir(CACHE_DIR) if e.name.endswith(".arrow")]
+    except OSError:
+        return
+    total = sum(size for _, size, _ in files)
+    for _, size, path in sorted(files):
+        if total <= limit:
+            break
+        _unlink(path)
+        total -= size
+
+
+def clear() -> None:
+    """Esvazia o cache."""
+    if CACHE_DIR is not None and CACHE_DIR.exists():
+        evict(0)
+
+
+def _unlink(path) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def cached(block: str, text: bool = False) -> Callable:
+    """
+    Decorador dos parse_block/parse_file: o 1º argumento é a entrada (caminho,
+    ou o texto do arquivo com text=True). Resultado guardado por conteúdo.
+    """
+    kind = "text" if text else "source"
+
+    def wrap(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        def parse(source, *args, **kwargs):
+            digest = None
+            if enabled() and not args and not kwargs:
+                digest = text_digest(source) if text and isinstance(source, str) else \
+                    None if text else source_digest(source)
+            if digest is None:
+                return fn(source, *args, **kwargs)
+            result = load(block, fn.__module__, digest, kind)
+            if result is MISS:
+                result = fn(source)
+                store(block, fn.__module__, digest, result, kind)
+            return result
+        return parse
+    return wrap
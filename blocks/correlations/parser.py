@@ -1,66 +1,41 @@
-import re
-from typing import Dict, List, Optional, Any
+from typing import Any, Callable, Dict, Iterator, Optional
 
-NUMBER_RE = r'[+\-]?(?:\d+(?:\.\d*)?|\.\d+)(?:[Ee][+\-]?\d+)?'
+from blocks.reader import Source
+from blocks.summary import parser as summary
+from blocks.summary.parser import is_correlation
 
-def _to_snake(name: str) -> str:
-    s = name.strip().replace('/', ' per ')
-    s = re.sub(r'[^0-9a-zA-Z]+', '_', s)
-    s = re.sub(r'_+', '_', s)
-    return s.strip('_').lower()
+# versão do parser: incrementar quando a saída mudar (invalida o manifest do etl.batch);
+# os itens vêm do summary, então a versão dele entra junto
+PARSER_VERSION = "2." + summary.PARSER_VERSION
 
-_PM_ANY = r'(?:\+\-|(?:\+\/\-)|±)'
 
-_MAIN = re.compile(
-    rf'^\s*(?P<name>.+?correlation function(?:\s*\([^)]+\))?)\s*=\s*(?P<val>{NUMBER_RE})(?:\s*{_PM_ANY}\s*(?P<err>{NUMBER_RE}))?$',
-    flags=re.IGNORECASE
-)
+class LineHandler(summary.LineHandler):
+    """
+    Visão do bloco summary: só os itens "... correlation function [(xx)]".
+    Mesmo resultado de ``parse_block`` em ``finish``; no etl.engine o bloco
+    não tem handler próprio e sai de from_source sobre o resultado do summary.
+    """
 
-_TRAILING_PM = re.compile(rf'{_PM_ANY}\s*\Z')
-_LONE_NUM = re.compile(rf'^\s*(?P<num>{NUMBER_RE})\b')
+    BLOCK = "correlations"
 
-def parse_block(text: str) -> Dict[str, Any]:
-    raw_lines = text.splitlines()
+    def __init__(self, emit: Optional[Callable[[Dict[str, Any]], None]] = None) -> None:
+        super().__init__(emit, keep=is_correlation)
+
+
+def from_source(parsed: Dict[str, Any]) -> Dict[str, Any]:
+    """Resultado do bloco a partir do resultado do summary (uma só leitura para os dois)."""
+    return summary.view(parsed, "correlations", is_correlation)
 
-    # 1) Refluir linhas que terminam com "+-", "+/-" ou "±" (com ou sem espaços finais)
-    lines: List[str] = []
-    i, n = 0, len(raw_lines)
-    while i < n:
-        cur = raw_lines[i].rstrip(' \t\r\x0b\x0c\xa0')
-        if _TRAILING_PM.search(cur):
-            # achar próxima linha não vazia
-            j = i + 1
-            while j < n and raw_lines[j].strip() == '':
-                j += 1
-            if j < n:
-                # cola a próxima linha (strip à esquerda p/ não criar dois espaços)
-                cur = cur + ' ' + raw_lines[j].lstrip()
-                i = j  # consumiu a linha do erro também
-        lines.append(cur)
-        i += 1
 
-    # 2) Agora aplicar a regex normalmente
-    items: List[Dict[str, Any]] = []
-    for line in lines:
-        m = _MAIN.match(line)
-        if m:
-            name = m.group(1).strip()
-            val = float(m.group('val'))
-            err: Optional[float] = None
+def parse_block(text: str) -> Dict[str, Any]:
+    return from_source(summary.parse_block(text))
+
 
-            if m.group('err') is not None:
-                err = float(m.group('err'))
-            else:
-                # fallback: se ainda sobrou caso de quebra não tratado
-                # tenta ler um número após "+-" na própria linha refluída
-                # (já deve estar colado, mas deixo por segurança)
-                pass
+def parse_file(source: Source) -> Dict[str, Any]:
+    """Como parse_block, mas lendo `source` (caminho, "-" ou arquivo aberto) linha a linha."""
+    return from_source(summary.parse_file(source))
 
-            items.append({
-                "name": name,
-                "key": _to_snake(name),
-                "value": val,
-                "error": err
-            })
 
-    return {"block": "correlations", "count": len(items), "items": items}
\ No newline at end of file
+def parse_stream(source: Source) -> Iterator[Dict[str, Any]]:
+    """Gera os itens um a um enquanto lê `source`; memória não cresce com o arquivo."""
+    return (it for it in summary.parse_stream(source) if is_correlation(it["name"]))
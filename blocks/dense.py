@@ -0,0 +1,141 @@
+"""
+Representação compacta de um bloco numérico (matrizes (q) e de espaço real).
+
+Em vez de um dict por linha com o nome do arquivo e do bloco repetidos,
+um DenseBlock guarda nome e origem uma vez, os índices em int16 (int32 se
+não couberem) e cada coluna de valores num array float64. A conversão para
+Arrow reaproveita os buffers dos arrays (sem cópia) e as colunas de texto
+viram dicionários de uma entrada; para pandas viram Categorical.
+
+Os writers dos blocos (CSV, Parquet) e as tabelas de to_tables (usadas pelo
+etl.batch e pelo dataset particionado) partem daqui.
+"""
+import csv
+import io
+from typing import IO, Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+
+def _index_array(a) -> np.ndarray:
+    a = np.asarray(a)
+    if not len(a) or (a.min() >= np.iinfo(np.int16).min and a.max() <= np.iinfo(np.int16).max):
+        return a.astype(np.int16)
+    return a.astype(np.int32)
+
+
+class DenseBlock:
+    """
+    Um bloco de um arquivo: `name` (ex.: "Bondx(q)"), `source` (nome do
+    arquivo), índices `index` = {"kx": ..., "ky": ...} e colunas float64
+    `values` = {"value": ..., "error": ...}.
+    """
+
+    __slots__ = ("name", "source", "index", "values")
+
+    def __init__(self, name: str, source: str, index: Dict[str, np.ndarray],
+                 values: Dict[str, np.ndarray]):
+        self.name = name
+        self.source = source
+        self.index = {k: _index_array(v) for k, v in index.items()}
+        self.values = {k: np.asarray(v, dtype=np.float64) for k, v in values.items()}
+
+    def __len__(self) -> int:
+        return len(next(iter(self.index.values())))
+
+    @property
+    def columns(self) -> List[str]:
+        return [*self.index, *self.values]
+
+    def _labels(self, source_col: str, label: str) -> List[Tuple[str, str]]:
+        return [(source_col, self.source), (label, self.name)]
+
+    def to_arrow(self, label: str = "block", source_col: str = "source_file"):
+        """pa.Table: source_col e label como dicionário (1 entrada), numéricos sem cópia."""
+        import pyarrow as pa
+
+        n = len(self)
+        zeros = pa.array(np.zeros(n, dtype=np.int32))
+        names, arrays = [], []
+        for col, text in self._labels(source_col, label):
+            names.append(col)
+            arrays.append(pa.DictionaryArray.from_arrays(zeros, pa.array([text])))
+        for col, arr in (*self.index.items(), *self.values.items()):
+            names.append(col)
+            arrays.append(pa.array(arr))
+        return pa.Table.from_arrays(arrays, names=names)
+
+    def to_pandas(self, label: str = "block", source_col: str = "source_file"):
+        """DataFrame com source_col e label como Categorical (códigos zerados, sem strings repetidas)."""
+        import pandas as pd
+
+        n = len(self)
+        codes = np.zeros(n, dtype=np.int8)
+        data = {col: pd.Categorical.from_codes(codes, categories=[text])
+                for col, text in self._labels(source_col, label)}
+        data.update(self.index)
+        data.update(self.values)
+        return pd.DataFrame(data, copy=False)
+
+    def write_csv(self, f: IO[str], label: str = "block", source_col: str = "source_file",
+                  columns: Sequence[str] = None, header: bool = True,
+                  lineterminator: str = "\n") -> int:
+        """
+        Escreve as linhas em `f` sem montar um dict por linha. `columns`
+        (padrão: as do bloco) fixa a ordem; colunas que o bloco não tem saem
+        vazias. Floats no mesmo formato do csv/pandas (repr). Retorna nº de linhas.
+        """
+        columns = list(columns) if columns is not None else [source_col, label, *self.columns]
+        if header:
+            csv.writer(f, lineterminator=lineterminator).writerow(columns)
+        fixed = dict(self._labels(source_col, label))
+        data = {**self.index, **self.values}
+        parts: List[Iterable[str]] = []
+        for col in columns:
+            if col in fixed:
+                buf = io.StringIO()
+                csv.writer(buf, lineterminator="").writerow([fixed[col]])
+                parts.append([buf.getvalue()] * len(self))
+            elif col in data:
+                parts.append(map(repr, data[col].tolist()))
+            else:
+                parts.append([""] * len(self))
+        f.writelines(",".join(row) + lineterminator for row in zip(*parts))
+        return len(self)
+
+
+def concat_arrow(blocks: Iterable[DenseBlock], label: str = "block",
+                 source_col: str = "source_file"):
+    """Uma pa.Table com todos os blocos (colunas ausentes num bloco viram nulos)."""
+    import pyarrow as pa
+
+    tables = [b.to_arrow(label, source_col) for b in blocks]
+    if not tables:
+        return None
+    return pa.concat_tables(tables, promote_options="default")
+
+
+def concat_pandas(blocks: Iterable[DenseBlock], label: str = "block",
+                  source_col: str = "source_file"):
+    """
+    Um DataFrame com todos os blocos (ou None): textos como Categorical
+    montado direto dos códigos, colunas ausentes num bloco viram NaN.
+    """
+    import pandas as pd
+
+    blocks = list(blocks)
+    if not blocks:
+        return None
+    lens = [len(b) for b in blocks]
+    data = {}
+    for col, texts in ((source_col, [b.source for b in blocks]), (label, [b.name for b in blocks])):
+        cats = list(dict.fromkeys(texts))
+        codes = np.repeat(np.array([cats.index(t) for t in texts], dtype=np.int32), lens)
+        data[col] = pd.Categorical.from_codes(codes, categories=cats)
+    for col in dict.fromkeys(c for b in blocks for c in b.columns):
+        data[col] = np.concatenate([
+            b.index[col] if col in b.index else
+            b.values[col] if col in b.values else np.full(len(b), np.nan)
+            for b in blocks
+        ])
+    return pd.DataFrame(data, copy=False)
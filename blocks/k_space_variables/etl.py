@@ -6,10 +6,12 @@ Executa o ETL dos blocos (q):
 - salva cada bloco em CSV
 """
 from pathlib import Path
-import csv
-from typing import List, Dict, Tuple
+from typing import Dict, Iterator, List, Optional
 
-from .parser import parse_block, parse_numeric_matrix
+from blocks.dense import DenseBlock, concat_arrow, concat_pandas
+from blocks.reader import source_name, source_stem
+from blocks.writer import submit
+from .parser import parse_block, parse_numeric_arrays
 
 
 def _sanitize(name: str) -> str:
@@ -21,60 +23,77 @@ def _sanitize(name: str) -> str:
     return s
 
 
-def run_etl(input_path: str, outdir: str, to_parquet: bool = False):
+def run_etl(input_path: str, outdir: Optional[str], to_parquet: bool = False):
     """
     Lê o arquivo .out, extrai todos os blocos (q): usando o parser,
     grava um CSV para cada bloco com colunas: filename, block, i, j, value, error.
 
     Se to_parquet=True, também grava um único arquivo parquet consolidando
     todas as linhas de todos os blocos.
+
+    Com outdir=None nada é gravado e as tabelas de to_tables são devolvidas
+    (unidade de trabalho do etl.batch).
     """
-    input_path = str(input_path)
-    out = Path(outdir)
-    out.mkdir(parents=True, exist_ok=True)
 
     # Executa o parser: {"Bondx(q)": [linhas], ...}
     blocks: Dict[str, List[str]] = parse_block(input_path)
+    if outdir is None:
+        return to_tables(blocks, input_path)
+    write_outputs(blocks, input_path, outdir, to_parquet)
 
-    all_rows: List[Dict[str, object]] = []
-    stem = Path(input_path).stem
 
+def dense_blocks(blocks: Dict[str, List[str]], input_path: str) -> Iterator[DenseBlock]:
+    """Um DenseBlock (kx, ky, value, error) por bloco (q), gerados um a um."""
+    name = source_name(input_path)
     for block_name, lines in blocks.items():
-        rows: List[Tuple[int, int, float, float]] = parse_numeric_matrix(lines)
-
-        # Nome do CSV por bloco
-        target_csv = out / f"{stem}_{_sanitize(block_name)}.csv"
-
-        # Escreve CSV do bloco
-        with target_csv.open("w", newline="") as f:
-            writer = csv.DictWriter(
-                f, fieldnames=["filename", "block", "kx", "ky", "value", "error"]
-            )
-            writer.writeheader()
-            for i, j, val, err in rows:
-                rec = {
-                    "filename": Path(input_path).name,
-                    "block": block_name,
-                    "kx": i,
-                    "ky": j,
-                    "value": val,
-                    "error": err,
-                }
-                writer.writerow(rec)
-                all_rows.append(rec)
-
-        print(f"[OK] {len(rows):4d} linhas -> {target_csv}")
+        kx, ky, val, err = parse_numeric_arrays(lines)
+        yield DenseBlock(block_name, name, {"kx": kx, "ky": ky}, {"value": val, "error": err})
+
+
+def to_tables(blocks: Dict[str, List[str]], input_path: str) -> Dict[str, "pd.DataFrame"]:
+    """Tabelas consolidáveis: {"kspace": DataFrame(source_file, block, kx, ky, value, error)}."""
+    df = concat_pandas(dense_blocks(blocks, input_path), label="block")
+    if df is None:
+        return {}
+    return {"kspace": df}
+
+
+def _write_csv(block: DenseBlock, target_csv: Path) -> None:
+    # mesmo formato do csv.DictWriter: \r\n, floats via repr
+    with target_csv.open("w", newline="") as f:
+        n = block.write_csv(f, label="block", source_col="filename", lineterminator="\r\n")
+    print(f"[OK] {n:4d} linhas -> {target_csv}")
+
+
+def _write_parquet(dense: List[DenseBlock], out_parquet: Path) -> None:
+    import pyarrow.parquet as pq
+
+    table = concat_arrow(dense, label="block", source_col="filename")
+    pq.write_table(table, out_parquet)
+    print(f"[OK] parquet salvo em {out_parquet} ({table.num_rows} linhas)")
+
+
+def write_outputs(blocks: Dict[str, List[str]], input_path: str, outdir: str,
+                  to_parquet: bool = False):
+    """Etapa Load: grava o resultado de parse_block (ou LineHandler.finish)."""
+    out = Path(outdir)
+    out.mkdir(parents=True, exist_ok=True)
+
+    stem = source_stem(input_path)
+
+    # cada bloco vai para a etapa de gravação (blocks.writer) enquanto o próximo é convertido
+    dense = []
+    for block in dense_blocks(blocks, input_path):
+        dense.append(block)
+        submit(_write_csv, block, out / f"{stem}_{_sanitize(block.name)}.csv")
 
     # Opcional: parquet consolidado
-    if to_parquet and all_rows:
+    if to_parquet and any(len(b) for b in dense):
         try:
-            import pandas as pd
+            import pyarrow.parquet as pq
         except Exception as e:
-            print("[WARN] pandas não disponível; ignorando parquet:", e)
+            print("[WARN] pyarrow não disponível; ignorando parquet:", e)
         else:
-            df = pd.DataFrame(all_rows)
-            out_parquet = out / f"{stem}_kspace_blocks.parquet"
-            df.to_parquet(out_parquet, index=False)
-            print(f"[OK] parquet salvo em {out_parquet} ({len(df)} linhas)")
+            submit(_write_parquet, dense, out / f"{stem}_kspace_blocks.parquet")
 
     print(f"[OK] Processados {len(blocks)} blocos (q) em '{Path(input_path).name}'.")
\ No newline at end of file
@@ -1,57 +1,122 @@
 import re
-from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from blocks.cache import cached
+from blocks.reader import Source, iter_lines
+
+# versão do parser: incrementar quando a saída mudar (invalida o manifest do etl.batch)
+PARSER_VERSION = "1"
 
 Header = re.compile(r'^\s*(?P<name>.+?\(q\))\s*:\s*$')  # ex.: "Bondx(q):"
 
-def parse_block(path: str) -> Dict[str, List[str]]:
+class LineHandler:
     """
-    Lê o arquivo .out e captura blocos cujo cabeçalho termina com '(q):',
-    acumulando linhas até a próxima linha que contenha ':' (novo cabeçalho).
-    Retorna {nome_do_bloco: [linhas_de_dados_str]}.
+    Versão incremental do parser de blocos (q): recebe uma linha por vez
+    (``feed``) e devolve {nome_do_bloco: [linhas_de_dados_str]} em ``finish``.
+    Usado pelo scanner de passada única (etl.engine).
+
+    `emit(nome_do_bloco, linha)`, se dado, recebe cada linha de dados assim que
+    é lida (em vez de acumular em self.blocks); é o que permite o parse_stream.
     """
-    lines = Path(path).read_text(encoding='utf-8', errors='ignore').splitlines()
 
-    blocks: Dict[str, List[str]] = {}
-    current_name = None
-    current_data: List[str] = []
+    # roteamento do etl.engine (blocks.plugin): só cabeçalhos "(q):" abrem um bloco
+    FIRST_TOKENS = frozenset()
+    CONTAINS = ("(q)",)
+
+    def __init__(self, emit: Optional[Callable[[str, str], None]] = None) -> None:
+        self.blocks: Dict[str, List[str]] = {}
+        self._emit = emit
+        self._current_name: Optional[str] = None
+        self._current_data: List[str] = []
 
-    def flush():
-        nonlocal current_name, current_data
-        if current_name is not None:
-            blocks[current_name] = current_data
-        current_name, current_data = None, []
+    @property
+    def active(self) -> bool:
+        return self._current_name is not None
 
-    for ln in lines:
+    def _flush(self) -> None:
+        if self._current_name is not None and self._emit is None:
+            self.blocks[self._current_name] = self._current_data
+        self._current_name, self._current_data = None, []
+
+    def feed(self, ln: str, tokens: Optional[List[str]] = None) -> None:
         # Se encontramos um novo cabeçalho (qualquer linha com ':'), checamos se é (q):
         if ':' in ln:
             m = Header.match(ln)
             if m:
                 # novo bloco (q): -> descarrega o anterior e começa outro
-                flush()
-                current_name = m.group('name')
-                continue
-            else:
+                self._flush()
+                self._current_name = m.group('name')
+            elif self._current_name is not None:
                 # linha com ':' mas NÃO é "(q):"
                 # se já estamos dentro de um bloco (q), isso sinaliza o fim do bloco
-                if current_name is not None:
-                    flush()
-                # fora de bloco, apenas segue
-                continue
+                self._flush()
+            # fora de bloco, apenas segue
+            return
 
         # Linha normal de dados
-        if current_name is not None:
+        if self._current_name is not None:
             # ignora linhas totalmente vazias
             if ln.strip():
-                current_data.append(ln.rstrip())
+                if self._emit is not None:
+                    self._emit(self._current_name, ln.rstrip())
+                else:
+                    self._current_data.append(ln.rstrip())
+
+    def finish(self) -> Dict[str, List[str]]:
+        # arquivo terminou; descarrega último bloco se existir
+        self._flush()
+        return self.blocks
 
-    # arquivo terminou; descarrega último bloco se existir
-    flush()
-    return blocks
+
+@cached("k_space_variables")
+def parse_block(path: Source) -> Dict[str, List[str]]:
+    """
+    Lê o arquivo .out linha a linha (caminho, "-" ou arquivo aberto) e
+    captura blocos cujo cabeçalho termina com '(q):',
+    acumulando linhas até a próxima linha que contenha ':' (novo cabeçalho).
+    Retorna {nome_do_bloco: [linhas_de_dados_str]}.
+    """
+    handler = LineHandler()
+    for ln in iter_lines(path):
+        handler.feed(ln)
+    return handler.finish()
+
+
+def parse_stream(source: Source) -> Iterator[Tuple[str, int, int, float, float]]:
+    """
+    Versão em streaming: lê `source` (caminho, "-" ou arquivo aberto) linha a
+    linha e gera (bloco, kx, ky, valor, erro) assim que cada linha é lida.
+    Linhas que não casam NumRow são ignoradas, como em parse_numeric_matrix.
+    """
+    ready: List[Tuple[str, str]] = []
+    handler = LineHandler(emit=lambda name, ln: ready.append((name, ln)))
+    for ln in iter_lines(source):
+        handler.feed(ln)
+        if ready:
+            for name, row in ready:
+                m = NumRow.match(row)
+                if m:
+                    yield (name, int(m.group(1)), int(m.group(2)),
+                           float(m.group(3)), float(m.group(4)))
+            ready.clear()
+    handler.finish()
 
 # (opcional) helper para transformar as linhas em tuplas numéricas, se quiser
 NumRow = re.compile(r'^\s*(\d+)\s+(\d+)\s+([Ee0-9\.\+\-]+)\s+\+\-\s+([Ee0-9\.\+\-]+)\s*$')
 
+def _numrow_fallback(ln: str):
+    m = NumRow.match(ln)
+    return m.groups() if m else None
+
+def parse_numeric_arrays(block_lines: List[str]):
+    """
+    Versão vetorizada de parse_numeric_matrix: devolve arrays NumPy
+    (kx, ky, valor, erro), convertidos em bloco (ver blocks.matrix).
+    A regex NumRow só é usada para linhas fora do formato "kx ky val +- err".
+    """
+    from blocks.matrix import FLOAT, INT, PM, parse_table
+    return parse_table(block_lines, (INT, INT, FLOAT, PM, FLOAT), _numrow_fallback)
+
 def parse_numeric_matrix(block_lines: List[str]) -> List[Tuple[int, int, float, float]]:
     """
     Converte linhas tipo:
@@ -59,30 +124,5 @@ def parse_numeric_matrix(block_lines: List[str]) -> List[Tuple[int, int, float,
     em tuplas (i, j, valor, erro).
     Linhas que não casarem são ignoradas.
     """
-    out = []
-    for ln in block_lines:
-        m = NumRow.match(ln)
-        if m:
-            kx = int(m.group(1))
-            ky = int(m.group(2))
-            val = float(m.group(3))
-            err = float(m.group(4))
-            out.append((kx, ky, val, err))
-    return out
-
-if __name__ == "__main__":
-    # ajuste o caminho para o seu arquivo .out
-    path = "/Users/jlpsilva/Dropbox/SSH/Results/Pining_x_y/bbfieldn0/FIXED_LAMBDA/LAMBDA_fixed_03_NEW/ETL/examples/example.out"
-    blocks = parse_block(path)
-
-    # Exemplo de uso: listar os nomes encontrados
-    print("Blocos (q) encontrados:", list(blocks.keys()))
-
-    # Pegar especificamente Bondx(q) e converter em matriz numérica
-    bondx = blocks.get("Bondx(q)")
-    if bondx:
-        matriz = parse_numeric_matrix(bondx)
-        print("Bondx(q) ->", len(matriz), "linhas numéricas")
-        # primeira linha como exemplo
-        if matriz:
-            print("Exemplo:", matriz[0])
\ No newline at end of file
+    kx, ky, val, err = parse_numeric_arrays(block_lines)
+    return list(zip(kx.tolist(), ky.tolist(), val.tolist(), err.tolist()))
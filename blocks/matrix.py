@@ -0,0 +1,112 @@
+"""
+Conversão vetorizada das matrizes numéricas dos blocos (q) e de espaço real.
+
+Em vez de aplicar uma regex por linha e montar tuplas, as linhas do bloco
+são juntadas num único buffer, os "+-" são removidos e tudo é convertido de
+uma vez (um split e um np.array float64). O buffer só é aceito se: cada
+linha tem o número certo de " +- " e de tokens (contados sobre os bytes, sem
+split por linha: uma linha curta e uma longa não se compensam), os valores
+são finitos e as colunas inteiras são inteiras. Caso contrário cada linha é
+classificada pelo próprio split e só as que não se encaixam passam pela
+regex do parser (`fallback`).
+
+Layout: sequência de tokens por linha, "i" (inteiro), "f" (float) ou "+-".
+"""
+import math
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+INT, FLOAT, PM = "i", "f", "+-"
+
+# fallback(linha) -> tokens numéricos (str) na ordem do layout sem os "+-", ou None
+Fallback = Callable[[str], Optional[Sequence[str]]]
+
+
+def _row_ok(tokens: List[str], layout: Sequence[str], signed: bool) -> bool:
+    for t, kind in zip(tokens, layout):
+        if kind == PM:
+            if t != PM:
+                return False
+        elif kind == INT:
+            if not (t[1:] if signed and t.startswith("-") else t).isdigit():
+                return False
+    return True
+
+
+_SPACE = np.zeros(256, dtype=bool)
+_SPACE[[ord(c) for c in " \t\n\r\x0b\x0c"]] = True
+
+
+def _tokens_per_line(buf: str, n: int) -> np.ndarray:
+    """Nº de tokens separados por espaço em cada uma das `n` linhas de `buf` (juntadas com "\n")."""
+    raw = np.frombuffer(buf.encode("utf-8", errors="surrogatepass"), dtype=np.uint8)
+    space = _SPACE[raw]
+    starts = ~space
+    starts[1:] &= space[:-1]  # 1º byte de cada token
+    line = np.cumsum(raw == 10)  # linha de cada byte ("\n" conta para a seguinte, mas é espaço)
+    return np.bincount(line[starts], minlength=n)
+
+
+def _bulk(lines: List[str], n_pm: int, n_num: int, int_cols: List[int],
+          signed: bool) -> Optional[np.ndarray]:
+    """Caminho rápido: matriz (linhas, n_num) float64, ou None se o buffer não fecha."""
+    n = len(lines)
+    if not n or not all(ln.count(PM) == n_pm for ln in lines):
+        return None
+    buf = "\n".join(lines)
+    if buf.count(f" {PM} ") != n * n_pm:  # "+-" colado no número: deixa para a regex
+        return None
+    if (_tokens_per_line(buf, n) != n_num + n_pm).any():  # linha com tokens a mais/menos
+        return None
+    try:
+        flat = np.array(buf.replace(PM, " ").split(), dtype=np.float64)
+    except ValueError:  # token que não é número
+        return None
+    if flat.size != n * n_num:
+        return None
+    values = flat.reshape(n, n_num)
+    ints = values[:, int_cols]
+    if not np.isfinite(values).all() or not (ints == np.trunc(ints)).all():
+        return None
+    if not signed and (ints < 0).any():
+        return None
+    return values
+
+
+def parse_table(lines: List[str], layout: Sequence[str], fallback: Fallback,
+                signed: bool = False) -> Tuple[np.ndarray, ...]:
+    """
+    Converte `lines` segundo `layout` e devolve um array por coluna numérica
+    (int64 para "i", float64 para "f"). Linhas que nem o layout nem o
+    fallback reconhecem são ignoradas, como nos parsers por regex.
+    """
+    width = len(layout)
+    num_idx = [k for k, kind in enumerate(layout) if kind != PM]
+    int_cols = [c for c, k in enumerate(num_idx) if layout[k] == INT]
+
+    values = _bulk(lines, width - len(num_idx), len(num_idx), int_cols, signed)
+
+    if values is None:
+        # caminho lento: só as linhas fora do layout passam pela regex
+        rows: List[List[float]] = []
+        for ln in lines:
+            t = ln.split()
+            if len(t) == width and _row_ok(t, layout, signed):
+                try:
+                    row = [float(t[k]) for k in num_idx]
+                except ValueError:
+                    row = None
+                if row is not None and all(map(math.isfinite, row)):
+                    rows.append(row)
+                    continue
+            g = fallback(ln)
+            if g is not None:
+                rows.append([float(x) for x in g])
+        if not rows:
+            return tuple(np.empty(0, dtype=np.int64 if c in int_cols else np.float64)
+                         for c in range(len(num_idx)))
+        values = np.array(rows, dtype=np.float64)
+
+    return tuple(values[:, c].astype(np.int64) if c in int_cols else values[:, c]
+                 for c in range(len(num_idx)))
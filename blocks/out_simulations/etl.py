@@ -1,22 +1,46 @@
 from pathlib import Path
-from .parser import parse_block
+from typing import Optional
 
-def run_etl(input_path: str, outdir: str, to_parquet: bool = False):
+from blocks.reader import source_name
+from blocks.writer import submit
+from .parser import parse_file
+
+def run_etl(input_path: str, outdir: Optional[str], to_parquet: bool = False):
     """
     Executa o ETL do bloco log_simulation:
     - lê o arquivo de entrada
     - aplica parser
     - salva log.* e log_sweeps.* em outdir
+      (outdir=None: não grava, devolve as tabelas de to_tables)
     """
-    text = Path(input_path).read_text()
-    df_header, df_log_sweeps = parse_block(text)
+    parsed = parse_file(input_path)
+    if outdir is None:
+        return to_tables(parsed, input_path)
+    write_outputs(parsed, input_path, outdir, to_parquet)
+
+
+def to_tables(parsed, input_path: str) -> dict:
+    """Tabelas consolidáveis: {"run_header": ..., "sweeps": ...}, com coluna source_file."""
+    df_header, df_log_sweeps = parsed
+    name = source_name(input_path)
+    df_header = df_header.copy()
+    df_header.insert(0, "source_file", name)
+    df_log_sweeps = df_log_sweeps.copy()
+    df_log_sweeps.insert(0, "source_file", name)
+    return {"run_header": df_header, "sweeps": df_log_sweeps}
+
+
+def write_outputs(parsed, input_path: str, outdir: str, to_parquet: bool = False):
+    """Etapa Load: grava (df_header, df_sweeps) de parse_block (ou LineHandler.finish)."""
+    df_header, df_log_sweeps = parsed
 
     out = Path(outdir)
     out.mkdir(parents=True, exist_ok=True)
 
+    # cada arquivo na etapa de gravação (blocks.writer)
     if to_parquet:
-        df_header.to_parquet(out / "log.parquet", index=False)
-        df_log_sweeps.to_parquet(out / "log_sweeps.parquet", index=False)
+        submit(df_header.to_parquet, out / "log.parquet", index=False)
+        submit(df_log_sweeps.to_parquet, out / "log_sweeps.parquet", index=False)
     else:
-        df_header.to_csv(out / "log.csv", index=False)
-        df_log_sweeps.to_csv(out / "log_sweeps.csv", index=False)
\ No newline at end of file
+        submit(df_header.to_csv, out / "log.csv", index=False)
+        submit(df_log_sweeps.to_csv, out / "log_sweeps.csv", index=False)
\ No newline at end of file
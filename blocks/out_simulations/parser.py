@@ -1,5 +1,10 @@
 import re
-import pandas as pd
+
+from blocks.cache import cached
+from blocks.reader import Source, iter_lines
+
+# versão do parser: incrementar quando a saída mudar (invalida o manifest do etl.batch)
+PARSER_VERSION = "2"
 
 # int/float incluindo notação científica
 NUM = r'[-+]?(?:\d+(?:\.\d*)?|\.\d+)(?:[Ee][+-]?\d+)?'
@@ -32,68 +37,291 @@ sweep_pat = re.compile(
     re.M
 )
 
+_INT_KEYS = {"tausk", "phonskip", "istart"}
+_NUMTRY_HEAD = re.compile(r'^\s*numtry,gsize\s*$')
+
+# palavra-chave literal de cada padrão do cabeçalho: uma única regex
+# (alternância) por linha diz qual padrão completo tentar, em vez de
+# aplicar os 17 padrões a todas as linhas
+_KEYWORDS = {
+    "tausk=": "tausk",
+    "phonskip=": "phonskip",
+    "numtry,gsize": "numtry_gsize",
+    "lambda0 is": "lambda0",
+    "istart is": "istart",
+    "initial phonon scale is": "init_ph_scale",
+    "initial bond field X": "init_bond_x",
+    "initial bond field Y": "init_bond_y",
+    "Using mu =": "mu",
+    "accept holstein ratio is": "accept_hol_warm",
+    "accept2 SSH ratio is": "accept2_ssh_warm",
+    "accept2 Holstein ratio is": "accept2_hol_warm",
+    "gamma is": "gamma",
+    "At end, redo ratio is": "redo_ratio_end",
+    "redo ratio is": "redo_ratio_warmup",
+    "Accept2 SSH=": "accept2_ssh_end",
+    "Accept2 Hol.=": "accept2_hol_end",
+}
+# campos impressos depois da seção de medidas (os únicos procurados nela)
+_END_KEYS = ("redo_ratio_end", "accept2_ssh_end", "accept2_hol_end")
+
+
+def _keyword_re(keys) -> "re.Pattern":
+    return re.compile("|".join(re.escape(kw) for kw, key in _KEYWORDS.items() if key in keys))
+
+
+_HEADER_RE = _keyword_re(header_patterns)
+# os padrões do fim são ancorados em ^\s*: .match desiste no 1º caractere
+_END_RE = re.compile(r'\s*(' + _keyword_re(_END_KEYS).pattern + ')')
+# colunas de df_sweeps (também quando o arquivo ainda não tem sweep completo)
+SWEEP_COLUMNS = ["sweep", "asgn", "asgnp", "accept_holstein", "redo_ratio_sweep", "total_meas", "nwrap", "torth"]
+
+_SWEEP_LINES = 4  # "Finished ..." / "asgn, asgnp: ..." / "Total_meas=" / "nwrap, torth ="
+
+# parâmetros de entrada do run, no prefixo do cabeçalho (até "outname=").
+# O valor pode cair na linha seguinte ("lambdax=\n  0.7745..."), por isso o
+# prefixo é juntado antes de aplicar a regex.
+RUN_PARAMS = {
+    "n": int, "l": int, "warms": int, "sweeps": int, "t": float, "omega": float,
+    "lambdax": float, "dens": float, "dtau": float, "iran": int,
+}
+_PARAM_RE = re.compile(r'\b([A-Za-z]\w*)\s*=\s*(' + NUM + r')')
+_PREFIX_END = ("outname=", "tausk=", "Finished measurement sweep")
+
+
+def parse_run_params(text: str) -> dict:
+    """{param: valor} de RUN_PARAMS encontrados em `text` (1ª ocorrência; ausentes = None)."""
+    found = {}
+    for key, val in _PARAM_RE.findall(text):
+        if key in RUN_PARAMS and key not in found:
+            found[key] = RUN_PARAMS[key](float(val)) if RUN_PARAMS[key] is int else float(val)
+    return {key: found.get(key) for key in RUN_PARAMS}
+
+
+class LineHandler:
+    """
+    Versão incremental do parser: recebe uma linha por vez (``feed``) e
+    devolve (df_header, df_sweeps) em ``finish``, igual a ``parse_block``.
+    Usado pelo scanner de passada única (etl.engine).
+
+    `emit`, se dado, recebe cada sweep (dict) assim que o registro termina
+    (em vez de acumular em self.sweeps); é o que permite o parse_stream.
+
+    Cabeçalho em uma passada: cada linha passa por uma única regex de
+    palavras-chave (_HEADER_RE) e só o padrão da palavra encontrada é
+    aplicado. A partir do 1º "Finished measurement sweep" só os campos do
+    fim (_END_KEYS) continuam sendo procurados, e só até serem achados.
+    """
+
+    # roteamento do etl.engine (blocks.plugin): ativo até o fim do cabeçalho e
+    # dentro de cada registro de sweep; fora disso só o início de um sweep e os campos do fim
+    FIRST_TOKENS = frozenset({"Finished", "At", "Accept2"})
+    CONTAINS = ()
+
+    def __init__(self, emit=None) -> None:
+        self._in_header = True                  # até o 1º "Finished measurement sweep"
+        self._end_missing = len(_END_KEYS)      # campos do fim ainda não encontrados
+        self._first = {}                        # key -> grupo 1 da 1ª ocorrência
+        self._numtry = None                     # (numtry, gsize)
+        self._numtry_head = None                # linha "numtry,gsize" aguardando a próxima
+        self._scales = []                       # ocorrências de "initial phonon scale is"
+        self._sweep_buf = None                  # linhas do registro de sweep em andamento
+        self.misses = 0                         # palavra-chave sem o padrão completo, sweep descartado
+        self._prefix = []                       # linhas do prefixo (parâmetros de entrada)
+        self._params = None                     # parse_run_params do prefixo, quando fechado
+        self._outname = None
+        self._outname_next = False              # a linha seguinte a "outname=" traz o nome
+        self.sweeps = []
+        self._emit = emit or self.sweeps.append
+
+    @property
+    def active(self) -> bool:
+        return (self._in_header or self._params is None or self._outname_next
+                or self._numtry_head is not None or self._sweep_buf is not None)
+
+    @property
+    def in_sweep(self) -> bool:
+        """Registro de sweep começado e ainda não emitido (etl.follow só retoma fora dele)."""
+        return self._sweep_buf is not None
+
+    def feed(self, line: str, tokens=None) -> None:
+        if self._params is None:
+            if any(end in line for end in _PREFIX_END):
+                if "outname=" in line:
+                    rest = line.split("outname=", 1)[1].strip()
+                    self._outname = rest or None
+                    self._outname_next = not rest
+                self._close_prefix()
+            else:
+                self._prefix.append(line)
+        elif self._outname_next and line.strip():
+            self._outname = line.strip()
+            self._outname_next = False
+
+        if self._numtry_head is not None and line.strip():
+            m = header_patterns["numtry_gsize"].search(self._numtry_head + "\n" + line)
+            if m and self._numtry is None:
+                self._numtry = (int(m.group(1)), float(m.group(2)))
+            self._numtry_head = None
+
+        if self._in_header:
+            if "Finished measurement sweep" in line:
+                # início das medidas: daqui em diante só os campos do fim
+                self._in_header = False
+            else:
+                for kw in _HEADER_RE.finditer(line):
+                    self._match(_KEYWORDS[kw.group()], line)
+        elif self._end_missing:
+            kw = _END_RE.match(line)
+            if kw:
+                self._match(_KEYWORDS[kw.group(1)], line)
+
+        self._feed_sweep(line)
+
+    def _match(self, key: str, line: str) -> None:
+        if key == "numtry_gsize":
+            if self._numtry is None and _NUMTRY_HEAD.match(line):
+                self._numtry_head = line  # os valores vêm na próxima linha não vazia
+        elif key == "init_ph_scale":
+            if len(self._scales) < 2:
+                m = header_patterns[key].search(line)
+                if m:
+                    self._scales.append(float(m.group(1)))
+        elif key not in self._first:
+            m = header_patterns[key].search(line)
+            if m:
+                self._first[key] = m.group(1)
+                if key in _END_KEYS:
+                    self._end_missing -= 1
+            else:
+                self.misses += 1
+
+    def _close_prefix(self) -> None:
+        self._params = parse_run_params("\n".join(self._prefix))
+        self._prefix = []
+
+    def _feed_sweep(self, line: str) -> None:
+        if "Finished measurement sweep" in line:
+            self._sweep_buf = [line]
+        elif self._sweep_buf is not None:
+            if not line.strip():
+                return
+            self._sweep_buf.append(line)
+        else:
+            return
+
+        m = sweep_pat.search("\n".join(self._sweep_buf))
+        if m:
+            self._emit({
+                "sweep": int(m.group(1)),
+                "asgn": float(m.group(2)),
+                "asgnp": float(m.group(3)),
+                "accept_holstein": float(m.group(4)),
+                "redo_ratio_sweep": float(m.group(5)),
+                "total_meas": int(m.group(6)),
+                "nwrap": int(m.group(7)),
+                "torth": int(m.group(8)),
+            })
+            self._sweep_buf = None
+        elif len(self._sweep_buf) >= _SWEEP_LINES:
+            # registro incompleto/corrompido: descarta
+            self._sweep_buf = None
+            self.misses += 1
+
+    def _get(self, key):
+        v = self._first.get(key)
+        if v is None:
+            return None
+        return int(v) if key in _INT_KEYS else float(v)
+
+    def header(self) -> dict:
+        header = {}
+        header["tausk"] = self._get("tausk")
+        header["phonskip"] = self._get("phonskip")
+        header["numtry"], header["gsize"] = self._numtry if self._numtry else (None, None)
+        header["lambda0"] = self._get("lambda0")
+        header["istart"] = self._get("istart")
+
+        # Duas ocorrências de "initial phonon scale is ..."
+        scales = self._scales
+        header["initial_phonon_scale_1"] = scales[0] if len(scales) > 0 else None
+        header["initial_phonon_scale_2"] = scales[1] if len(scales) > 1 else None
+
+        header["initial_bond_field_x"] = self._get("init_bond_x")
+        header["initial_bond_field_y"] = self._get("init_bond_y")
+        header["mu"] = self._get("mu")
+        header["accept_holstein_warmup"] = self._get("accept_hol_warm")
+        header["accept2_ssh_warmup"] = self._get("accept2_ssh_warm")
+        header["accept2_holstein_warmup"] = self._get("accept2_hol_warm")
+        header["gamma"] = self._get("gamma")
+        header["redo_ratio_warmup"] = self._get("redo_ratio_warmup")
+        header["redo_ratio_end"] = self._get("redo_ratio_end")
+        header["accept2_ssh_end"] = self._get("accept2_ssh_end")
+        header["accept2_hol_end"] = self._get("accept2_hol_end")
+
+        # parâmetros de entrada (n, l, lambdax, iran...) e nome de saída do run
+        if self._params is None:
+            self._close_prefix()
+        header.update(self._params)
+        header["outname"] = self._outname
+        return header
+
+    def finish(self):
+        import pandas as pd
+
+        df_header = pd.DataFrame([self.header()])
+        df_sweeps = pd.DataFrame(self.sweeps, columns=SWEEP_COLUMNS).sort_values("sweep").reset_index(drop=True)
+        return df_header, df_sweeps
+
+
+@cached("out_simulations", text=True)
 def parse_block(text: str):
     """
     Recebe todo o texto de um .out/.log e devolve dois DataFrames:
     - df_header: 1 linha com metadados do run
     - df_sweeps: N linhas (uma por sweep) com métricas
     """
-    def first_float(pat):
-        m = pat.search(text)
-        return float(m.group(1)) if m else None
-
-    def first_int(pat):
-        m = pat.search(text)
-        return int(m.group(1)) if m else None
-
-    header = {}
-    header["tausk"] = first_int(header_patterns["tausk"])
-    header["phonskip"] = first_int(header_patterns["phonskip"])
-
-    m = header_patterns["numtry_gsize"].search(text)
-    if m:
-        header["numtry"] = int(m.group(1))
-        header["gsize"] = float(m.group(2))
-    else:
-        header["numtry"] = None
-        header["gsize"] = None
-
-    header["lambda0"] = first_float(header_patterns["lambda0"])
-    header["istart"] = first_int(header_patterns["istart"])
-
-    # Duas ocorrências de "initial phonon scale is ..."
-    init_scales = header_patterns["init_ph_scale"].finditer(text)
-    scales = [float(mm.group(1)) for mm in init_scales]
-    header["initial_phonon_scale_1"] = scales[0] if len(scales) > 0 else None
-    header["initial_phonon_scale_2"] = scales[1] if len(scales) > 1 else None
-
-    header["initial_bond_field_x"] = first_float(header_patterns["init_bond_x"])
-    header["initial_bond_field_y"] = first_float(header_patterns["init_bond_y"])
-    header["mu"] = first_float(header_patterns["mu"])
-    header["accept_holstein_warmup"] = first_float(header_patterns["accept_hol_warm"])
-    header["accept2_ssh_warmup"] = first_float(header_patterns["accept2_ssh_warm"])
-    header["accept2_holstein_warmup"] = first_float(header_patterns["accept2_hol_warm"])
-    header["gamma"] = first_float(header_patterns["gamma"])
-    header["redo_ratio_warmup"] = first_float(header_patterns["redo_ratio_warmup"])
-    header["redo_ratio_end"] = first_float(header_patterns["redo_ratio_end"])
-    header["accept2_ssh_end"] = first_float(header_patterns["accept2_ssh_end"])
-    header["accept2_hol_end"] = first_float(header_patterns["accept2_hol_end"])
-
-    # Sweeps
-    sweeps = []
-    for m in sweep_pat.finditer(text):
-        sweep = {
-            "sweep": int(m.group(1)),
-            "asgn": float(m.group(2)),
-            "asgnp": float(m.group(3)),
-            "accept_holstein": float(m.group(4)),
-            "redo_ratio_sweep": float(m.group(5)),
-            "total_meas": int(m.group(6)),
-            "nwrap": int(m.group(7)),
-            "torth": int(m.group(8)),
-        }
-        sweeps.append(sweep)
-
-    df_header = pd.DataFrame([header])
-    df_sweeps = pd.DataFrame(sweeps).sort_values("sweep").reset_index(drop=True)
-    return df_header, df_sweeps
\ No newline at end of file
+    handler = LineHandler()
+    for line in text.splitlines():
+        handler.feed(line)
+    return handler.finish()
+
+
+@cached("out_simulations")
+def parse_file(source: Source):
+    """Como parse_block, mas lendo `source` (caminho, "-" ou arquivo aberto) linha a linha."""
+    handler = LineHandler()
+    for line in iter_lines(source):
+        handler.feed(line)
+    return handler.finish()
+
+
+def read_header(source: Source) -> dict:
+    """
+    Só o cabeçalho do run: lê `source` até o primeiro "Finished measurement
+    sweep" e devolve o dict de LineHandler.header() (campos do fim do
+    arquivo, como redo_ratio_end, ficam None). Barato para indexar campanhas.
+    """
+    handler = LineHandler()
+    for line in iter_lines(source):
+        if "Finished measurement sweep" in line:
+            break
+        handler.feed(line)
+    return handler.header()
+
+
+def parse_stream(source: Source):
+    """
+    Versão em streaming: gera ("sweep", dict) a cada registro de sweep
+    completo e, no fim da leitura, ("header", dict) com os metadados do run
+    (alguns campos, como redo_ratio_end, só aparecem no fim do arquivo).
+    """
+    ready = []
+    handler = LineHandler(emit=ready.append)
+    for line in iter_lines(source):
+        handler.feed(line)
+        if ready:
+            for sweep in ready:
+                yield "sweep", sweep
+            ready.clear()
+    yield "header", handler.header()
@@ -0,0 +1,120 @@
+"""
+Interface de plugin dos blocos e roteamento de linhas do etl.engine.
+
+Um bloco é um pacote que expõe LineHandler, to_tables, write_outputs e
+PARSER_VERSION (ver etl.engine.BLOCKS). Para o roteamento, o LineHandler declara:
+
+    FIRST_TOKENS  1º tokens das linhas que podem abrir algo do bloco, ex.: {"Average"}
+    CONTAINS      substrings que fazem o mesmo em qualquer posição, ex.: ("(q)",)
+    active        True enquanto o handler precisa de todas as linhas (bloco de
+                  matriz aberto, "+-" esperando o erro, registro de sweep...)
+
+Uma linha chega ao handler se ele está ativo, se o 1º token está em
+FIRST_TOKENS ou se ela contém alguma substring de CONTAINS. Linhas em branco
+e linhas cujo 1º token é numérico (as linhas de matriz, quase todo o
+arquivo) só vão para os handlers ativos. Um handler sem FIRST_TOKENS nem
+CONTAINS recebe todas as linhas, como antes. O roteamento só tira do
+handler linhas que ele ignoraria, então parse_file/parse_stream, que
+alimentam o handler com todas as linhas, continuam valendo.
+"""
+
+import re
+from typing import Dict, List, Optional
+
+# 1º caractere de um token numérico (linhas de matriz: "0 1 -0.12 +- 1.4E-004")
+_NUMERIC_START = frozenset("0123456789+-.")
+
+_PM_ANY = r'(?:\+\-|(?:\+\/\-)|±)'
+_TRAILING_PM = re.compile(rf'{_PM_ANY}\s*\Z')
+
+
+class Reflow:
+    """
+    Refluxo de linhas "nome = valor +-" cujo erro foi quebrado para a
+    próxima linha não vazia (também "+/-" e "±", com ou sem espaços finais).
+    """
+
+    __slots__ = ("pending",)
+
+    def __init__(self) -> None:
+        self.pending: Optional[str] = None
+
+    def push(self, line: str) -> Optional[str]:
+        """Linha completa para casar, ou None se ainda falta a continuação."""
+        if self.pending is not None:
+            if line.strip() == '':
+                return None
+            # cola a próxima linha não vazia (strip à esquerda p/ não criar dois espaços)
+            cur = self.pending + ' ' + line.lstrip()
+            self.pending = None
+            return cur
+        cur = line.rstrip(' \t\r\x0b\x0c\xa0')
+        if _TRAILING_PM.search(cur):
+            self.pending = cur
+            return None
+        return cur
+
+    def flush(self) -> Optional[str]:
+        """Fim do arquivo logo após um "+-": a linha sem o erro (ou None)."""
+        cur, self.pending = self.pending, None
+        return cur
+
+
+def declares_routes(handler) -> bool:
+    return bool(getattr(handler, "FIRST_TOKENS", None) or getattr(handler, "CONTAINS", None))
+
+
+def triggered(handler, line: str, tokens: List[str]) -> bool:
+    """A linha pode abrir algo para `handler` (fora do estado ativo)?"""
+    if not tokens or tokens[0][0] in _NUMERIC_START:
+        return False
+    if tokens[0] in handler.FIRST_TOKENS:
+        return True
+    return any(s in line for s in handler.CONTAINS)
+
+
+class Dispatcher:
+    """
+    Tabela de roteamento de um conjunto de handlers: 1º token -> handlers,
+    mais a lista de substrings; feed() entrega a linha só a quem interessa.
+    """
+
+    def __init__(self, handlers: Dict[str, object]) -> None:
+        self.always = [h for h in handlers.values() if not declares_routes(h)]
+        self.by_first: Dict[str, List[object]] = {}
+        self.contains = []
+        for h in handlers.values():
+            if not declares_routes(h):
+                continue
+            for tok in getattr(h, "FIRST_TOKENS", ()):
+                self.by_first.setdefault(tok, []).append(h)
+            for s in getattr(h, "CONTAINS", ()):
+                self.contains.append((s, h))
+        # quem começa ativo (ex.: out_simulations lendo o cabeçalho) recebe tudo desde a 1ª linha
+        self.live = [h for h in handlers.values() if declares_routes(h) and h.active]
+
+    def feed(self, line: str, tokens: List[str]) -> None:
+        for h in self.always:
+            h.feed(line, tokens)
+        fed = self.live
+        if fed:
+            for h in fed:
+                h.feed(line, tokens)
+            for h in fed:
+                if not h.active:
+                    self.live = [x for x in fed if x.active]
+                    break
+        if not tokens or tokens[0][0] in _NUMERIC_START:
+            return
+        targets = self.by_first.get(tokens[0])
+        for s, h in self.contains:
+            if s in line:
+                targets = [*targets, h] if targets else [h]
+        if not targets:
+            return
+        for h in dict.fromkeys(targets):
+            if h in fed:
+                continue
+            h.feed(line, tokens)
+            if h.active and h not in self.live:
+                self.live = [*self.live, h]
@@ -0,0 +1,197 @@
+"""
+Leitura linha a linha compartilhada pelos parsers dos blocos.
+
+`iter_lines` aceita um caminho, "-" ou Stdin(nome) (stdin) ou um objeto-arquivo
+já aberto (texto ou binário) e gera as linhas sem o '\\n' final, sem nunca carregar o
+arquivo inteiro na memória. Serve também para arquivos ainda sendo escritos
+e para dados chegando por pipe.
+
+A normalização de cabeçalhos que antes era feita pelo preprocess.sh (sed -i
+no próprio arquivo de entrada) acontece aqui, linha a linha, sem tocar no
+arquivo e sem I/O extra:
+    linha com "bonds x"      -> "bonds x:"
+    linha com "bonds y"      -> "bonds y:"
+    linha com "<nk>:"/"nk:"  -> "n(q):"
+
+Entradas comprimidas (.gz, .xz, .bz2, .zst) são descomprimidas em streaming,
+sem arquivo temporário. A descompressão roda numa thread (zlib/lzma/bz2/zstd
+liberam o GIL) que vai enchendo uma fila limitada enquanto o parser consome,
+então as duas etapas se sobrepõem. .zst precisa do pacote opcional zstandard.
+"""
+import bz2
+import gzip
+import io
+import lzma
+import queue
+import re
+import sys
+import threading
+from os import PathLike
+from pathlib import Path
+from typing import IO, Iterator, Union
+
+Source = Union[str, PathLike, IO]
+
+COMPRESSED_SUFFIXES = (".gz", ".xz", ".bz2", ".zst")
+
+STDIN_NAME = "stdin"  # nome de uma entrada "-" em source_file e nos arquivos de saída
+
+
+class Stdin(PathLike):
+    """
+    Entrada lida do stdin com nome: o nome (padrão STDIN_NAME) faz o papel do
+    caminho em source_file e nos nomes dos arquivos de saída (etl.run --input - --name).
+    """
+
+    def __init__(self, name: str = STDIN_NAME):
+        self.name = name
+
+    def __fspath__(self) -> str:
+        return self.name
+
+    def __str__(self) -> str:
+        return self.name
+
+    def __repr__(self) -> str:
+        return f"Stdin({self.name!r})"
+
+
+def is_stdin(source) -> bool:
+    return isinstance(source, Stdin) or (isinstance(source, (str, PathLike)) and str(source) == "-")
+
+
+_NK = re.compile(r'(?:<nk>|\bnk):')
+
+
+def normalize_line(ln: str) -> str:
+    """Reescreve os cabeçalhos "bonds x/y" e "nk" (mesmas regras do antigo preprocess.sh)."""
+    if "bonds " in ln:
+        if "bonds x" in ln:
+            return "bonds x:"
+        if "bonds y" in ln:
+            return "bonds y:"
+    if "nk" in ln and _NK.search(ln):
+        return "n(q):"
+    return ln
+
+
+def source_name(path: Union[str, PathLike]) -> str:
+    """Nome do arquivo sem a extensão de compressão: "run.out.gz" -> "run.out" (coluna source_file)."""
+    p = Path(STDIN_NAME if str(path) == "-" else path)
+    if p.suffix.lower() in COMPRESSED_SUFFIXES:
+        p = p.with_suffix("")
+    return p.name
+
+
+def source_stem(path: Union[str, PathLike]) -> str:
+    """Stem do arquivo sem a extensão de compressão: "run.out.gz" -> "run"."""
+    return Path(source_name(path)).stem
+
+
+def open_binary(path: Union[str, PathLike]) -> IO[bytes]:
+    """Abre `path` em modo binário, descomprimindo conforme a extensão."""
+    suffix = Path(path).suffix.lower()
+    if suffix == ".gz":
+        return gzip.open(path, "rb")
+    if suffix == ".xz":
+        return lzma.open(path, "rb")
+    if suffix == ".bz2":
+        return bz2.open(path, "rb")
+    if suffix == ".zst":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError(f"{path}: entrada .zst requer o pacote 'zstandard' (pip install zstandard)") from e
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return open(path, "rb")
+
+
+class _Prefetch(io.RawIOBase):
+    """Lê (e descomprime) `raw` numa thread, em blocos, numa fila de tamanho limitado."""
+
+    def __init__(self, raw: IO[bytes], chunk_size: int = 1 << 20, depth: int = 4):
+        super().__init__()
+        self._raw = raw
+        self._chunk_size = chunk_size
+        self._queue: queue.Queue = queue.Queue(maxsize=depth)
+        self._stop = threading.Event()
+        self._buf = memoryview(b"")
+        self._eof = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        while not self._stop.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _run(self) -> None:
+        try:
+            while True:
+                chunk = self._raw.read(self._chunk_size)
+                if not self._put(chunk) or not chunk:
+                    return
+        except BaseException as e:  # repassa o erro para quem está lendo
+            self._put(e)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        if not self._buf:
+            if self._eof:
+                return 0
+            item = self._queue.get()
+            if isinstance(item, BaseException):
+                self._eof = True
+                raise item
+            if not item:
+                self._eof = True
+                return 0
+            self._buf = memoryview(item)
+        n = min(len(b), len(self._buf))
+        b[:n] = self._buf[:n]
+        self._buf = self._buf[n:]
+        return n
+
+    def close(self) -> None:
+        if not self.closed:
+            self._stop.set()
+            self._thread.join()
+            self._raw.close()
+        super().close()
+
+
+def open_text(path: Union[str, PathLike], prefetch: bool = True) -> IO[str]:
+    """
+    Abre `path` como texto (utf-8, erros ignorados). Comprimido: descompressão
+    em streaming, numa thread de prefetch se `prefetch`.
+    """
+    raw = open_binary(path)
+    if Path(path).suffix.lower() in COMPRESSED_SUFFIXES:
+        raw = io.BufferedReader(_Prefetch(raw)) if prefetch else io.BufferedReader(raw)
+    return io.TextIOWrapper(raw, encoding="utf-8", errors="ignore")
+
+
+def iter_lines(source: Source, normalize: bool = True) -> Iterator[str]:
+    if is_stdin(source):
+        yield from iter_lines(sys.stdin, normalize)
+        return
+    if isinstance(source, (str, PathLike)):
+        with open_text(source) as f:
+            yield from _clean(f, normalize)
+        return
+
+    yield from _clean(source, normalize)
+
+
+def _clean(lines, normalize: bool) -> Iterator[str]:
+    for ln in lines:
+        if isinstance(ln, bytes):
+            ln = ln.decode("utf-8", errors="ignore")
+        ln = ln.rstrip("\r\n")
+        yield normalize_line(ln) if normalize else ln
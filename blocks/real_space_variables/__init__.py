@@ -1,11 +1,15 @@
 """
 Blocos:s
-Expõe: parse_block (parser) e run_etl (cola ETL para salvar em arquivos).
+Expõe: parse_block (parser, lê linha a linha), parse_stream (gera registros
+um a um), LineHandler (parser incremental, linha a linha),
+run_etl (cola ETL para salvar em arquivos), write_outputs (só a etapa Load),
+read_metric (uma métrica do arquivo combinado)
+e to_tables (DataFrames consolidáveis, usados pelo etl.batch).
 """
-from .parser import parse_block
-from .etl import run_etl
+from .parser import parse_block, parse_stream, LineHandler, PARSER_VERSION
+from .etl import run_etl, write_outputs, to_tables, read_metric
 
-__all__ = ["parse_block", "run_etl"]
+__all__ = ["parse_block", "parse_stream", "LineHandler", "PARSER_VERSION", "run_etl", "write_outputs", "to_tables", "read_metric"]
 
 
 ## __all_ : define o que vai ser exportado quando fizer from blocks.out_simulations import *
\ No newline at end of file
@@ -2,13 +2,16 @@
 from __future__ import annotations
 import re
 from pathlib import Path
-from typing import List
-import pandas as pd
+from typing import Dict, Iterator, List
+
+from blocks.dense import DenseBlock, concat_pandas
+from blocks.reader import source_name
+from blocks.writer import submit
 
 from .parser import (
     parse_block,
-    parse_numeric_matrix_single,
-    parse_numeric_matrix_pair,
+    parse_numeric_arrays_single,
+    parse_numeric_arrays_pair,
     block_is_pair,
 )
 
@@ -17,54 +20,145 @@ def _safe_name(name: str) -> str:
     s = re.sub(r'[^a-z0-9._-]+', '_', s)
     return s.strip('_') or 'unnamed'
 
-def run_etl(input_path: str, outdir: str, to_parquet: bool = False) -> None:
-    out = Path(outdir); out.mkdir(parents=True, exist_ok=True)
+_SINGLE_COLS = ["value", "err"]
+_PAIR_COLS = ["value_upup", "err_upup", "value_updn", "err_updn"]
 
+def run_etl(input_path: str, outdir: str | None, to_parquet: bool = False,
+            per_metric: bool = True):
+    """
+    ETL do bloco real_space_variables. Com outdir=None nada é gravado e
+    as tabelas de to_tables são devolvidas (unidade de trabalho do etl.batch).
+    """
     blocks = parse_block(input_path)
-    if not blocks:
-        print(f"[real_space_variables] Nenhum bloco encontrado em: {input_path}")
-        return
-
-    per_block_dfs: List[pd.DataFrame] = []
+    if outdir is None:
+        return to_tables(blocks, input_path)
+    write_outputs(blocks, input_path, outdir, to_parquet, per_metric)
 
+def dense_blocks(blocks: Dict[str, List[str]], input_path: str,
+                 pairs: Dict[str, bool] | None = None) -> Iterator[DenseBlock]:
+    """
+    Gera um DenseBlock para cada bloco com linhas numéricas válidas.
+    `pairs` ({header: block_is_pair}), se já calculado, evita votar de novo.
+    """
+    name = source_name(input_path)
     for header, lines in blocks.items():
-        if block_is_pair(lines):
-            rows = parse_numeric_matrix_pair(lines)
-            if not rows:
-                continue
-            df = pd.DataFrame(
-                rows,
-                columns=["i", "j", "value_upup", "err_upup", "value_updn", "err_updn"]
-            )
+        if pairs[header] if pairs is not None else block_is_pair(lines):
+            cols = _PAIR_COLS
+            arrays = parse_numeric_arrays_pair(lines)
         else:
-            rows = parse_numeric_matrix_single(lines)
-            if not rows:
-                continue
-            df = pd.DataFrame(rows, columns=["i", "j", "value", "err"])
+            cols = _SINGLE_COLS
+            arrays = parse_numeric_arrays_single(lines)
+        if not len(arrays[0]):
+            continue
+        yield DenseBlock(header, name, {"i": arrays[0], "j": arrays[1]}, dict(zip(cols, arrays[2:])))
 
-            
-        df.insert(0, "source_file", Path(input_path).name)
+def to_tables(blocks: Dict[str, List[str]], input_path: str) -> Dict[str, "pd.DataFrame"]:
+    """Tabelas consolidáveis: {"realspace": DataFrame}."""
+    df = concat_pandas(dense_blocks(blocks, input_path), label="metric")
+    if df is None:
+        return {}
+    return {"realspace": df}
 
-        df.insert(1, "metric", header)
+def _write(block: DenseBlock, path: Path, to_parquet: bool) -> None:
+    """Arquivo de uma métrica."""
+    if to_parquet:
+        import pyarrow.parquet as pq
+        pq.write_table(block.to_arrow(label="metric"), path)
+        return
+    with path.open("w", newline="") as f:
+        block.write_csv(f, label="metric")
+
+class _Combined:
+    """
+    real_space_variables.{csv,parquet} gravado bloco a bloco, sem concatenar:
+    no Parquet cada métrica é uma row group (ParquetWriter), no CSV as linhas
+    de cada bloco vão direto para o arquivo. Colunas: a união de todos os
+    blocos, na ordem em que aparecem; as que um bloco não tem saem nulas/vazias.
+    """
 
-        stem = _safe_name(header)
-        per_path = out / f"{stem}.{ 'parquet' if to_parquet else 'csv' }"
+    def __init__(self, path: Path, to_parquet: bool, columns: List[str], first: DenseBlock):
+        self.columns = ["source_file", "metric", *columns]
         if to_parquet:
-            df.to_parquet(per_path, index=False)
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            fields = {f.name: f for f in first.to_arrow(label="metric").schema}
+            self.schema = pa.schema([fields.get(c, pa.field(c, pa.float64())) for c in self.columns])
+            self._writer = pq.ParquetWriter(path, self.schema)
+            self._f = None
+        else:
+            self._writer = None
+            self._f = path.open("w", newline="")
+            self._header = True
+
+    def append(self, block: DenseBlock) -> None:
+        if self._writer is None:
+            block.write_csv(self._f, label="metric", columns=self.columns, header=self._header)
+            self._header = False
+            return
+        import pyarrow as pa
+        table = block.to_arrow(label="metric")
+        arrays = [table.column(c) if c in table.column_names else pa.nulls(len(block), f.type)
+                  for c, f in zip(self.columns, self.schema)]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
         else:
-            df.to_csv(per_path, index=False)
+            self._f.close()
+
+def write_outputs(blocks: Dict[str, List[str]], input_path: str, outdir: str,
+                  to_parquet: bool = False, per_metric: bool = True) -> None:
+    """
+    Etapa Load: grava o resultado de parse_block (ou LineHandler.finish) em
+    real_space_variables.{csv,parquet}, uma métrica por vez (só um bloco
+    denso na memória). per_metric: também um arquivo por métrica, na etapa
+    de gravação (blocks.writer); False (etl.run --combined-only) grava só o
+    combinado, de onde as métricas saem como filtro (read_metric).
+    """
+    out = Path(outdir); out.mkdir(parents=True, exist_ok=True)
 
-        per_block_dfs.append(df)
+    if not blocks:
+        print(f"[real_space_variables] Nenhum bloco encontrado em: {input_path}")
+        return
 
-    if not per_block_dfs:
+    ext = 'parquet' if to_parquet else 'csv'
+    pairs = {header: block_is_pair(lines) for header, lines in blocks.items()}
+    columns = list(dict.fromkeys(["i", "j", *(c for p in pairs.values() for c in (_PAIR_COLS if p else _SINGLE_COLS))]))
+
+    combined = None
+    count = 0
+    try:
+        for block in dense_blocks(blocks, input_path, pairs):
+            if combined is None:
+                combined = _Combined(out / f"real_space_variables.{ext}", to_parquet, columns, block)
+            combined.append(block)
+            if per_metric:
+                submit(_write, block, out / f"{_safe_name(block.name)}.{ext}", to_parquet)
+            count += 1
+    finally:
+        if combined is not None:
+            combined.close()
+
+    if not count:
         print(f"[real_space_variables] Blocos detectados, mas sem linhas numéricas válidas em: {input_path}")
         return
 
-    big = pd.concat(per_block_dfs, ignore_index=True)
-    combined = out / f"real_space_variables.{ 'parquet' if to_parquet else 'csv' }"
-    if to_parquet:
-        big.to_parquet(combined, index=False)
-    else:
-        big.to_csv(combined, index=False)
+    print(f"[real_space_variables] OK: {count} bloco(s) processados.")
 
-    print(f"[real_space_variables] OK: {len(per_block_dfs)} bloco(s) processados.")
\ No newline at end of file
+def read_metric(outdir: str, metric: str) -> "pd.DataFrame":
+    """
+    Uma métrica do arquivo combinado em `outdir` (o arquivo por métrica como
+    filtro). No Parquet só a row group da métrica é lida (estatísticas de "metric").
+    """
+    base = Path(outdir)
+    if (base / "real_space_variables.parquet").exists():
+        import pyarrow.parquet as pq
+        table = pq.read_table(base / "real_space_variables.parquet", filters=[("metric", "=", metric)])
+        df = table.to_pandas()
+    else:
+        import pandas as pd
+        df = pd.read_csv(base / "real_space_variables.csv", float_precision="round_trip")
+        df = df[df["metric"] == metric]
+    # colunas do outro layout (single/par-duplo) ficam todas nulas
+    return df.dropna(axis=1, how="all").reset_index(drop=True)
@@ -1,8 +1,13 @@
 # parser.py
 from __future__ import annotations
 import re
-from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from blocks.cache import cached
+from blocks.reader import Source, iter_lines
+
+# versão do parser: incrementar quando a saída mudar (invalida o manifest do etl.batch)
+PARSER_VERSION = "1"
 
 NUMBER_RE = r'[+-]?(?:\d+(?:\.\d*)?|\.\d+)(?:[Ee][+-]?\d+)?'
 
@@ -30,78 +35,143 @@ HEADER_COLON_RE = re.compile(
     r'^\s*(?P<name>[^:]+):\s*(?P<meta>.*)?$'
 )
 
-def _read_lines(input_path: str) -> List[str]:
-    return Path(input_path).read_text().splitlines()
+def _header_name_if_valid(s: str) -> str | None:
+    if "(q)" in s.lower():
+        return None
+    m_corr = HEADER_CORR_RE.match(s)
+    if m_corr:
+        return m_corr.group('name').strip()
+    m_colon = HEADER_COLON_RE.match(s)
+    if m_colon:
+        return m_colon.group('name').strip()
+    return None
+
+class LineHandler:
+    """
+    Versão incremental do parser: recebe uma linha por vez (``feed``) e
+    devolve { header_name : [linhas_de_dados] } em ``finish``.
+    Usado pelo scanner de passada única (etl.engine).
+
+    `emit(header_name, linha)`, se dado, recebe cada linha de dados assim que
+    é lida (em vez de acumular em self.blocks); é o que permite o parse_stream.
+    """
+
+    # roteamento do etl.engine (blocks.plugin): cabeçalhos têm ":" ou "correlation function"
+    FIRST_TOKENS = frozenset()
+    CONTAINS = (":", "orrelation")
+
+    def __init__(self, emit: Callable[[str, str], None] | None = None) -> None:
+        self.blocks: Dict[str, List[str]] = {}
+        self._emit = emit
+        self._name: str | None = None
+        self._rows: List[str] = []
 
-def parse_block(input_path: str) -> Dict[str, List[str]]:
+    @property
+    def active(self) -> bool:
+        return self._name is not None
+
+    def _close(self) -> None:
+        if self._name and self._rows:
+            self.blocks.setdefault(self._name, []).extend(self._rows)
+        self._name, self._rows = None, []
+
+    def feed(self, line: str, tokens: List[str] | None = None) -> None:
+        # dentro de um bloco: coleta linhas enquanto forem do tipo simples OU par-duplo
+        if self._name is not None and (ROW_RE.match(line) or ROW_PAIR_RE.match(line)):
+            if self._emit is not None:
+                if self._name:
+                    self._emit(self._name, line)
+            else:
+                self._rows.append(line)
+            return
+        self._close()
+        self._name = _header_name_if_valid(line)
+
+    def finish(self) -> Dict[str, List[str]]:
+        self._close()
+        return self.blocks
+
+@cached("real_space_variables")
+def parse_block(input_path: Source) -> Dict[str, List[str]]:
     """
     Retorna { header_name : [linhas_de_dados] } para blocos sem '(q)'.
     Um bloco é um cabeçalho seguido de linhas que casam ROW_RE ou ROW_PAIR_RE.
     """
-    lines = _read_lines(input_path)
-    blocks: Dict[str, List[str]] = {}
-    i, n = 0, len(lines)
-
-    def _header_name_if_valid(s: str) -> str | None:
-        if "(q)" in s.lower():
-            return None
-        m_corr = HEADER_CORR_RE.match(s)
-        if m_corr:
-            return m_corr.group('name').strip()
-        m_colon = HEADER_COLON_RE.match(s)
-        if m_colon:
-            return m_colon.group('name').strip()
+    handler = LineHandler()
+    for line in iter_lines(input_path):
+        handler.feed(line)
+    return handler.finish()
+
+def parse_stream(source: Source) -> Iterator[tuple]:
+    """
+    Versão em streaming: lê `source` (caminho, "-" ou arquivo aberto) linha a
+    linha e gera, assim que cada linha é lida,
+        (header, i, j, val, err)                 linhas simples (err=nan se ausente)
+        (header, i, j, val1, err1, val2, err2)   linhas par-duplo (up-up / up-dn)
+    Sem o bloco inteiro em memória não há o voto de block_is_pair: cada linha
+    vale pelo próprio formato.
+    """
+    ready: List[Tuple[str, str]] = []
+    handler = LineHandler(emit=lambda name, ln: ready.append((name, ln)))
+    for line in iter_lines(source):
+        handler.feed(line)
+        if ready:
+            for name, row in ready:
+                parsed = parse_numeric_matrix_pair([row]) or parse_numeric_matrix_single([row])
+                if parsed:
+                    yield (name, *parsed[0])
+            ready.clear()
+    handler.finish()
+
+def _single_fallback(s: str):
+    m = ROW_RE.match(s)
+    if not m:
         return None
+    return m.group('i'), m.group('j'), m.group('val'), m.group('err') or 'nan'
 
-    while i < n:
-        name = _header_name_if_valid(lines[i])
-        if not name:
-            i += 1
-            continue
+def _pair_fallback(s: str):
+    m = ROW_PAIR_RE.match(s)
+    return m.group('i', 'j', 'val1', 'err1', 'val2', 'err2') if m else None
 
-        j = i + 1
-        rows: List[str] = []
-        # coleta linhas enquanto forem do tipo simples OU par-duplo
-        while j < n and (ROW_RE.match(lines[j]) or ROW_PAIR_RE.match(lines[j])):
-            rows.append(lines[j])
-            j += 1
+# layouts do caminho rápido (blocks.matrix): "i j val +- err" e "i j v1 +- e1 v2 +- e2"
+_SINGLE = ("i", "i", "f", "+-", "f")
+_PAIR = ("i", "i", "f", "+-", "f", "f", "+-", "f")
 
-        if rows:
-            blocks.setdefault(name, []).extend(rows)
-            i = j
-        else:
-            i += 1
+def parse_numeric_arrays_single(lines: List[str]):
+    """Vetorizado: arrays (i, j, val, err); err=nan se ausente."""
+    from blocks.matrix import parse_table
+    return parse_table(lines, _SINGLE, _single_fallback, signed=True)
 
-    return blocks
+def parse_numeric_arrays_pair(lines: List[str]):
+    """Vetorizado: arrays (i, j, val1, err1, val2, err2)."""
+    from blocks.matrix import parse_table
+    return parse_table(lines, _PAIR, _pair_fallback, signed=True)
 
 def parse_numeric_matrix_single(lines: List[str]) -> List[Tuple[int, int, float, float]]:
     """i, j, val, err? (err=nan se ausente)"""
-    out: List[Tuple[int, int, float, float]] = []
-    for s in lines:
-        m = ROW_RE.match(s)
-        if not m:
-            continue
-        i = int(m.group('i')); j = int(m.group('j'))
-        val = float(m.group('val'))
-        err = float(m.group('err')) if m.group('err') is not None else float('nan')
-        out.append((i, j, val, err))
-    return out
+    return list(zip(*(a.tolist() for a in parse_numeric_arrays_single(lines))))
 
 def parse_numeric_matrix_pair(lines: List[str]) -> List[Tuple[int, int, float, float, float, float]]:
     """i, j, val1, err1, val2, err2 (para up-up / up-dn)"""
-    out: List[Tuple[int, int, float, float, float, float]] = []
-    for s in lines:
-        m = ROW_PAIR_RE.match(s)
-        if not m:
-            continue
-        i = int(m.group('i')); j = int(m.group('j'))
-        v1 = float(m.group('val1')); e1 = float(m.group('err1'))
-        v2 = float(m.group('val2')); e2 = float(m.group('err2'))
-        out.append((i, j, v1, e1, v2, e2))
-    return out
+    return list(zip(*(a.tolist() for a in parse_numeric_arrays_pair(lines))))
+
+def _row_kind(s: str) -> str | None:
+    """'pair', 'single' ou None; decide pelo split e só usa as regex se o split não bastar."""
+    t = s.split()
+    if len(t) >= 3 and t[0].lstrip('-').isdigit() and t[1].lstrip('-').isdigit():
+        if len(t) == 8 and t[3] == '+-' and t[6] == '+-':
+            return 'pair'
+        if len(t) == 3 or (len(t) == 5 and t[3] == '+-'):
+            return 'single'
+    if ROW_PAIR_RE.match(s):
+        return 'pair'
+    if ROW_RE.match(s):
+        return 'single'
+    return None
 
 def block_is_pair(lines: List[str]) -> bool:
     """Verdadeiro se a maioria das linhas bater o formato 'par-duplo'."""
-    hits = sum(1 for s in lines if ROW_PAIR_RE.match(s))
-    total = sum(1 for s in lines if (ROW_PAIR_RE.match(s) or ROW_RE.match(s)))
-    return (total > 0) and (hits >= max(1, total // 2))
\ No newline at end of file
+    kinds = [_row_kind(s) for s in lines]
+    hits = kinds.count('pair')
+    total = hits + kinds.count('single')
+    return (total > 0) and (hits >= max(1, total // 2))
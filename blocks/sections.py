@@ -0,0 +1,137 @@
+"""
+Índice das seções de um .out por offset de byte, sem decodificar o arquivo.
+
+O arquivo é mapeado na memória (mmap) e uma regex sobre os bytes marca onde
+começa cada seção; só as linhas de cabeçalho são decodificadas, para dar às
+seções o mesmo nome que os parsers usam:
+
+    header     parâmetros do run (do início até o 1º sweep)
+    sweeps     registros "Finished measurement sweep ..."
+    summary    escalares do resumo a partir do 1º "Accept2"/"Average"
+    realspace  cada bloco de matriz sem (q): "Green's function", "bonds x", ...
+    kspace     cada bloco "...(q):", ex.: "Sxx(q)", "n(q)"
+    wave       cada simetria "s-wave:", "dxy-wave:" (Peff/GmP/P0GP)
+
+Uma seção vai do início da sua linha de cabeçalho até o início da seguinte.
+Os escalares soltos depois das matrizes ("RMS AF correlation function",
+Peff/GmP/P0GP) ficam nas seções em que aparecem (a do "xx Spin", as wave).
+
+Com as seções em mãos, o parser só lê os bytes de que precisa:
+
+    from blocks import k_space_variables
+    sec = find_section(index_file(path), "Sxx(q)")
+    rows = k_space_variables.parse_block(open_section(path, sec))
+
+open_section/read_section leem só [start, end). Guardados no índice da
+campanha (python -m etl.index build --sections), os offsets permitem tirar
+um observável de milhares de arquivos lendo poucos KB de cada um.
+
+Entradas comprimidas não podem ser mapeadas: o índice descomprime o arquivo
+em memória e read_section descomprime até o fim da seção. Um run por arquivo
+(em .out concatenados só o 1º header/sweeps/summary é marcado).
+"""
+
+import io
+import mmap
+import re
+from os import PathLike
+from pathlib import Path
+from typing import IO, Iterator, List, NamedTuple, Optional, Union
+
+from blocks.reader import COMPRESSED_SUFFIXES, iter_lines, normalize_line, open_binary
+
+KINDS = ("header", "sweeps", "summary", "realspace", "kspace", "wave")
+
+# começa no "\n" que antecede a linha: o prefixo literal deixa a regex saltar de linha
+# em linha, e as linhas de matriz (1º caractere numérico) são descartadas logo
+_MARKS = re.compile(
+    rb'\n[ \t]*(?=[^\s\d+\-.])(?:'
+    rb'(?P<sweeps>Finished measurement sweep)'
+    rb'|(?P<summary>(?:Accept2|Average)\b)'
+    rb'|(?P<wave>\S+-wave)[ \t]*:'
+    # cabeçalho de matriz: linha não numérica seguida de uma linha "i j valor ..."
+    rb'|(?P<matrix>[^\n]*)\n(?=[ \t]*-?\d+[ \t]+-?\d+[ \t]+[-+.\d])'
+    rb')'
+)
+
+
+class Section(NamedTuple):
+    kind: str   # um de KINDS
+    name: str   # nome do bloco como o parser o chama ("Sxx(q)", "Green's function"); kind nas demais
+    start: int  # offset do 1º byte da linha que abre a seção
+    end: int    # offset do início da seção seguinte (ou tamanho do arquivo)
+
+
+def _matrix_section(line: bytes):
+    """(kind, nome) do cabeçalho de matriz, com os nomes dos parsers; None se não é bloco."""
+    from blocks.k_space_variables.parser import Header
+    from blocks.real_space_variables.parser import _header_name_if_valid
+
+    text = normalize_line(line.decode("utf-8", errors="ignore").rstrip("\r"))
+    m = Header.match(text)
+    if m:
+        return "kspace", m.group("name")
+    name = _header_name_if_valid(text)
+    return ("realspace", name) if name else None
+
+
+def index_buffer(buf) -> List[Section]:
+    """Seções de `buf` (bytes, mmap ou memoryview), em ordem de offset."""
+    marks = [("header", "header", 0)]
+    in_sweeps = in_summary = False
+    for m in _MARKS.finditer(buf):
+        kind, start = m.lastgroup, m.start() + 1
+        if kind == "sweeps":
+            if in_sweeps or in_summary:
+                continue
+            in_sweeps = True
+            marks.append(("sweeps", "sweeps", start))
+        elif kind == "summary":
+            if in_summary:
+                continue
+            in_summary = True
+            marks.append(("summary", "summary", start))
+        elif kind == "wave":
+            marks.append(("wave", m.group("wave").decode("utf-8", errors="ignore"), start))
+        else:
+            found = _matrix_section(m.group("matrix"))
+            if found:
+                marks.append((*found, start))
+    ends = [start for _, _, start in marks[1:]] + [len(buf)]
+    return [Section(kind, name, start, end) for (kind, name, start), end in zip(marks, ends) if end > start]
+
+
+def index_file(path: Union[str, PathLike]) -> List[Section]:
+    """Seções do arquivo `path`: mmap (sem ler para a memória); comprimido, descomprime antes."""
+    if Path(path).suffix.lower() in COMPRESSED_SUFFIXES:
+        with open_binary(path) as f:
+            return index_buffer(f.read())
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # arquivo vazio não pode ser mapeado
+            return []
+        with mm:
+            return index_buffer(mm)
+
+
+def find_section(sections: List[Section], name: str) -> Optional[Section]:
+    """1ª seção com esse nome (ou kind, para header/sweeps/summary)."""
+    return next((s for s in sections if s.name == name), None)
+
+
+def read_section(path: Union[str, PathLike], section: Section) -> bytes:
+    """Só os bytes da seção (seek + read)."""
+    with open_binary(path) as f:
+        f.seek(section.start)
+        return f.read(section.end - section.start)
+
+
+def open_section(path: Union[str, PathLike], section: Section) -> IO[bytes]:
+    """A seção como arquivo binário em memória: serve de `source` para os parse_block/iter_lines."""
+    return io.BytesIO(read_section(path, section))
+
+
+def section_lines(path: Union[str, PathLike], section: Section) -> Iterator[str]:
+    """Linhas da seção, normalizadas como em iter_lines."""
+    return iter_lines(open_section(path, section))
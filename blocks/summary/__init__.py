@@ -0,0 +1,13 @@
+"""
+Bloco summary: todos os escalares "nome = valor +- erro" da seção de resumo.
+Expõe: parse_block (parser), parse_file / parse_stream (leitura linha a linha;
+o stream gera registros um a um), LineHandler (parser incremental, linha a linha),
+view (resultado filtrado, base dos blocos averages e correlations),
+run_etl (cola ETL para salvar em arquivos), write_outputs (só a etapa Load)
+e to_tables (DataFrames consolidáveis, usados pelo etl.batch).
+"""
+from .parser import parse_block, parse_file, parse_stream, LineHandler, PARSER_VERSION, view
+from .etl import run_etl, write_outputs, to_tables
+
+__all__ = ["parse_block", "parse_file", "parse_stream", "LineHandler", "PARSER_VERSION", "view",
+           "run_etl", "write_outputs", "to_tables"]
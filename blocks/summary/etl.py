@@ -0,0 +1,74 @@
+# etl.py
+"""
+Executa o ETL do bloco summary (escalares da seção de resumo):
+- lê o arquivo de entrada (.out)
+- aplica o parser (parser.parse)
+- salva em CSV
+to_tables/write_outputs recebem o nome da tabela (`table`), que também vai no
+nome dos arquivos: as visões averages e correlations gravam por aqui.
+"""
+
+from pathlib import Path
+import csv
+from typing import Optional
+from blocks.reader import source_name, source_stem
+from blocks.writer import submit
+from .parser import parse_file
+
+
+def run_etl(input_path: str, outdir: Optional[str], to_parquet: bool = False):
+    # lê o arquivo linha a linha
+    parsed = parse_file(input_path)  # retorna dict {"block": "summary", "items": [...]}
+    # outdir=None: não grava nada, devolve as tabelas (unidade de trabalho do etl.batch)
+    if outdir is None:
+        return to_tables(parsed, input_path)
+    write_outputs(parsed, input_path, outdir, to_parquet)
+
+
+def to_tables(parsed: dict, input_path: str, table: str = "summary") -> dict:
+    """Tabelas consolidáveis: {table: DataFrame(source_file, name, key, value, error)}."""
+    import pandas as pd
+    df = pd.DataFrame(parsed.get("items", []), columns=["name", "key", "value", "error"])
+    df.insert(0, "source_file", source_name(input_path))
+    return {table: df}
+
+
+def write_outputs(parsed: dict, input_path: str, outdir: str, to_parquet: bool = False,
+                  table: str = "summary"):
+    """Etapa Load: grava o resultado de parse_block (ou LineHandler.finish) em <stem>_<table>.csv."""
+    items = parsed.get("items", [])
+
+    out = Path(outdir)
+    out.mkdir(parents=True, exist_ok=True)
+    # CSV/parquet na etapa de gravação (blocks.writer)
+    submit(_write, items, input_path, out, to_parquet, table)
+
+
+def _write(items: list, input_path: str, out: Path, to_parquet: bool, table: str) -> None:
+    # nome do arquivo de saída
+    out_csv = out / f"{source_stem(input_path)}_{table}.csv"
+
+    # escreve CSV
+    with out_csv.open("w", newline="") as f:
+        writer = csv.DictWriter(
+            f, fieldnames=["filename", "name", "key", "value", "error"]
+        )
+        writer.writeheader()
+        for it in items:
+            writer.writerow({
+                "filename": source_name(input_path),
+                "name": it.get("name"),
+                "key": it.get("key"),
+                "value": it.get("value"),
+                "error": it.get("error"),
+            })
+
+    print(f"[OK] {len(items)} métricas salvas em {out_csv}")
+
+    # opcional: salvar parquet
+    if to_parquet:
+        import pandas as pd
+        df = pd.DataFrame(items)
+        out_parquet = out / f"{source_stem(input_path)}_{table}.parquet"
+        df.to_parquet(out_parquet, index=False)
+        print(f"[OK] parquet salvo em {out_parquet}")
\ No newline at end of file
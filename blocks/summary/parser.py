@@ -0,0 +1,159 @@
+import re
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from blocks.plugin import Reflow
+from blocks.cache import cached
+from blocks.reader import Source, iter_lines
+
+# versão do parser: incrementar quando a saída mudar (invalida o manifest do etl.batch;
+# averages e correlations, que são visões deste bloco, herdam a versão)
+PARSER_VERSION = "1"
+
+NUMBER_RE = r'[+\-]?(?:\d+(?:\.\d*)?|\.\d+)(?:[Ee][+\-]?\d+)?'
+
+def _to_snake(name: str) -> str:
+    s = name.strip().replace('/', ' per ')
+    s = re.sub(r'[^0-9a-zA-Z]+', '_', s)
+    s = re.sub(r'_+', '_', s)
+    return s.strip('_').lower()
+
+_PM_ANY = r'(?:\+\-|(?:\+\/\-)|±)'
+
+# "nome = valor", "nome = valor +- erro" (também "+/-" e "±"); o nome não tem "="
+_SCALAR = re.compile(
+    rf'^\s*(?P<name>[^=]*?\S)\s*=\s*(?P<val>{NUMBER_RE})(?:\s*{_PM_ANY}\s*(?P<err>{NUMBER_RE}))?\s*$'
+)
+
+# cabeçalho das simetrias de pareamento: "s*-wave: (suscept., no vertex)"
+_WAVE = re.compile(r'^\s*(?P<wave>\S+-wave)\s*:')
+
+# início da seção de resumo (depois do último sweep)
+_ARM = re.compile(r'^\s*(?:Accept2\b|Average\s)', re.IGNORECASE)
+
+# visões: averages e correlations são os itens do resumo com estes nomes
+_AVERAGE = re.compile(r'Average\s+\S', re.IGNORECASE)
+_CORRELATION = re.compile(r'.+?correlation function(?:\s*\([^)]+\))?', re.IGNORECASE)
+
+
+def is_average(name: str) -> bool:
+    return _AVERAGE.match(name) is not None
+
+
+def is_correlation(name: str) -> bool:
+    return _CORRELATION.fullmatch(name) is not None
+
+
+class LineHandler:
+    """
+    Todos os escalares "nome = valor +- erro" da seção de resumo, numa
+    passada e com um só refluxo: médias, funções de correlação,
+    susceptibilidades, Accept2 e os Peff/GmP/P0GP de cada simetria
+    (nome prefixado pela simetria, ex.: "s*-wave Peff").
+
+    A seção começa na 1ª linha "Accept2 ...", "Average ..." ou com
+    "correlation function" e termina em "Time:" (fim do run); fora dela nada
+    é lido (ex.: "Total_meas="), o que vale também para .out concatenados.
+    `keep`, se dado, filtra os itens pelo nome (visões averages/correlations).
+    `emit`, se dado, recebe cada item assim que é reconhecido (parse_stream).
+    """
+
+    BLOCK = "summary"
+
+    # roteamento do etl.engine (blocks.plugin)
+    FIRST_TOKENS = frozenset({"Accept2", "Average", "Time:"})
+    CONTAINS = ("=", "-wave")
+
+    def __init__(self, emit: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 keep: Optional[Callable[[str], bool]] = None) -> None:
+        self.items: List[Dict[str, Any]] = []
+        self._emit = emit or self.items.append
+        self._keep = keep
+        self._reflow = Reflow()  # linha terminada em "+-" aguardando o erro
+        self._armed = False
+        self._wave: Optional[str] = None  # simetria corrente ("s-wave", "dxy-wave", ...)
+        self.misses = 0  # linhas com "=" na seção que a regex rejeitou (etl.metrics)
+
+    @property
+    def active(self) -> bool:
+        return self._reflow.pending is not None
+
+    def feed(self, line: str, tokens: Optional[List[str]] = None) -> None:
+        if not self._armed:
+            if not (_ARM.match(line) or "correlation function" in line):
+                return
+            self._armed = True
+        elif line.lstrip().startswith("Time:"):
+            self._armed = False
+            self._wave = None
+        cur = self._reflow.push(line)
+        if cur is not None:
+            self._match(cur)
+
+    def _match(self, line: str) -> None:
+        m = _SCALAR.match(line)
+        if m is None:
+            if "-wave" in line:
+                w = _WAVE.match(line)
+                if w:
+                    self._wave = w.group('wave')
+                    return
+            if "=" in line:
+                self.misses += 1
+            return
+        name = key = m.group('name')
+        if self._wave is not None:
+            name = f"{self._wave} {name}"
+            # "s*-wave" e "s-wave" não podem dar a mesma chave
+            key = f"{self._wave.replace('*', ' star')} {key}"
+        if self._keep is not None and not self._keep(name):
+            return
+        err = m.group('err')
+        self._emit({
+            "name": name,
+            "key": _to_snake(key),
+            "value": float(m.group('val')),
+            "error": float(err) if err is not None else None,
+        })
+
+    def finish(self) -> Dict[str, Any]:
+        cur = self._reflow.flush()
+        if cur is not None:
+            # arquivo terminou logo após um "+-": mantém a linha sem o erro
+            self._match(cur)
+        return {"block": self.BLOCK, "count": len(self.items), "items": self.items}
+
+
+def view(parsed: Dict[str, Any], block: str, keep: Callable[[str], bool]) -> Dict[str, Any]:
+    """Resultado de um bloco-visão (ex.: averages) a partir do resultado do summary."""
+    items = [it for it in parsed.get("items", []) if keep(it["name"])]
+    return {"block": block, "count": len(items), "items": items}
+
+
+@cached("summary", text=True)
+def parse_block(text: str) -> Dict[str, Any]:
+    handler = LineHandler()
+    for line in text.splitlines():
+        handler.feed(line)
+    return handler.finish()
+
+
+@cached("summary")
+def parse_file(source: Source) -> Dict[str, Any]:
+    """Como parse_block, mas lendo `source` (caminho, "-" ou arquivo aberto) linha a linha."""
+    handler = LineHandler()
+    for line in iter_lines(source):
+        handler.feed(line)
+    return handler.finish()
+
+
+def parse_stream(source: Source) -> Iterator[Dict[str, Any]]:
+    """Gera os itens um a um enquanto lê `source`; memória não cresce com o arquivo."""
+    ready: List[Dict[str, Any]] = []
+    handler = LineHandler(emit=ready.append)
+    for line in iter_lines(source):
+        handler.feed(line)
+        if ready:
+            yield from ready
+            ready.clear()
+    handler.finish()
+    yield from ready
@@ -0,0 +1,111 @@
+"""
+Etapa de gravação assíncrona: fila limitada + pool de threads.
+
+Os write_outputs dos blocos entregam cada arquivo pronto (um bloco (q), uma
+métrica de espaço real, uma tabela consolidada do etl.batch...) a `submit`
+e seguem montando o próximo, enquanto a serialização, a compressão e o I/O
+(CSV, Parquet) rodam em threads. No máximo `depth` gravações ficam
+pendentes: quem submete espera quando a fila enche (backpressure), então a
+memória fica limitada a ~depth tabelas prontas.
+
+    with writing(workers=4):
+        BLOCKS["k_space_variables"].write_outputs(parsed, path, outdir)
+
+Fora de um `writing(...)`, e dentro das próprias threads de gravação,
+submit grava na hora, como antes. etl.run e etl.batch abrem um writing()
+em volta da etapa Load (--writers N; 0 = síncrono). pyarrow (Parquet,
+compressão) e as escritas em disco soltam o GIL; no CSV o ganho vem
+sobretudo de sobrepor a espera do disco/FS de rede à montagem do próximo bloco.
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+
+WORKERS = 4  # threads de gravação padrão
+DEPTH = 8    # gravações pendentes no máximo
+
+_CURRENT: ContextVar[Optional["AsyncWriter"]] = ContextVar("etl_writer", default=None)
+
+
+def _inline(fn: Callable, args: tuple, kwargs: dict):
+    # dentro da thread de gravação, submit aninhado grava na hora (não espera vaga na própria fila)
+    token = _CURRENT.set(None)
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        _CURRENT.reset(token)
+
+
+class AsyncWriter:
+    """Pool de `workers` threads com no máximo `depth` gravações pendentes."""
+
+    def __init__(self, workers: int = WORKERS, depth: int = DEPTH) -> None:
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="etl-writer")
+        self._slots = threading.BoundedSemaphore(max(depth, 1))
+        self._futures: List[Future] = []
+        self._error: Optional[BaseException] = None
+
+    def _done(self, fut: Future) -> None:
+        self._slots.release()
+        if fut.exception() is not None and self._error is None:
+            self._error = fut.exception()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        # uma gravação já falhou: para de produzir (o erro sobe aqui, não só no close)
+        if self._error is not None:
+            raise self._error
+        self._slots.acquire()  # backpressure: espera uma vaga na fila
+        try:
+            fut = self._pool.submit(_inline, fn, args, kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        fut.add_done_callback(self._done)
+        self._futures.append(fut)
+        return fut
+
+    def drain(self) -> None:
+        """Espera as gravações submetidas até aqui; relança o primeiro erro."""
+        futures, self._futures = self._futures, []
+        for fut in futures:
+            fut.result()
+
+    def close(self) -> None:
+        """Espera todas as gravações e encerra as threads; relança o primeiro erro."""
+        self._pool.shutdown(wait=True)
+        self.drain()
+
+
+@contextmanager
+def writing(workers: int = WORKERS, depth: int = DEPTH):
+    """
+    Gravações submetidas (submit) dentro do bloco vão para um AsyncWriter;
+    ao sair, espera todas. workers <= 0, ou já dentro de um writing(): nada muda.
+    """
+    if workers <= 0 or _CURRENT.get() is not None:
+        yield _CURRENT.get()
+        return
+    writer = AsyncWriter(workers, depth)
+    token = _CURRENT.set(writer)
+    try:
+        yield writer
+    except BaseException:
+        _CURRENT.reset(token)
+        try:
+            writer.close()
+        except Exception:
+            pass  # o erro de quem produzia é o que interessa
+        raise
+    _CURRENT.reset(token)
+    writer.close()
+
+
+def submit(fn: Callable, *args, **kwargs) -> None:
+    """Grava com o AsyncWriter corrente, ou na hora se não há um (ver writing)."""
+    writer = _CURRENT.get()
+    if writer is None:
+        fn(*args, **kwargs)
+    else:
+        writer.submit(fn, *args, **kwargs)
@@ -0,0 +1,153 @@
+"""
+Agregação entre runs: combina as sementes de cada ponto de parâmetros.
+
+Lê as tabelas consolidadas do etl.batch (CSV, Parquet ou dataset
+particionado) e, para cada grupo (parâmetros do run sem a semente iran) x
+chave do observável, calcula:
+
+    value     média ponderada pelo inverso da variância, sum(w*v)/sum(w), w = 1/error²
+    error     erro propagado, 1/sqrt(sum(w))
+    chi2_dof  sum(w*(v - value)²)/(nº de sementes com erro - 1): ~1 se são compatíveis
+    n_seeds   nº de runs no grupo
+
+Linhas com erro nulo/ausente não entram na ponderação (se nenhuma tem erro,
+value é a média simples e error fica NaN). Tudo é feito com somas de um
+único groupby sobre a tabela inteira, sem laço por chave.
+
+Na realspace as métricas up-up/up-dn não têm "value": cada par valor/erro
+(value/err, value_upup/err_upup, value_updn/err_updn) é agregado à parte,
+nas colunas value, error, chi2_dof e value_upup, error_upup, chi2_dof_upup...
+
+    python -m etl.aggregate --outdir outputs --tables averages correlations
+"""
+
+import argparse
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+# parâmetros físicos do run (run_header) usados para agrupar; iran (semente) fica de fora
+GROUP_PARAMS = ("n", "l", "t", "omega", "lambdax", "dens", "dtau")
+
+# tabela -> (colunas-chave do observável, pares (coluna do valor, coluna do erro, sufixo da saída))
+AGG_TABLES = {
+    "summary": (("name", "key"), (("value", "error", ""),)),
+    "averages": (("name", "key"), (("value", "error", ""),)),
+    "correlations": (("name", "key"), (("value", "error", ""),)),
+    "kspace": (("block", "kx", "ky"), (("value", "error", ""),)),
+    "realspace": (("metric", "i", "j"), (("value", "err", ""),
+                                         ("value_upup", "err_upup", "_upup"),
+                                         ("value_updn", "err_updn", "_updn"))),
+}
+
+
+def load_table(outdir: str, table: str):
+    """Tabela consolidada de `outdir`: <tabela>.parquet, <tabela>.csv ou dataset <tabela>/."""
+    import pandas as pd
+
+    base = Path(outdir)
+    if (base / f"{table}.parquet").exists():
+        return pd.read_parquet(base / f"{table}.parquet")
+    if (base / f"{table}.csv").exists():
+        return pd.read_csv(base / f"{table}.csv", float_precision="round_trip")
+    if (base / table).is_dir():
+        from .dataset import open_dataset
+        return open_dataset(outdir, table).to_table().to_pandas()
+    raise FileNotFoundError(f"tabela '{table}' não encontrada em {outdir}")
+
+
+def aggregate(df, header, table: str, by: Sequence[str] = GROUP_PARAMS):
+    """
+    Agrega `df` (linhas de `table` com source_file) pelos parâmetros `by`
+    tirados de `header` (run_header) + chaves do observável.
+    """
+    import pandas as pd
+
+    keys, pairs = AGG_TABLES[table]
+    pairs = [p for p in pairs if p[0] in df.columns]
+    values = [c for vcol, ecol, _ in pairs for c in (vcol, ecol)]
+    by = [c for c in by if c in header.columns]
+    params = header[["source_file", *by]].drop_duplicates("source_file")
+    df = df[["source_file", *keys, *values]].merge(params, on="source_file", how="left")
+    # linhas sem nenhum valor não contam como semente
+    df = df[df[[vcol for vcol, _, _ in pairs]].notna().any(axis=1)]
+    group_cols = [*by, *keys]
+
+    parts = [_weighted(df, group_cols, vcol, ecol, suffix) for vcol, ecol, suffix in pairs]
+    out = pd.concat(parts, axis=1, sort=True) if parts else pd.DataFrame()
+    n = df.groupby(group_cols, sort=True, dropna=False, observed=True).size()
+    out["n_seeds"] = n.reindex(out.index).to_numpy() if parts else n
+    return out.reset_index()
+
+
+def _weighted(df, group_cols: Sequence[str], vcol: str, ecol: str, suffix: str):
+    """value/error/chi2_dof (com `suffix`) por grupo, só com as linhas que têm `vcol`."""
+    import pandas as pd
+
+    df = df[df[vcol].notna()]
+    v = df[vcol].to_numpy(dtype=np.float64)
+    e = df[ecol].to_numpy(dtype=np.float64)
+    ok = np.isfinite(e) & (e > 0)
+    w = np.where(ok, 1.0 / np.where(ok, e, 1.0) ** 2, 0.0)
+    # somas por grupo (nomes com "_" para não colidir com parâmetros como n)
+    work = pd.DataFrame({
+        "_w": w, "_wv": w * v, "_wv2": w * v * v,
+        "_v": v, "_k": ok.astype(np.int64), "_n": 1,
+    })
+    for c in group_cols:
+        work[c] = df[c].to_numpy()
+
+    g = work.groupby(list(group_cols), sort=True, dropna=False, observed=True)
+    s = g[["_w", "_wv", "_wv2", "_v", "_k", "_n"]].sum()
+
+    sw = s["_w"].to_numpy()
+    weighted = sw > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(weighted, s["_wv"].to_numpy() / sw, s["_v"].to_numpy() / s["_n"].to_numpy())
+        err = np.where(weighted, 1.0 / np.sqrt(sw), np.nan)
+        # sum(w (v - m)^2) = sum(w v^2) - m sum(w v); corta o ruído de arredondamento negativo
+        chi2 = np.maximum(s["_wv2"].to_numpy() - mean * s["_wv"].to_numpy(), 0.0)
+        dof = s["_k"].to_numpy() - 1
+        chi2_dof = np.where(weighted & (dof > 0), chi2 / dof, np.nan)
+
+    return pd.DataFrame({f"value{suffix}": mean, f"error{suffix}": err, f"chi2_dof{suffix}": chi2_dof},
+                        index=s.index)
+
+
+def aggregate_outputs(outdir: str, tables: Iterable[str] = ("averages", "correlations"),
+                      by: Sequence[str] = GROUP_PARAMS) -> Dict[str, object]:
+    """{tabela: DataFrame agregado} a partir das saídas consolidadas em `outdir`."""
+    header = load_table(outdir, "run_header")
+    return {t: aggregate(load_table(outdir, t), header, t, by) for t in tables}
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Agregação entre sementes (média ponderada por 1/erro²)")
+    parser.add_argument("--outdir", default="outputs", help="Saída do etl.batch (precisa de run_header)")
+    parser.add_argument("--tables", nargs="+", default=["averages", "correlations"],
+                        choices=sorted(AGG_TABLES), help="Tabelas a agregar")
+    parser.add_argument("--by", nargs="+", default=list(GROUP_PARAMS),
+                        help="Parâmetros do run_header que definem o grupo (padrão: todos menos iran)")
+    parser.add_argument("--dest", default=None, help="Diretório de saída (padrão: --outdir)")
+    parser.add_argument("--parquet", action="store_true", help="Salvar em Parquet ao invés de CSV")
+    args = parser.parse_args(argv)
+
+    try:
+        results = aggregate_outputs(args.outdir, args.tables, args.by)
+    except FileNotFoundError as e:
+        raise SystemExit(f"❌ {e} (rode o etl.batch com --block all)")
+
+    dest = Path(args.dest or args.outdir)
+    dest.mkdir(parents=True, exist_ok=True)
+    for table, df in results.items():
+        target = dest / f"agg_{table}.{'parquet' if args.parquet else 'csv'}"
+        if args.parquet:
+            df.to_parquet(target, index=False)
+        else:
+            df.to_csv(target, index=False)
+        print(f"[OK] {target}: {len(df)} linhas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""
+Modo batch: processa uma campanha inteira (diretórios e/ou globs de .out)
+num pool de processos e grava UM dataset consolidado por tabela.
+
+    python -m etl.batch --block all --inputs runs/ "campanha/*.out" --outdir outputs --workers 8
+
+Cada arquivo é processado pelo runner do REGISTRY com outdir=None, que devolve
+{tabela: DataFrame} em vez de gravar arquivos. Falhas por arquivo ficam isoladas
+e aparecem no resumo final; não interrompem a execução. Um arquivo sem nenhum
+campo do cabeçalho de um run (não é saída do QMC) também conta como falha:
+não gera linhas e não entra no manifest.
+
+Re-ingestão incremental: <outdir>/manifest.json (etl.manifest) guarda size,
+mtime, sha256 e versão dos parsers de cada entrada. Arquivos inalterados são
+pulados; os novos/modificados têm só as suas linhas (por source_file)
+substituídas nas tabelas consolidadas. --full ignora o manifest.
+
+--dataset: em vez dos arquivos consolidados, --outdir vira um dataset Parquet
+particionado por parâmetros do run (etl.dataset), com um arquivo por entrada
+e partição; só os arquivos das entradas reprocessadas são reescritos.
+
+--target duckdb://campanha.db: carrega cada arquivo no DuckDB (upsert por
+arquivo e tabela, etl.targets); o manifest continua em --outdir.
+
+--follow: acompanha jobs ainda rodando e acrescenta os sweeps novos a
+<outdir>/sweeps.csv a cada --interval segundos (etl.follow).
+
+Tabelas consolidadas (todas com coluna source_file; nos arquivos consolidados
+é o caminho absoluto da entrada, a mesma chave do manifest, para que
+L400/run.out e L800/run.out não se confundam):
+    run_header, sweeps   (out_simulations)
+    summary              (summary: todos os escalares do resumo)
+    averages             (averages, visão do summary)
+    correlations         (correlations, visão do summary)
+    kspace               (k_space_variables)
+    realspace            (real_space_variables)
+"""
+
+import argparse
+import cProfile
+import glob
+import os
+import shutil
+import tempfile
+import traceback
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from blocks.out_simulations.parser import read_header
+from blocks.reader import COMPRESSED_SUFFIXES
+from blocks.writer import WORKERS, submit, writing
+
+from .manifest import Manifest, file_digest, parser_versions, with_source
+from .metrics import Metrics, profiling
+from .registry import resolve
+
+
+def collect_inputs(patterns: Iterable[str], suffix: str = ".out") -> List[str]:
+    """
+    Expande diretórios (recursivo, *.out e *.out.gz/.xz/.bz2/.zst), globs e
+    arquivos soltos, sem repetir.
+    """
+    suffixes = tuple([suffix] + [suffix + c for c in COMPRESSED_SUFFIXES])
+    found: List[str] = []
+    seen = set()
+    for pat in patterns:
+        p = Path(pat)
+        if p.is_dir():
+            matches = sorted(str(x) for x in p.rglob("*")
+                             if x.name.endswith(suffixes) and x.is_file())
+        elif p.is_file():
+            matches = [str(p)]
+        else:
+            matches = sorted(glob.glob(pat, recursive=True))
+        for m in matches:
+            key = os.path.abspath(m)
+            if key not in seen:
+                seen.add(key)
+                found.append(m)
+    return found
+
+
+def process_file(block: str, input_path: str, metrics: bool = False,
+                 profile_dir: Optional[str] = None
+                 ) -> Tuple[str, Optional[dict], Optional[str], Optional[tuple], Optional[Metrics]]:
+    """
+    Unidade de trabalho de um worker: (input_path, tabelas, erro, (stat, sha256), métricas).
+    Nunca levanta exceção; o erro vai como texto para o resumo.
+    metrics=True mede as etapas do arquivo (etl.metrics); `profile_dir`
+    recebe o cProfile do arquivo (<pid>-<n>.prof), somado depois no pai.
+    """
+    m = Metrics() if metrics else None
+    prof = None
+    if profile_dir is not None:
+        prof = cProfile.Profile()
+        prof.enable()
+    try:
+        # identidade do arquivo tirada antes do parse (vai para o manifest)
+        ident = (os.stat(input_path), file_digest(input_path))
+        tables = resolve(block, m)(input_path=input_path, outdir=None) or {}
+        if not has_header(tables, input_path):
+            raise ValueError("nenhum campo do cabeçalho de um run reconhecido (não é saída do QMC?)")
+        return input_path, tables, None, ident, m
+    except BaseException as e:  # SystemExit do resolve também
+        return input_path, None, f"{type(e).__name__}: {e}\n{traceback.format_exc()}", None, m
+    finally:
+        if prof is not None:
+            prof.disable()
+            fd, target = tempfile.mkstemp(suffix=".prof", prefix=f"{os.getpid()}-", dir=profile_dir)
+            os.close(fd)
+            prof.dump_stats(target)
+
+
+def has_header(tables: Dict[str, object], input_path: str) -> bool:
+    """Algum campo do cabeçalho do run: da run_header, se o bloco a gerou, senão lendo o cabeçalho."""
+    header = tables.get("run_header")
+    if header is not None:
+        return bool(header.drop(columns="source_file").notna().any(axis=None))
+    return any(v is not None for v in read_header(input_path).values())
+
+
+def write_tables(frames: Dict[str, list], outdir: str, to_parquet: bool = False,
+                 replace: Optional[set] = None, tables: Iterable[str] = ()) -> Dict[str, int]:
+    """
+    Concatena os DataFrames de cada tabela e grava um arquivo por tabela.
+
+    replace=None: sobrescreve. Caso contrário, mantém as linhas já gravadas
+    (também das tabelas em `tables` sem linhas novas), exceto as de
+    source_file em `replace`, e acrescenta as novas.
+    """
+    import pandas as pd
+
+    out = Path(outdir)
+    out.mkdir(parents=True, exist_ok=True)
+    ext = "parquet" if to_parquet else "csv"
+    counts: Dict[str, int] = {}
+    for table in dict.fromkeys([*frames, *tables]):
+        target = out / f"{table}.{ext}"
+        dfs = [df for df in frames.get(table, []) if len(df)]
+        if replace is not None and target.exists():
+            old = (pd.read_parquet(target) if to_parquet
+                   else pd.read_csv(target, float_precision="round_trip"))
+            old = old[~old["source_file"].isin(replace)]
+            if len(old):
+                dfs.insert(0, old)
+        if not dfs:
+            if target.exists():
+                target.unlink()
+            continue
+        big = pd.concat(dfs, ignore_index=True)
+        # a tabela vai para a etapa de gravação (blocks.writer) enquanto a próxima é concatenada
+        if to_parquet:
+            submit(big.to_parquet, target, index=False)
+        else:
+            submit(big.to_csv, target, index=False)
+        counts[table] = len(big)
+    return counts
+
+
+def write_partitioned(done: Dict[str, dict], order: List[str], root: str,
+                      full: bool = False, tables: Iterable[str] = ()) -> Dict[str, int]:
+    """
+    Grava as tabelas de cada entrada em `done` no dataset particionado `root`,
+    substituindo o que essas entradas tinham gravado (full: apaga tudo antes).
+    Retorna {tabela: linhas gravadas nesta execução} (inclui `tables`, com 0).
+    """
+    from .dataset import remove_sources, write_dataset
+
+    remove_sources(root, None if full else list(done))
+    counts: Dict[str, int] = dict.fromkeys(sorted(tables), 0)
+    for path in order:
+        if path in done:
+            for table, n in write_dataset(done[path], path, root).items():
+                counts[table] = counts.get(table, 0) + n
+    return counts
+
+
+def load_target(done: Dict[str, dict], order: List[str], spec: str, block: str = "all") -> Dict[str, int]:
+    """Upsert das tabelas de cada entrada em `done` no destino `spec` (ex.: duckdb://x.db)."""
+    from .targets import open_target
+
+    target = open_target(spec)
+    counts: Dict[str, int] = {}
+    try:
+        for path in order:
+            if path in done:
+                for table, n in target.load(done[path], path, block).items():
+                    counts[table] = counts.get(table, 0) + n
+    finally:
+        target.close()
+    return counts
+
+
+def run_batch(inputs: List[str], block: str, outdir: str, to_parquet: bool = False,
+              workers: Optional[int] = None, full: bool = False, dataset: bool = False,
+              target: Optional[str] = None, metrics: Optional[Metrics] = None,
+              profile_dir: Optional[str] = None, writers: int = WORKERS) -> dict:
+    """
+    Processa `inputs` em paralelo e grava os datasets consolidados. Retorna o resumo.
+    Sem `full`, pula os arquivos que o manifest indica como inalterados.
+    dataset=True: grava no dataset particionado em `outdir` (etl.dataset).
+    target="duckdb://...": carrega no banco (etl.targets); `outdir` só guarda o manifest.
+    metrics: soma as métricas de cada arquivo (e a gravação consolidada, etapa
+    write do bloco "*"); profile_dir: cProfile de cada arquivo (ver process_file).
+    writers: threads de gravação das tabelas consolidadas (blocks.writer); 0 = na hora.
+    """
+    resolve(block)  # falha cedo se o bloco não existe
+    if target:
+        from .targets import parse_target
+        parse_target(target)  # idem para o destino
+
+    output_format = (target if target else "dataset" if dataset
+                     else ("parquet" if to_parquet else "csv"))
+    manifest = Manifest(outdir, output_format)
+    versions = parser_versions(block)
+    incremental = not full and bool(manifest.entries)
+    if full:
+        manifest.entries, manifest.tables = {}, set()
+    todo = [p for p in inputs if not (incremental and manifest.is_current(p, versions))]
+
+    done: Dict[str, dict] = {}
+    failures: Dict[str, str] = {}
+
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(process_file, block, p, metrics is not None, profile_dir)
+                       for p in todo]
+            for fut in as_completed(futures):
+                path, tables, err, ident, file_metrics = fut.result()
+                if file_metrics is not None:
+                    metrics.merge(file_metrics, source=path)
+                if err is not None:
+                    failures[path] = err
+                    manifest.forget(path)  # tenta de novo na próxima execução
+                    print(f"[FAIL] {path}: {err.splitlines()[0]}")
+                else:
+                    done[path] = tables
+                    manifest.record(path, versions, digest=ident[1], stat=ident[0])
+
+    # consolida na ordem dos inputs (saída determinística, independe do pool)
+    frames: Dict[str, list] = {}
+    for path in todo:
+        for table, df in done.get(path, {}).items():
+            frames.setdefault(table, []).append(df if target or dataset else with_source(df, path))
+
+    counts: Dict[str, int] = {}
+    with (metrics.timer("*", "write") if metrics is not None else nullcontext()):
+        if target:
+            counts = load_target(done, todo, target, block)
+        elif dataset:
+            counts = write_partitioned(done, todo, outdir, full=not incremental, tables=manifest.tables)
+            manifest.tables |= set(counts)
+        elif done or not incremental:
+            replace = {Manifest.key(p) for p in done} if incremental else None
+            with writing(writers):
+                counts = write_tables(frames, outdir, to_parquet, replace=replace, tables=manifest.tables)
+            manifest.tables = set(counts)
+    manifest.save()
+    return {"total": len(inputs), "ok": len(done), "skipped": len(inputs) - len(todo),
+            "failed": failures, "rows": counts}
+
+
+def merge_profiles(profile_dir: str, dest: str) -> None:
+    """Soma os cProfile do pai e de cada arquivo (workers) num só arquivo pstats."""
+    import pstats
+
+    parts = sorted(str(p) for p in Path(profile_dir).glob("*.prof"))
+    if parts:
+        pstats.Stats(*parts).dump_stats(dest)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="ETL em lote (pool de processos)")
+    parser.add_argument("--block", default="all", help="Nome do bloco ou 'all' (padrão)")
+    parser.add_argument("--inputs", nargs="+", required=True, help="Arquivos, diretórios ou globs de .out")
+    parser.add_argument("--outdir", default="outputs", help="Diretório de saída")
+    parser.add_argument("--parquet", action="store_true", help="Salvar em Parquet ao invés de CSV")
+    parser.add_argument("--workers", type=int, default=None, help="Nº de processos (padrão: nº de CPUs)")
+    parser.add_argument("--writers", type=int, default=WORKERS,
+                        help=f"Threads de gravação das tabelas consolidadas (padrão {WORKERS}; 0 = na hora)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Não usar o cache de parse (blocks.cache) nem gravar nele")
+    parser.add_argument("--full", action="store_true", help="Ignora o manifest e reprocessa tudo")
+    parser.add_argument("--dataset", action="store_true",
+                        help="Gravar --outdir como dataset Parquet particionado por n, l, lambdax, iran")
+    parser.add_argument("--target", default=None,
+                        help="Carregar num banco em vez de arquivos, ex.: duckdb://campanha.db")
+    parser.add_argument("--follow", action="store_true",
+                        help="Acompanhar arquivos em andamento (só sweeps, lendo apenas o que foi acrescentado)")
+    parser.add_argument("--interval", type=float, default=30.0, help="Segundos entre leituras no --follow")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Mostrar tempo por etapa e contadores por bloco, somados em todos os arquivos")
+    parser.add_argument("--profile", default=None,
+                        help="Gravar cProfile somado dos workers (.prof) ou as métricas em JSON (.json)")
+    args = parser.parse_args()
+    if args.no_cache:
+        from blocks import cache
+        cache.disable()
+
+    if args.follow:
+        from .follow import follow
+        print(f"👀 Acompanhando {' '.join(args.inputs)} a cada {args.interval:g}s (Ctrl-C para parar)")
+        follow(args.inputs, args.outdir, interval=args.interval)
+        return
+
+    inputs = collect_inputs(args.inputs)
+    if not inputs:
+        raise SystemExit(f"❌ Nenhum arquivo encontrado em: {' '.join(args.inputs)}")
+
+    print(f"🚀 Rodando ETL '{args.block}' em {len(inputs)} arquivo(s)")
+    metrics = Metrics() if args.metrics or (args.profile or "").endswith(".json") else None
+    profile_dir = None
+    if args.profile and not args.profile.endswith(".json"):
+        profile_dir = tempfile.mkdtemp(prefix="etl-profile-")
+    try:
+        with profiling(os.path.join(profile_dir, "main.prof") if profile_dir else args.profile, metrics):
+            summary = run_batch(inputs, args.block, args.outdir, to_parquet=args.parquet,
+                                workers=args.workers, full=args.full, dataset=args.dataset,
+                                target=args.target, metrics=metrics, profile_dir=profile_dir,
+                                writers=args.writers)
+        if profile_dir:
+            merge_profiles(profile_dir, args.profile)
+    finally:
+        if profile_dir:
+            shutil.rmtree(profile_dir, ignore_errors=True)
+
+    for table, n in summary["rows"].items():
+        print(f"[OK] {table}: {n} linhas")
+    print(f"✅ {summary['ok']}/{summary['total']} arquivo(s) processados, "
+          f"{summary['skipped']} inalterado(s) pulados; saída em {args.outdir}")
+    if args.metrics:
+        print(metrics.report())
+    if summary["failed"]:
+        print(f"⚠️  {len(summary['failed'])} falha(s):")
+        for path, err in summary["failed"].items():
+            print(f"   - {path}: {err.splitlines()[0]}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
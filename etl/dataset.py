@@ -0,0 +1,145 @@
+"""
+Saída em dataset Parquet particionado (estilo hive), via pyarrow.
+
+    <root>/<tabela>/n=8/l=400/lambdax=0.7745966692/iran=-147/part-<stem>-<id>-0.parquet
+
+Uma tabela por tipo de bloco (as mesmas de to_tables: run_header, sweeps,
+summary, averages, correlations, kspace, realspace). As chaves de partição são
+parâmetros do run (PARTITION_KEYS) tirados do run_header; se o bloco
+out_simulations não foi pedido, vêm de read_header (só o prefixo do .out).
+
+Tipos compactos: strings repetidas (source_file, name, block, metric...)
+ficam dictionary-encoded, índices em int16 e contadores em int32, sempre os
+mesmos tipos por coluna para que todos os arquivos do dataset tenham o mesmo
+schema. Cada arquivo leva no nome o stem da entrada e o source_id (hash do
+caminho absoluto, etl.manifest), e source_file é o caminho absoluto, como
+nas tabelas consolidadas do etl.batch: L400/run.out e L800/run.out não
+colidem, e regravar uma entrada (remove_sources + write_dataset) só
+substitui os arquivos dela.
+
+Leitura com poda de partições:
+
+    open_dataset("dataset", "kspace").to_table(filter=(ds.field("n") == 8))
+"""
+
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from blocks.reader import Source, source_stem
+
+from .manifest import source_id, with_source
+
+PARTITION_KEYS = ("n", "l", "lambdax", "iran")
+ROW_GROUP_SIZE = 1 << 17
+
+# tipos inteiros fixos por coluna (o resto dos inteiros fica int64)
+_INT16 = ("kx", "ky", "i", "j", "n")
+_INT32 = ("l", "iran", "sweep", "total_meas", "nwrap", "torth", "tausk", "phonskip",
+          "numtry", "istart", "warms", "sweeps")
+_STRINGS = ("source_file", "name", "key", "block", "metric", "outname")
+
+
+def _partition_schema():
+    import pyarrow as pa
+    return pa.schema([("n", pa.int16()), ("l", pa.int32()),
+                      ("lambdax", pa.float64()), ("iran", pa.int32())])
+
+
+def run_params(tables: Dict[str, object], input_path: Source) -> dict:
+    """{chave de partição: valor} do run (None quando o .out não traz o parâmetro)."""
+    import pandas as pd
+
+    hdr = tables.get("run_header")
+    if hdr is not None and len(hdr) and all(k in hdr.columns for k in PARTITION_KEYS):
+        row = hdr.iloc[0]
+        values = {k: row[k] for k in PARTITION_KEYS}
+    else:
+        from blocks.out_simulations import read_header
+        header = read_header(input_path)
+        values = {k: header.get(k) for k in PARTITION_KEYS}
+    return {k: (None if v is None or pd.isna(v) else v) for k, v in values.items()}
+
+
+def to_arrow(df, params: dict, float32: bool = False):
+    """DataFrame de to_tables -> pa.Table com tipos compactos e as colunas de partição."""
+    import pyarrow as pa
+
+    df = df.drop(columns=[k for k in PARTITION_KEYS if k in df.columns])
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    fields, columns = [], []
+    for field, col in zip(table.schema, table.columns):
+        name, typ = field.name, field.type
+        if name in _STRINGS or pa.types.is_string(typ) or pa.types.is_large_string(typ):
+            col = col.cast(pa.string()).dictionary_encode()
+        elif name in _INT16:
+            col = col.cast(pa.int16())
+        elif name in _INT32:
+            col = col.cast(pa.int32())
+        elif pa.types.is_null(typ) or (float32 and pa.types.is_float64(typ)):
+            # coluna toda None (campo ausente no .out) vira float, como nas demais entradas
+            col = col.cast(pa.float32() if float32 else pa.float64())
+        fields.append(pa.field(name, col.type))
+        columns.append(col)
+
+    n = table.num_rows
+    for field in _partition_schema():
+        fields.append(field)
+        columns.append(pa.array([params.get(field.name)] * n, type=field.type))
+    return pa.Table.from_arrays(columns, schema=pa.schema(fields))
+
+
+def remove_sources(root: str, paths: Optional[Iterable[str]] = None) -> int:
+    """
+    Apaga os arquivos do dataset gravados a partir das entradas `paths`
+    (todos, se None). Uma só varredura do diretório. Retorna quantos apagou.
+    """
+    base = Path(root)
+    if not base.is_dir():
+        return 0
+    ids = None if paths is None else {source_id(p) for p in paths}
+    removed = 0
+    for f in base.rglob("part-*.parquet"):
+        # part-<stem>-<id>-<i>.parquet (o stem pode ter "-"; id e i não)
+        rest, _, idx = f.name[len("part-"):-len(".parquet")].rpartition("-")
+        if ids is None or (idx.isdigit() and rest.rpartition("-")[2] in ids):
+            f.unlink()
+            removed += 1
+    return removed
+
+
+def write_dataset(tables: Dict[str, object], input_path: Source, root: str,
+                  float32: bool = False, row_group_size: int = ROW_GROUP_SIZE) -> Dict[str, int]:
+    """
+    Acrescenta as tabelas de uma entrada ({tabela: DataFrame}, ver to_tables)
+    ao dataset em `root`. Retorna {tabela: nº de linhas gravadas}.
+    Para substituir uma entrada já gravada, chamar remove_sources antes.
+    """
+    import pyarrow.dataset as ds
+
+    params = run_params(tables, input_path)
+    stem = f"{source_stem(input_path)}-{source_id(input_path)}"
+    fmt = ds.ParquetFileFormat()
+    counts: Dict[str, int] = {}
+    for name, df in tables.items():
+        if not len(df):
+            continue
+        ds.write_dataset(
+            to_arrow(with_source(df, input_path), params, float32=float32),
+            base_dir=str(Path(root) / name),
+            format=fmt,
+            partitioning=ds.partitioning(_partition_schema(), flavor="hive"),
+            basename_template=f"part-{stem}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_options=fmt.make_write_options(compression="zstd"),
+            max_rows_per_group=row_group_size,
+            min_rows_per_group=min(row_group_size, len(df)),
+        )
+        counts[name] = len(df)
+    return counts
+
+
+def open_dataset(root: str, table: str):
+    """pyarrow.dataset de uma tabela, com as chaves de partição tipadas."""
+    import pyarrow.dataset as ds
+    return ds.dataset(str(Path(root) / table), format="parquet",
+                      partitioning=ds.partitioning(_partition_schema(), flavor="hive"))
@@ -0,0 +1,208 @@
+"""
+Motor de extração em passada única.
+
+Lê o arquivo .out uma vez, quebra cada linha em tokens uma vez e entrega a
+linha aos LineHandler dos blocos que declaram interesse nela (1º token,
+substring ou bloco em andamento; ver blocks.plugin). No fim, cada bloco grava suas saídas
+com o seu próprio write_outputs, exatamente como faria o run_etl do bloco.
+
+    python -m etl.run --block all --input examples/example.out --outdir outputs
+"""
+
+import os
+from collections.abc import Mapping
+from contextlib import contextmanager
+from importlib import import_module
+from itertools import islice
+from os import PathLike
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from blocks import cache as parse_cache
+from blocks.plugin import Dispatcher, declares_routes, triggered
+from blocks.reader import Source, is_stdin, iter_lines
+from blocks.writer import WORKERS, writing
+
+from .metrics import Metrics
+
+
+class LazyModules(Mapping):
+    """{nome: caminho do módulo}; o módulo só é importado no primeiro acesso (importlib)."""
+
+    def __init__(self, paths: Dict[str, str]) -> None:
+        self._paths = dict(paths)
+
+    def __getitem__(self, name: str):
+        return import_module(self._paths[name])
+
+    def __iter__(self):
+        return iter(self._paths)
+
+    def __len__(self) -> int:
+        return len(self._paths)
+
+
+# nome do bloco -> pacote (precisa expor LineHandler, write_outputs e to_tables)
+BLOCKS = LazyModules({
+    "out_simulations": "blocks.out_simulations",
+    "summary": "blocks.summary",
+    "averages": "blocks.averages",
+    "correlations": "blocks.correlations",
+    "k_space_variables": "blocks.k_space_variables",
+    "real_space_variables": "blocks.real_space_variables",
+})
+
+# blocos-visão -> bloco de onde saem: não leem o arquivo, filtram o resultado
+# do outro (from_source); pedir os dois custa uma só passada do handler
+VIEWS = {
+    "averages": "summary",
+    "correlations": "summary",
+}
+
+
+def scan_lines(lines: Iterable[str], handlers: Dict[str, object]) -> None:
+    """
+    Entrega cada linha (já sem o '\\n', ver iter_lines) e seus tokens aos
+    handlers a que ela interessa (roteamento por 1º token, blocks.plugin).
+    """
+    feed = Dispatcher(handlers).feed
+    for ln in lines:
+        feed(ln, ln.split())
+
+
+def scan_file(input_path: Source, blocks: Iterable[str] = BLOCKS,
+              metrics: Optional[Metrics] = None) -> Dict[str, object]:
+    """
+    Uma única leitura do arquivo (caminho, "-" ou arquivo aberto) para todos
+    os blocos pedidos. Retorna {bloco: resultado} com o mesmo formato de cada parse_block.
+    Com `metrics`, mede leitura e parse de cada bloco (ver scan_timed).
+    Os blocos de VIEWS saem do resultado do bloco de origem, lido uma vez só.
+    Blocos cujo resultado está no cache (blocks.cache) não são lidos de novo.
+    """
+    blocks = list(blocks)
+    sources = dict.fromkeys(VIEWS.get(name, name) for name in blocks)
+    results, digest = _from_cache(input_path, sources, metrics)
+    handlers = {name: BLOCKS[name].LineHandler() for name in sources if name not in results}
+    # tudo no cache: o arquivo nem é lido
+    if handlers and metrics is not None:
+        results.update(scan_timed(input_path, handlers, metrics))
+    elif handlers:
+        scan_lines(iter_lines(input_path), handlers)
+        results.update({name: h.finish() for name, h in handlers.items()})
+    if digest is not None:
+        for name in handlers:
+            parse_cache.store(name, BLOCKS[name].LineHandler.__module__, digest, results[name])
+    return {name: BLOCKS[name].from_source(results[VIEWS[name]]) if name in VIEWS else results[name]
+            for name in blocks}
+
+
+def _from_cache(input_path: Source, sources: Iterable[str], metrics: Optional[Metrics]):
+    """
+    ({bloco: resultado} dos blocos já no cache (blocks.cache), sha256 da entrada),
+    com as mesmas chaves do parse_block/parse_file de cada bloco; sem cache, ({}, None).
+    """
+    if not parse_cache.enabled():
+        return {}, None
+    digest = parse_cache.source_digest(input_path)
+    if digest is None:
+        return {}, None
+    timer = metrics.timer if metrics is not None else _no_timer
+    results = {}
+    for name in sources:
+        with timer(name, "parse"):
+            found = parse_cache.load(name, BLOCKS[name].LineHandler.__module__, digest)
+        if found is not parse_cache.MISS:
+            results[name] = found
+            if metrics is not None:
+                metrics.add(name, "cached", 1)
+    return results, digest
+
+
+def scan_timed(input_path: Source, handlers: Dict[str, object], metrics: Metrics,
+               chunk: int = 1 << 14) -> Dict[str, object]:
+    """
+    Como scan_lines + finish, mas em lotes de `chunk` linhas: o lote é lido
+    (etapa read do bloco "*") e depois cada handler o percorre inteiro
+    (etapa parse do bloco), com o relógio consultado só por lote.
+    """
+    if isinstance(input_path, (str, PathLike)) and not is_stdin(input_path):
+        metrics.add("*", "bytes", os.path.getsize(input_path))
+    lines = iter_lines(input_path)
+    while True:
+        with metrics.timer("*", "read"):
+            batch = [(ln, ln.split()) for ln in islice(lines, chunk)]
+        if not batch:
+            break
+        metrics.add("*", "lines", len(batch))
+        for name, h in handlers.items():
+            feed = h.feed
+            with metrics.timer(name, "parse"):
+                if not declares_routes(h):
+                    for ln, tokens in batch:
+                        feed(ln, tokens)
+                    continue
+                # mesmo roteamento do Dispatcher, handler a handler
+                for ln, tokens in batch:
+                    if h.active or triggered(h, ln, tokens):
+                        feed(ln, tokens)
+    results = {}
+    for name, h in handlers.items():
+        with metrics.timer(name, "parse"):
+            results[name] = h.finish()
+        metrics.add(name, "misses", getattr(h, "misses", 0))
+    return results
+
+
+def _parsed_rows(parsed) -> int:
+    """Linhas de dados no resultado de um LineHandler (antes de to_tables)."""
+    if isinstance(parsed, tuple):  # out_simulations: (df_header, df_sweeps)
+        return sum(len(df) for df in parsed)
+    if isinstance(parsed, dict) and "items" in parsed:
+        return len(parsed["items"])
+    return sum(len(rows) for rows in parsed.values())  # blocos de matriz: {nome: [linhas]}
+
+
+def run_etl(input_path: str, outdir: Optional[str], to_parquet: bool = False,
+            blocks: Iterable[str] = BLOCKS, metrics: Optional[Metrics] = None,
+            writers: int = WORKERS, options: Optional[Dict[str, dict]] = None):
+    """
+    ETL de todos os blocos (ou só de `blocks`) com uma só leitura do arquivo.
+    Com outdir=None nada é gravado e as tabelas de todos os blocos
+    ({tabela: DataFrame}) são devolvidas (unidade de trabalho do etl.batch).
+    `metrics` (etl.metrics.Metrics) recebe tempos por etapa e contadores por bloco.
+    `writers`: threads de gravação (blocks.writer); 0 grava tudo na hora.
+    `options`: argumentos extras do write_outputs de cada bloco,
+    ex.: {"real_space_variables": {"per_metric": False}}.
+    """
+    results = scan_file(input_path, blocks, metrics)
+    timer = metrics.timer if metrics is not None else _no_timer
+    if outdir is None:
+        tables = {}
+        for name, parsed in results.items():
+            with timer(name, "tables"):
+                out = BLOCKS[name].to_tables(parsed, input_path)
+            tables.update(out)
+            if metrics is not None:
+                # linhas coletadas pelo handler que o layout rejeitou também são misses
+                rows = sum(len(df) for df in out.values())
+                metrics.add(name, "rows", rows)
+                metrics.add(name, "misses", max(_parsed_rows(parsed) - rows, 0))
+        return tables
+    Path(outdir).mkdir(parents=True, exist_ok=True)
+    # os arquivos vão para a etapa de gravação (blocks.writer) enquanto o próximo bloco monta os seus;
+    # o write de cada bloco mede a montagem, a espera pelas threads fica no bloco "*"
+    with writing(writers) as writer:
+        for name, parsed in results.items():
+            with timer(name, "write"):
+                BLOCKS[name].write_outputs(parsed, input_path, outdir, to_parquet,
+                                           **(options or {}).get(name, {}))
+            if metrics is not None:
+                metrics.add(name, "rows", _parsed_rows(parsed))
+        if writer is not None:
+            with timer("*", "write"):
+                writer.drain()
+
+
+@contextmanager
+def _no_timer(block: str, stage: str):
+    yield
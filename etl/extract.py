@@ -0,0 +1,199 @@
+"""
+Extração seletiva: só os observáveis pedidos, direto para DataFrame/Arrow,
+sem rodar os blocos inteiros nem gravar nada.
+
+    from etl.extract import extract
+    df = extract(paths, ["Average Energy", "Scdw(q)", "xx Spin correlation function"])
+
+    python -m etl.extract --inputs runs/ --observables "Average Energy" "Scdw(q)" --out sel.parquet
+
+Um observável é o nome de um bloco de matriz, como os parsers o chamam
+("Sxx(q)", "Green's function", "bonds x"), ou de um escalar do resumo,
+pelo nome ("Average Energy", "s*-wave Peff") ou pela chave (average_energy).
+
+Para cada arquivo o índice de seções (blocks.sections, mmap sem decodificar;
+ou os offsets guardados por etl.index build --sections, com `index_db`) diz
+onde está cada bloco pedido, e só esses bytes são lidos e passados ao
+parse_block do bloco. Os escalares são lidos do início do resumo em diante,
+pulando sem decodificar as seções sem nenhum "=", até que todos os pedidos
+tenham aparecido; o resto do arquivo não é lido.
+
+Saída em formato longo, uma linha por célula/escalar:
+    source_file, observable, i, j, value, error
+com (kx, ky) em (i, j) nos blocos (q), i/j nulos nos escalares e, nos
+blocos de espaço real up-up/up-dn, value_upup, err_upup, value_updn, err_updn.
+"""
+
+import argparse
+import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from blocks.reader import iter_lines, open_binary, source_name
+from blocks.sections import Section, index_file, open_section
+
+COLUMNS = ("source_file", "observable", "i", "j", "value", "error",
+           "value_upup", "err_upup", "value_updn", "err_updn")
+
+
+def _sections(path: str, index_db: Optional[str]) -> List[Section]:
+    if index_db is not None:
+        from .index import load_sections
+        found = load_sections(index_db, path)
+        if found:
+            return found
+    return index_file(path)
+
+
+def _dense(block, source: str):
+    """DenseBlock de k_space/real_space com índices (i, j) e erro em "error"."""
+    from blocks.dense import DenseBlock
+
+    (a, b), values = block.index.values(), block.values
+    if "err" in values:
+        values = {"value": values["value"], "error": values["err"]}
+    return DenseBlock(block.name, source, {"i": a, "j": b}, values)
+
+
+def _matrices(path: str, sections: List[Section], names: Sequence[str]) -> list:
+    from blocks import k_space_variables, real_space_variables
+
+    out = []
+    source = source_name(path)
+    for sec in sections:
+        if sec.name not in names or sec.kind not in ("kspace", "realspace"):
+            continue
+        mod = k_space_variables if sec.kind == "kspace" else real_space_variables
+        parsed = mod.parse_block(open_section(path, sec))
+        out += [_dense(b, source) for b in mod.etl.dense_blocks(parsed, path)]
+    return out
+
+
+def _scalars(path: str, sections: List[Section], wanted: Iterable[str]) -> Dict[str, dict]:
+    """
+    Escalares do resumo nas `sections` (do resumo em diante, em ordem). Seções sem
+    nenhum "=" (as matrizes) não são decodificadas; para de ler quando todos aparecem.
+    """
+    from blocks.summary.parser import LineHandler
+
+    wanted = set(wanted)
+    found: Dict[str, dict] = {}
+
+    def keep(item: dict) -> None:
+        for label in (item["name"], item["key"]):
+            if label in wanted and label not in found:
+                found[label] = item
+
+    handler = LineHandler(emit=keep)
+    feed = handler.feed
+    with open_binary(path) as f:
+        for sec in sections:
+            f.seek(sec.start)
+            data = f.read(sec.end - sec.start)
+            if b"=" not in data:
+                continue
+            for line in iter_lines(io.BytesIO(data)):
+                # só as linhas que o handler não ignoraria (ver LineHandler.CONTAINS)
+                if "=" in line or "-wave" in line or "Time:" in line or handler.active:
+                    feed(line)
+            if len(found) == len(wanted):
+                return found
+    handler.finish()
+    return found
+
+
+def extract_file(path: str, observables: Sequence[str], index_db: Optional[str] = None):
+    """pa.Table (formato longo, ver o topo do módulo) com os observáveis de um arquivo; None se nenhum."""
+    import pyarrow as pa
+    from blocks.dense import concat_arrow
+
+    sections = _sections(path, index_db)
+    matrix_names = {s.name for s in sections if s.kind in ("kspace", "realspace")}
+    wanted = list(dict.fromkeys(observables))
+    tables = []
+
+    blocks = _matrices(path, sections, [o for o in wanted if o in matrix_names])
+    if blocks:
+        tables.append(concat_arrow(blocks, label="observable"))
+
+    scalars = [o for o in wanted if o not in matrix_names]
+    first = next((k for k, s in enumerate(sections) if s.kind == "summary"), None)
+    if scalars and first is not None:
+        found = _scalars(path, sections[first:], scalars)
+        if found:
+            def text(values):
+                return pa.array(values).dictionary_encode()
+            tables.append(pa.table({
+                "source_file": text([source_name(path)] * len(found)),
+                "observable": text(list(found)),
+                "value": pa.array([it["value"] for it in found.values()], pa.float64()),
+                "error": pa.array([it["error"] for it in found.values()], pa.float64()),
+            }))
+    if not tables:
+        return None
+    return pa.concat_tables(tables, promote_options="default")
+
+
+def _extract_one(args):
+    return extract_file(*args)
+
+
+def extract(paths: Iterable[str], observables: Sequence[str], as_arrow: bool = False,
+            index_db: Optional[str] = None, workers: int = 1):
+    """
+    Os `observables` de todos os `paths`, numa tabela só: DataFrame (padrão)
+    ou pa.Table (as_arrow). `workers` > 1 divide os arquivos num pool de processos.
+    """
+    import pyarrow as pa
+
+    if isinstance(observables, str):
+        observables = [observables]
+    jobs = [(str(p), list(observables), index_db) for p in paths]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            tables = list(pool.map(_extract_one, jobs, chunksize=16))
+    else:
+        tables = [_extract_one(job) for job in jobs]
+    tables = [t for t in tables if t is not None]
+    if not tables:
+        table = pa.table({"source_file": pa.array([], pa.string()), "observable": pa.array([], pa.string()),
+                          "value": pa.array([], pa.float64()), "error": pa.array([], pa.float64())})
+    else:
+        table = pa.concat_tables(tables, promote_options="default").unify_dictionaries()
+        table = table.select([c for c in COLUMNS if c in table.column_names])
+    return table if as_arrow else table.to_pandas()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Extrai só os observáveis pedidos de muitos .out")
+    parser.add_argument("--inputs", nargs="+", required=True, help="Arquivos, diretórios ou globs de .out")
+    parser.add_argument("--observables", nargs="+", required=True,
+                        help='ex.: "Average Energy" "Scdw(q)" "Green\'s function" s_wave_peff')
+    parser.add_argument("--out", required=True, help="Arquivo de saída (.parquet ou .csv)")
+    parser.add_argument("--db", default=None, help="Índice com offsets (etl.index build --sections)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processos em paralelo")
+    args = parser.parse_args(argv)
+
+    from .batch import collect_inputs
+
+    inputs = collect_inputs(args.inputs)
+    if not inputs:
+        raise SystemExit(f"❌ Nenhum arquivo encontrado em: {' '.join(args.inputs)}")
+    table = extract(inputs, args.observables, as_arrow=True, index_db=args.db, workers=args.workers)
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    if args.out.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        pq.write_table(table, args.out)
+    else:
+        table.to_pandas().to_csv(args.out, index=False)
+    got = set(table.column("observable").to_pylist()) if table.num_rows else set()
+    missing = [o for o in args.observables if o not in got]
+    if missing:
+        print(f"[WARN] não encontrados em nenhum arquivo: {', '.join(missing)}")
+    print(f"[OK] {table.num_rows} linhas de {len(inputs)} arquivo(s) -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Modo follow: acompanha .out de jobs ainda rodando e acrescenta os sweeps
+novos à tabela sweeps conforme aparecem.
+
+    python -m etl.batch --follow --inputs runs/ --outdir live --interval 30
+
+Cada arquivo tem um Follower com o offset já lido, o pedaço de linha
+incompleta do fim e o LineHandler do out_simulations (que guarda um
+registro de sweep pela metade entre duas leituras). A cada rodada só os
+bytes acrescentados são lidos; arquivos sem mudança de tamanho custam só um
+stat. source_file é o caminho absoluto, como no etl.batch. Muitos jobs são acompanhados do mesmo processo, por polling (portável,
+funciona em NFS/Lustre, onde inotify não vê escritas de outros nós).
+
+Saída: <outdir>/sweeps.csv (colunas da tabela sweeps do etl.batch, com
+source_file), só com append. O estado fica em <outdir>/follow_state.json:
+por arquivo, o inode e o offset de retomada, o fim da última linha lida
+fora de um registro de sweep. Ao retomar, um LineHandler novo relê dali só
+o registro que estava pela metade, sem duplicar sweeps. Estado de outra
+STATE_VERSION (ou o follow_state.pkl antigo) não é aproveitado: sweeps.csv é
+refeito do zero. Arquivos comprimidos são ignorados.
+"""
+
+import csv
+import json
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from blocks.out_simulations.parser import LineHandler
+from blocks.reader import COMPRESSED_SUFFIXES, iter_lines
+
+from .batch import collect_inputs
+from .manifest import source_key
+
+STATE_NAME = "follow_state.json"
+STATE_VERSION = 1  # incrementar quando o estado mudar de formato ou de significado
+_LEGACY_STATE = "follow_state.pkl"
+SWEEPS_NAME = "sweeps.csv"
+SWEEP_FIELDS = ["source_file", "sweep", "asgn", "asgnp", "accept_holstein",
+                "redo_ratio_sweep", "total_meas", "nwrap", "torth"]
+
+
+class Follower:
+    """Leitura incremental de um .out: poll() devolve os sweeps completados desde a última chamada."""
+
+    def __init__(self, path: str, chunk_size: int = 1 << 22):
+        self.path = path
+        self.name = source_key(path)
+        self.chunk_size = chunk_size
+        self._reset()
+
+    def _reset(self) -> None:
+        self.offset = 0
+        self.resume = 0               # fim da última linha lida fora de um registro de sweep
+        self.inode = None
+        self._tail = b""              # linha ainda sem '\n'
+        self._rows: List[dict] = []
+        self.handler = LineHandler(emit=self._rows.append)
+
+    def poll(self) -> List[dict]:
+        st = os.stat(self.path)
+        if (self.inode is not None and st.st_ino != self.inode) or st.st_size < self.offset:
+            # arquivo recriado ou truncado (job reiniciado): recomeça do zero
+            self._reset()
+        self.inode = st.st_ino
+        if st.st_size == self.offset:
+            return []
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            while self.offset < st.st_size:
+                data = f.read(min(self.chunk_size, st.st_size - self.offset))
+                if not data:
+                    break
+                self.offset += len(data)
+                self._feed(data)
+        rows, self._rows[:] = list(self._rows), []
+        return [{"source_file": self.name, **r} for r in rows]
+
+    def _feed(self, data: bytes) -> None:
+        pos = self.offset - len(data) - len(self._tail)  # offset do início de `data`
+        data = self._tail + data
+        cut = data.rfind(b"\n") + 1
+        self._tail = data[cut:]
+        if cut:
+            raw = data[:cut].split(b"\n")[:-1]
+            for chunk, ln in zip(raw, iter_lines(raw)):
+                self.handler.feed(ln)
+                pos += len(chunk) + 1
+                if not self.handler.in_sweep:
+                    self.resume = pos
+
+    def state(self) -> dict:
+        return {"path": self.path, "inode": self.inode, "offset": self.resume}
+
+    @classmethod
+    def from_state(cls, state: dict) -> "Follower":
+        """Follower que relê a partir do offset de retomada, com um LineHandler novo."""
+        fol = cls(state["path"])
+        fol.offset = fol.resume = state["offset"]
+        fol.inode = state["inode"]
+        return fol
+
+
+def load_state(outdir: str) -> Optional[Dict[str, Follower]]:
+    """Followers salvos; None se o estado não serve (outra STATE_VERSION, formato antigo)."""
+    path = Path(outdir) / STATE_NAME
+    if not path.exists():
+        return None if (Path(outdir) / _LEGACY_STATE).exists() else {}
+    try:
+        with open(path) as f:
+            state = json.load(f)
+        if state.get("version") != STATE_VERSION:
+            return None
+        return {key: Follower.from_state(s) for key, s in state["files"].items()}
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def save_state(outdir: str, followers: Dict[str, Follower]) -> None:
+    path = Path(outdir) / STATE_NAME
+    tmp = path.with_suffix(".json.tmp")
+    state = {"version": STATE_VERSION, "files": {key: fol.state() for key, fol in followers.items()}}
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=1)
+    os.replace(tmp, path)
+
+
+def reset_state(outdir: str) -> None:
+    """Descarta estado e sweeps.csv: a próxima rodada relê todos os arquivos do início."""
+    for name in (STATE_NAME, _LEGACY_STATE, SWEEPS_NAME):
+        try:
+            os.unlink(Path(outdir) / name)
+        except FileNotFoundError:
+            pass
+
+
+def append_sweeps(outdir: str, rows: List[dict]) -> None:
+    target = Path(outdir) / SWEEPS_NAME
+    new = not target.exists()
+    with open(target, "a", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SWEEP_FIELDS)
+        if new:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def poll_once(patterns: Iterable[str], outdir: str, followers: Dict[str, Follower]) -> int:
+    """Uma rodada: descobre arquivos novos, lê o que cresceu e grava os sweeps. Retorna quantos."""
+    for p in collect_inputs(patterns):
+        if Path(p).suffix.lower() not in COMPRESSED_SUFFIXES:
+            followers.setdefault(os.path.abspath(p), Follower(p))
+
+    rows: List[dict] = []
+    for key, fol in list(followers.items()):
+        try:
+            rows += fol.poll()
+        except FileNotFoundError:
+            del followers[key]  # arquivo removido/movido
+    if rows:
+        append_sweeps(outdir, rows)
+    save_state(outdir, followers)
+    return len(rows)
+
+
+def follow(patterns: Iterable[str], outdir: str, interval: float = 30.0, once: bool = False) -> None:
+    """Acompanha os arquivos de `patterns` (relidos a cada rodada) até Ctrl-C."""
+    patterns = list(patterns)
+    Path(outdir).mkdir(parents=True, exist_ok=True)
+    followers = load_state(outdir)
+    if followers is None:
+        print(f"[WARN] Estado em {outdir} de outra versão: {SWEEPS_NAME} será refeito do início")
+        reset_state(outdir)
+        followers = {}
+    try:
+        while True:
+            n = poll_once(patterns, outdir, followers)
+            if n:
+                print(f"[+] {n} sweep(s) novo(s) em {len(followers)} arquivo(s)")
+            if once:
+                return
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print(f"⏹️  follow interrompido; estado salvo em {Path(outdir) / STATE_NAME}")
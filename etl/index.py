@@ -0,0 +1,223 @@
+"""
+Índice de parâmetros dos runs de uma campanha (SQLite), sem rodar o ETL.
+
+Para cada .out lê só o prefixo do cabeçalho (até o primeiro "Finished
+measurement sweep", ver out_simulations.read_header) e junta com os tokens
+do nome do arquivo (n8L400w1.0lssh0.7745966692s1r47.out -> n=8, L=400,
+w=1.0, lssh=0.7745966692, s=1, r=47). Os valores do cabeçalho têm
+prioridade; os do nome só preenchem o que faltar.
+
+    python -m etl.index build --inputs runs/ "campanha/*.out" --db runs.db
+    python -m etl.index query --db runs.db l=400 "lambdax~0.77" --tol 0.01
+
+Rodar build de novo só relê arquivos novos ou com size/mtime diferentes e
+remove do índice os que não existem mais.
+
+Com --sections o build guarda também os offsets das seções de cada arquivo
+(blocks.sections: sweeps, summary, cada bloco (q) e de espaço real), e
+load_sections os devolve sem reler o arquivo: read_section(path, sec) lê só
+os bytes do bloco pedido.
+
+    python -m etl.index build --inputs runs/ --db runs.db --sections
+"""
+
+import argparse
+import json
+import os
+import re
+import sqlite3
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from blocks.out_simulations.parser import RUN_PARAMS, read_header
+from blocks.reader import source_name, source_stem
+from blocks.sections import Section, index_file
+
+from .batch import collect_inputs
+
+# colunas do índice além de path/source_file/size/mtime_ns/name_tokens
+HEADER_KEYS = ("tausk", "phonskip", "numtry", "gsize", "lambda0", "istart", "mu", "gamma")
+COLUMNS = tuple(RUN_PARAMS) + HEADER_KEYS + ("outname",)
+_REAL = {k for k, t in RUN_PARAMS.items() if t is float} | {"gsize", "lambda0", "mu", "gamma"}
+
+# token do nome do arquivo -> coluna do índice
+FILENAME_KEYS = {"n": "n", "L": "l", "w": "omega", "lssh": "lambdax"}
+_TOKEN_RE = re.compile(r'([A-Za-z]+)(-?\d+(?:\.\d+)?(?:[Ee][+-]?\d+)?)')
+
+_OPS = ("=", "~", "<", ">", "<=", ">=")
+_COND_RE = re.compile(r'^(\w+)\s*(<=|>=|=|~|<|>)\s*(.+)$')
+
+
+def filename_tokens(path: str) -> Dict[str, float]:
+    """Tokens <letras><número> do nome (sem extensões): {"n": 8, "L": 400, "w": 1.0, ...}."""
+    tokens = {}
+    for key, val in _TOKEN_RE.findall(source_stem(path)):
+        num = float(val)
+        tokens.setdefault(key, int(num) if num.is_integer() and "." not in val else num)
+    return tokens
+
+
+def read_params(path: str) -> dict:
+    """Linha do índice para `path`: cabeçalho + tokens do nome (sem size/mtime)."""
+    header = read_header(path)
+    tokens = filename_tokens(path)
+    row = {k: header.get(k) for k in COLUMNS}
+    for token, col in FILENAME_KEYS.items():
+        if row.get(col) is None and token in tokens:
+            row[col] = tokens[token]
+    row["name_tokens"] = json.dumps(tokens, sort_keys=True)
+    return row
+
+
+def connect(db: str) -> sqlite3.Connection:
+    con = sqlite3.connect(db)
+    cols = ", ".join(f"{c} {'REAL' if c in _REAL else ('TEXT' if c == 'outname' else 'INTEGER')}"
+                     for c in COLUMNS)
+    con.execute(f"""CREATE TABLE IF NOT EXISTS runs (
+        path TEXT PRIMARY KEY, source_file TEXT, size INTEGER, mtime_ns INTEGER,
+        {cols}, name_tokens TEXT)""")
+    con.execute("CREATE INDEX IF NOT EXISTS runs_params ON runs (l, n, lambdax)")
+    con.execute("""CREATE TABLE IF NOT EXISTS sections (
+        path TEXT, kind TEXT, name TEXT, start INTEGER, "end" INTEGER)""")
+    con.execute("CREATE INDEX IF NOT EXISTS sections_path ON sections (path)")
+    return con
+
+
+def build_index(inputs: Iterable[str], db: str, sections: bool = False) -> Dict[str, int]:
+    """
+    Atualiza o índice com `inputs`. Retorna {"indexed", "skipped", "removed", "failed"}.
+    `sections`: guarda também os offsets das seções (blocks.sections.index_file).
+    """
+    con = connect(db)
+    known = {p: (s, m) for p, s, m in con.execute("SELECT path, size, mtime_ns FROM runs")}
+    with_sections = {p for (p,) in con.execute("SELECT DISTINCT path FROM sections")} if sections else set()
+    stats = {"indexed": 0, "skipped": 0, "removed": 0, "failed": 0}
+    names = ("path", "source_file", "size", "mtime_ns") + COLUMNS + ("name_tokens",)
+    sql = f"INSERT OR REPLACE INTO runs ({', '.join(names)}) VALUES ({', '.join('?' * len(names))})"
+    with con:
+        for p in inputs:
+            key = os.path.abspath(p)
+            st = os.stat(p)
+            if known.get(key) == (st.st_size, st.st_mtime_ns) and (not sections or key in with_sections):
+                stats["skipped"] += 1
+                continue
+            try:
+                row = read_params(p)
+                secs = index_file(p) if sections else []
+            except Exception as e:
+                print(f"[FAIL] {p}: {type(e).__name__}: {e}")
+                stats["failed"] += 1
+                continue
+            row.update(path=key, source_file=source_name(p), size=st.st_size, mtime_ns=st.st_mtime_ns)
+            con.execute(sql, [row[c] for c in names])
+            # offsets antigos não valem para o arquivo novo
+            con.execute("DELETE FROM sections WHERE path = ?", (key,))
+            con.executemany("INSERT INTO sections VALUES (?, ?, ?, ?, ?)", [(key, *sec) for sec in secs])
+            stats["indexed"] += 1
+        gone = [p for p in known if not os.path.exists(p)]
+        con.executemany("DELETE FROM runs WHERE path = ?", [(p,) for p in gone])
+        con.executemany("DELETE FROM sections WHERE path = ?", [(p,) for p in gone])
+        stats["removed"] = len(gone)
+    con.close()
+    return stats
+
+
+def load_sections(db: str, path: str) -> List[Section]:
+    """
+    Seções de `path` guardadas por build --sections, em ordem de offset.
+    Vazio se o arquivo não foi indexado com --sections ou mudou desde o build.
+    """
+    key = os.path.abspath(path)
+    con = connect(db)
+    try:
+        st = os.stat(path)
+        if con.execute("SELECT 1 FROM runs WHERE path = ? AND size = ? AND mtime_ns = ?",
+                       (key, st.st_size, st.st_mtime_ns)).fetchone() is None:
+            return []
+        rows = con.execute('SELECT kind, name, start, "end" FROM sections WHERE path = ? ORDER BY start', (key,))
+        return [Section(*r) for r in rows]
+    finally:
+        con.close()
+
+
+def _where(conditions: Iterable[Tuple[str, str, object]], tol: float) -> Tuple[str, list]:
+    clauses, args = [], []
+    for col, op, val in conditions:
+        if col not in COLUMNS and col not in ("source_file", "size"):
+            raise ValueError(f"coluna desconhecida no índice: {col}")
+        if op not in _OPS:
+            raise ValueError(f"operador inválido: {op}")
+        if op == "~" or (op == "=" and col in _REAL):
+            clauses.append(f"abs({col} - ?) <= ?")
+            args += [val, tol]
+        else:
+            clauses.append(f"{col} {op} ?")
+            args.append(val)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", args
+
+
+def find_runs(db: str, conditions: Iterable[Tuple[str, str, object]] = (), tol: float = 1e-6,
+              **equals) -> List[str]:
+    """
+    Caminhos dos runs que satisfazem todas as condições, ordenados.
+    `conditions`: (coluna, op, valor) com op em =, ~, <, >, <=, >=;
+    "~" (e "=" em colunas reais) compara com tolerância absoluta `tol`.
+    Atalho: find_runs("runs.db", l=400, lambdax=0.77, tol=0.01).
+    """
+    conds = list(conditions) + [(k, "=", v) for k, v in equals.items()]
+    where, args = _where(conds, tol)
+    con = connect(db)
+    try:
+        return [p for (p,) in con.execute(f"SELECT path FROM runs{where} ORDER BY path", args)]
+    finally:
+        con.close()
+
+
+def parse_condition(text: str) -> Tuple[str, str, object]:
+    """"l=400" / "lambdax~0.77" / "n>=8" -> (coluna, op, valor)."""
+    m = _COND_RE.match(text.strip())
+    if not m:
+        raise ValueError(f"condição inválida: {text!r} (use coluna=valor, coluna~valor, coluna>=valor...)")
+    col, op, raw = m.groups()
+    try:
+        val: object = int(raw)
+    except ValueError:
+        try:
+            val = float(raw)
+        except ValueError:
+            val = raw
+    return col, op, val
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Índice de parâmetros dos runs (SQLite)")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="Cria/atualiza o índice")
+    b.add_argument("--inputs", nargs="+", required=True, help="Arquivos, diretórios ou globs de .out")
+    b.add_argument("--db", default="runs.db", help="Arquivo SQLite do índice")
+    b.add_argument("--sections", action="store_true",
+                   help="Guarda também os offsets das seções de cada arquivo (blocks.sections)")
+    q = sub.add_parser("query", help="Lista os runs que satisfazem as condições")
+    q.add_argument("conditions", nargs="*", help="ex.: l=400 'lambdax~0.77' 'n>=8'")
+    q.add_argument("--db", default="runs.db", help="Arquivo SQLite do índice")
+    q.add_argument("--tol", type=float, default=1e-6, help="Tolerância de ~ e de = em colunas reais")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "build":
+        inputs = collect_inputs(args.inputs)
+        if not inputs:
+            raise SystemExit(f"❌ Nenhum arquivo encontrado em: {' '.join(args.inputs)}")
+        stats = build_index(inputs, args.db, args.sections)
+        print(f"✅ {stats['indexed']} indexado(s), {stats['skipped']} inalterado(s), "
+              f"{stats['removed']} removido(s), {stats['failed']} falha(s); índice em {args.db}")
+    else:
+        try:
+            conds = [parse_condition(c) for c in args.conditions]
+            paths = find_runs(args.db, conds, tol=args.tol)
+        except ValueError as e:
+            raise SystemExit(f"❌ {e}")
+        for p in paths:
+            print(p)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+"""
+Manifest de re-ingestão incremental do etl.batch.
+
+Fica em <outdir>/manifest.json e registra, por arquivo de entrada:
+    path, size, mtime_ns, sha256 e {bloco: PARSER_VERSION}
+
+Um arquivo é considerado inalterado quando size e mtime batem (sem ler o
+conteúdo); se só o mtime mudou, o sha256 decide. Mudança de PARSER_VERSION
+de qualquer bloco pedido força o reprocessamento.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from blocks.reader import is_stdin, source_name
+
+from .engine import BLOCKS
+
+MANIFEST_NAME = "manifest.json"
+# 2: source_file das tabelas consolidadas passou a ser o caminho absoluto (Manifest.key);
+# 3: idem no dataset, com source_id no nome dos arquivos.
+# Manifests antigos fazem a próxima execução regravar tudo.
+MANIFEST_FORMAT = 3
+
+
+def file_digest(path: str, chunk_size: int = 1 << 20) -> str:
+    """sha256 do conteúdo, lido em blocos (memória constante)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_key(path: str) -> str:
+    """
+    Identidade de uma entrada nas saídas consolidadas (source_file) e no manifest:
+    o caminho absoluto; stdin ("-", Stdin) fica com o nome (source_name).
+    """
+    return source_name(path) if is_stdin(path) else os.path.abspath(path)
+
+
+def source_id(path: str) -> str:
+    """Hash curto de source_key: vai no nome dos arquivos do dataset (run.out de diretórios diferentes)."""
+    return hashlib.sha256(source_key(path).encode()).hexdigest()[:16]
+
+
+def with_source(df, path: str):
+    """`df` com source_file = source_key(path), como Categorical de uma entrada (sem repetir a string)."""
+    import numpy as np
+    import pandas as pd
+
+    df = df.copy(deep=False)
+    df["source_file"] = pd.Categorical.from_codes(np.zeros(len(df), dtype=np.int8), categories=[source_key(path)])
+    return df
+
+
+def parser_versions(block: str) -> Dict[str, str]:
+    """{bloco: PARSER_VERSION} dos blocos cobertos por `block` ('all' = todos)."""
+    names = list(BLOCKS) if block == "all" else [block]
+    return {name: BLOCKS[name].PARSER_VERSION for name in names}
+
+
+class Manifest:
+    def __init__(self, outdir: str, output_format: str):
+        self.path = Path(outdir) / MANIFEST_NAME
+        self.output_format = output_format  # "csv", "parquet", "dataset" ou o destino (duckdb://...)
+        self.entries: Dict[str, dict] = {}
+        self.tables: set = set()
+        if self.path.exists():
+            data = json.loads(self.path.read_text())
+            # formato de saída diferente: as tabelas consolidadas não servem, recomeça
+            if data.get("format") == MANIFEST_FORMAT and data.get("output_format") == output_format:
+                self.entries = data.get("entries", {})
+                self.tables = set(data.get("tables", []))
+
+    @staticmethod
+    def key(path: str) -> str:
+        return source_key(path)
+
+    def is_current(self, path: str, versions: Dict[str, str]) -> bool:
+        """True se o arquivo já foi processado com esses parsers e não mudou."""
+        entry = self.entries.get(self.key(path))
+        if entry is None:
+            return False
+        blocks = entry.get("blocks", {})
+        if any(blocks.get(name) != v for name, v in versions.items()):
+            return False
+        st = os.stat(path)
+        if st.st_size != entry["size"]:
+            return False
+        if st.st_mtime_ns == entry["mtime_ns"]:
+            return True
+        # mtime mudou (cópia, touch, rsync...): o conteúdo decide
+        if file_digest(path) == entry["sha256"]:
+            entry["mtime_ns"] = st.st_mtime_ns
+            return True
+        return False
+
+    def record(self, path: str, versions: Dict[str, str], digest: Optional[str] = None,
+               stat: Optional[os.stat_result] = None) -> None:
+        st = stat or os.stat(path)
+        key = self.key(path)
+        digest = digest or file_digest(path)
+        old = self.entries.get(key, {})
+        # blocos processados antes só continuam válidos se o conteúdo é o mesmo
+        old_blocks = old.get("blocks", {}) if old.get("sha256") == digest else {}
+        self.entries[key] = {
+            "path": key,
+            "size": st.st_size,
+            "mtime_ns": st.st_mtime_ns,
+            "sha256": digest,
+            "blocks": {**old_blocks, **versions},
+        }
+
+    def forget(self, path: str) -> None:
+        self.entries.pop(self.key(path), None)
+
+    def save(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "format": MANIFEST_FORMAT,
+            "output_format": self.output_format,
+            "tables": sorted(self.tables),
+            "entries": self.entries,
+        }
+        tmp = self.path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(data, indent=1, sort_keys=True))
+        os.replace(tmp, self.path)
@@ -0,0 +1,117 @@
+"""
+Tempos por etapa e contadores por bloco do ETL.
+
+    python -m etl.run   --block all --input run.out --outdir outputs --metrics
+    python -m etl.run   --block all --input run.out --outdir outputs --profile run.json
+    python -m etl.batch --inputs runs/ --outdir outputs --metrics --profile campanha.prof
+
+Etapas (segundos, por bloco):
+    read    leitura + descompressão + normalização de cabeçalhos (o antigo
+            preprocess.sh, hoje em blocks.reader.iter_lines) + split; fica no bloco "*"
+    parse   LineHandler.feed/finish do bloco
+    tables  montagem dos DataFrames (to_tables), quando nada é gravado por arquivo
+    write   write_outputs do bloco, ou a gravação consolidada do etl.batch (bloco "*")
+
+Contadores: bytes (tamanho da entrada em disco), lines (linhas lidas), rows
+(linhas nas tabelas do bloco) e misses (linhas que pareciam um item do bloco
+mas a regex rejeitou; nos blocos de matriz, linhas do bloco que não viraram
+linha da tabela, contadas só quando as tabelas são montadas) e cached
+(arquivos cujo resultado do bloco veio do cache de parse, blocks.cache; o
+parse do bloco é então a leitura do cache).
+
+Com métricas ligadas o arquivo é lido em lotes de linhas e cada bloco
+percorre o lote inteiro, então o relógio é consultado por lote e não por linha.
+No etl.batch as métricas de cada arquivo voltam do worker e são somadas.
+--profile grava cProfile (.prof/.pstats, abra com python -m pstats ou
+snakeviz) ou, com .json, as métricas por bloco e por arquivo.
+"""
+
+import cProfile
+import json
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+
+STAGES = ("read", "parse", "tables", "write")
+COUNTERS = ("bytes", "lines", "rows", "misses", "cached")
+
+
+class Metrics:
+    """{bloco: {campo: valor}}, campos = "<etapa>_s" e COUNTERS; `files` = totais por entrada."""
+
+    def __init__(self) -> None:
+        self.blocks: Dict[str, Dict[str, float]] = {}
+        self.files: Dict[str, Dict[str, float]] = {}
+
+    def add(self, block: str, key: str, value: float) -> None:
+        row = self.blocks.setdefault(block, {})
+        row[key] = row.get(key, 0) + value
+
+    @contextmanager
+    def timer(self, block: str, stage: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(block, f"{stage}_s", time.perf_counter() - t0)
+
+    def total(self, key: str) -> float:
+        return sum(row.get(key, 0) for row in self.blocks.values())
+
+    def merge(self, other: "Metrics", source: Optional[str] = None) -> None:
+        """Soma `other` (ex.: métricas de um arquivo vindas de um worker); `source` entra em files."""
+        for block, row in other.blocks.items():
+            for key, value in row.items():
+                self.add(block, key, value)
+        for path, row in other.files.items():
+            self.files[path] = row
+        if source is not None:
+            self.files[source] = {
+                "seconds": sum(other.total(f"{s}_s") for s in STAGES),
+                "bytes": other.blocks.get("*", {}).get("bytes", 0),
+                "rows": other.total("rows"),
+                "misses": other.total("misses"),
+            }
+
+    def as_dict(self) -> dict:
+        return {"blocks": self.blocks, "files": self.files}
+
+    def report(self) -> str:
+        """Tabela por bloco, do mais lento para o mais rápido."""
+        cols = [f"{s}_s" for s in STAGES] + list(COUNTERS)
+        lines = [f"{'bloco':<22}" + "".join(f"{c:>12}" for c in cols)]
+        order = sorted(self.blocks, key=lambda b: -sum(self.blocks[b].get(f"{s}_s", 0) for s in STAGES))
+        for block in order:
+            row = self.blocks[block]
+            cells = [f"{row[c]:12.3f}" if c.endswith("_s") and c in row
+                     else f"{int(row[c]):12d}" if c in row else f"{'-':>12}" for c in cols]
+            lines.append(f"{block:<22}" + "".join(cells))
+        if self.files:
+            slow = max(self.files, key=lambda p: self.files[p]["seconds"])
+            lines.append(f"mais lento: {slow} ({self.files[slow]['seconds']:.3f} s)")
+        return "\n".join(lines)
+
+
+@contextmanager
+def profiling(path: Optional[str], metrics: Optional[Metrics] = None):
+    """
+    Envolve a execução: path .json grava `metrics` ao sair; qualquer outra
+    extensão roda sob cProfile e grava as estatísticas (pstats). None: nada.
+    """
+    if path is None:
+        yield
+        return
+    if path.endswith(".json"):
+        try:
+            yield
+        finally:
+            Path(path).write_text(json.dumps(metrics.as_dict() if metrics else {}, indent=1))
+        return
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        prof.dump_stats(path)
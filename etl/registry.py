@@ -1,26 +1,60 @@
 """
 Registry de blocos ETL disponíveis.
 Cada bloco expõe uma função `run_etl(input_path, outdir, to_parquet=False)`.
+
+Os runners são "módulo:função" importados só no resolve: rodar um bloco
+não importa os outros (nem pandas/NumPy, se o bloco não precisa). Blocos
+de fora do repositório entram pelo grupo de entry points "etl.blocks"
+(nome = "pacote.modulo:run_etl"), consultado só quando o nome não está aqui.
 """
 
-from blocks.out_simulations import run_etl as log_simulation_etl
-from blocks.averages import run_etl as log_averages
-from blocks.correlations import run_etl as log_correlations
-from blocks.k_space_variables import run_etl as log_k_space_variables
-from blocks.real_space_variables.etl import run_etl as log_real_space_variables 
+from functools import partial
+from importlib import import_module
+
 REGISTRY = {
-    "out_simulations": log_simulation_etl,
-    "averages": log_averages,
-    "correlations": log_correlations,
-    "k_space_variables": log_k_space_variables,
-    "real_space_variables": log_real_space_variables,
-    # futuramente: "bondq": bondq_etl, "greens": greens_etl, etc.
+    "out_simulations": "blocks.out_simulations:run_etl",
+    "summary": "blocks.summary:run_etl",
+    "averages": "blocks.averages:run_etl",
+    "correlations": "blocks.correlations:run_etl",
+    "k_space_variables": "blocks.k_space_variables:run_etl",
+    "real_space_variables": "blocks.real_space_variables.etl:run_etl",
+    # todos os blocos acima numa única leitura do arquivo (etl.engine)
+    "all": "etl.engine:run_etl",
+    # futuramente: "bondq": "blocks.bondq:run_etl", "greens": ..., etc.
 }
 
-def resolve(block_name: str):
-    if block_name not in REGISTRY:
+ENTRY_POINT_GROUP = "etl.blocks"
+
+
+def _entry_point(block_name: str):
+    from importlib.metadata import entry_points
+
+    for ep in entry_points(group=ENTRY_POINT_GROUP):
+        if ep.name == block_name:
+            return ep.value
+    return None
+
+
+def _load(spec: str):
+    module, _, attr = spec.partition(":")
+    return getattr(import_module(module), attr)
+
+
+def resolve(block_name: str, metrics=None):
+    """
+    Runner do bloco. Com `metrics` (etl.metrics.Metrics), o runner é o do
+    etl.engine restrito ao bloco (mesmas saídas), que mede cada etapa.
+    """
+    spec = REGISTRY.get(block_name) or _entry_point(block_name)
+    if spec is None:
         raise SystemExit(
             f"❌ Bloco desconhecido: {block_name}\n"
             f"Disponíveis: {', '.join(REGISTRY.keys())}"
         )
-    return REGISTRY[block_name]
\ No newline at end of file
+    if metrics is None:
+        return _load(spec)
+    from .engine import BLOCKS, run_etl
+    if block_name != "all" and block_name not in BLOCKS:
+        raise SystemExit(f"❌ --metrics só vale para os blocos do etl.engine: {', '.join(BLOCKS)}")
+    names = list(BLOCKS) if block_name == "all" else [block_name]
+    return partial(run_etl, blocks=names, metrics=metrics)
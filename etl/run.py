@@ -5,32 +5,135 @@ Uso via linha de comando:
     python -m etl.run --block log_simulation --input examples/sample_log.txt --outdir outputs
 
     roda o ETL do bloco desejado, salvando os arquivos em outputs/
+
+    python -m etl.run --block all --input examples/sample_log.txt --outdir outputs
+
+    roda todos os blocos com uma única leitura do arquivo
+
+    python -m etl.run --block all --input examples/sample_log.txt --dataset dataset
+
+    acrescenta as tabelas ao dataset Parquet particionado (etl.dataset) em dataset/
+
+    python -m etl.run --block all --input examples/sample_log.txt --target duckdb://campanha.db
+
+    carrega as tabelas no DuckDB (upsert por arquivo, etl.targets)
+
+    python -m etl.run --block all --input examples/sample_log.txt --metrics --profile run.json
+
+    mede cada etapa por bloco (etl.metrics) e grava o trace JSON (ou cProfile, com .prof)
+
+    zcat run7.out.gz | python -m etl.run --block all --input - --name run7.out --outdir outputs
+
+    lê do stdin; --name (padrão "stdin") faz o papel do nome do arquivo em
+    source_file e nos arquivos de saída (run7_*.csv)
 """
 
 import argparse
+from contextlib import nullcontext
 from pathlib import Path
+
+from blocks.reader import STDIN_NAME, Stdin
+from blocks.writer import WORKERS, writing
+
+from .metrics import Metrics, profiling
 from .registry import resolve
-import subprocess
+
+
 def main():
     parser = argparse.ArgumentParser(description="ETL Orquestrador de Blocos")
-    parser.add_argument("--block", required=True, help="Nome do bloco (ex: log_simulation)")
-    parser.add_argument("--input", required=True, help="Arquivo de entrada .out/.log")
+    parser.add_argument("--block", required=True, help="Nome do bloco (ex: log_simulation) ou 'all' para todos")
+    parser.add_argument("--input", required=True, help="Arquivo de entrada .out/.log ('-' = stdin)")
+    parser.add_argument("--name", default=None,
+                        help=f"Com --input -: nome da entrada em source_file e nos arquivos de saída "
+                             f"(padrão {STDIN_NAME})")
     parser.add_argument("--outdir", default="outputs", help="Diretório de saída")
     parser.add_argument("--parquet", action="store_true", help="Salvar em Parquet ao invés de CSV")
+    parser.add_argument("--dataset", default=None,
+                        help="Gravar no dataset Parquet particionado neste diretório (ignora --outdir)")
+    parser.add_argument("--target", default=None,
+                        help="Carregar num banco em vez de arquivos, ex.: duckdb://campanha.db (ignora --outdir)")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Mostrar tempo por etapa (read/parse/tables/write) e contadores por bloco")
+    parser.add_argument("--profile", default=None,
+                        help="Gravar cProfile (.prof) ou as métricas em JSON (.json) neste arquivo")
+    parser.add_argument("--writers", type=int, default=WORKERS,
+                        help=f"Threads de gravação, com fila limitada (padrão {WORKERS}; 0 = grava na hora)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Não usar o cache de parse (blocks.cache) nem gravar nele")
+    parser.add_argument("--combined-only", action="store_true",
+                        help="real_space_variables: só o arquivo combinado, sem um arquivo por métrica")
     args = parser.parse_args()
+    if args.name is not None and args.input != "-":
+        parser.error("--name só vale com --input - (stdin)")
+    if args.no_cache:
+        from blocks import cache
+        cache.disable()
+
+    metrics = Metrics() if args.metrics or (args.profile or "").endswith(".json") else None
+    with profiling(args.profile, metrics):
+        _run(args, metrics)
+    if args.metrics:
+        print(metrics.report())
+
+
+def _run(args, metrics):
+    # a normalização de cabeçalhos (antigo preprocess.sh) é feita na leitura,
+    # em blocks.reader.iter_lines; o arquivo de entrada nunca é alterado
+    runner = resolve(args.block, metrics)
+    input_path = Stdin(args.name or STDIN_NAME) if args.input == "-" else args.input
+
+    if args.dataset:
+        from .dataset import remove_sources, write_dataset
 
-    subprocess.run(
-        ["bash", str(Path(__file__).parent / "preprocess.sh"), args.input],
-        check=True
-    )
+        print(f"🚀 Rodando ETL para bloco '{args.block}' (dataset)")
+        tables = runner(input_path=input_path, outdir=None)
+        with _timed(metrics):
+            remove_sources(args.dataset, [input_path])
+            counts = write_dataset(tables, input_path, args.dataset)
+        for table, n in counts.items():
+            print(f"[OK] {table}: {n} linhas")
+        print(f"✅ Dataset atualizado em {args.dataset}")
+        return
 
+    if args.target:
+        from .targets import open_target
+
+        target = open_target(args.target)
+        print(f"🚀 Rodando ETL para bloco '{args.block}' ({args.target})")
+        try:
+            tables = runner(input_path=input_path, outdir=None)
+            with _timed(metrics):
+                counts = target.load(tables, input_path, args.block)
+        finally:
+            target.close()
+        for table, n in counts.items():
+            print(f"[OK] {table}: {n} linhas")
+        print(f"✅ Carregado em {args.target}")
+        return
 
-    runner = resolve(args.block)
     Path(args.outdir).mkdir(parents=True, exist_ok=True)
 
     print(f"🚀 Rodando ETL para bloco '{args.block}'")
-    runner(input_path=args.input, outdir=args.outdir, to_parquet=args.parquet)
+    # gravações dos blocos em threads (blocks.writer); sai daqui só com tudo gravado
+    with writing(args.writers):
+        runner(input_path=input_path, outdir=args.outdir, to_parquet=args.parquet, **_write_options(args))
     print(f"✅ Arquivos salvos em {args.outdir}")
 
+
+def _write_options(args) -> dict:
+    """Argumentos extras do runner para as opções de gravação dos blocos (--combined-only)."""
+    options = {}
+    if args.combined_only:
+        options["real_space_variables"] = {"per_metric": False}
+    if args.block == "all" or args.metrics:
+        # runner do etl.engine (ver registry.resolve): opções por bloco
+        return {"options": options} if options else {}
+    return options.get(args.block, {})
+
+
+def _timed(metrics):
+    """Gravação fora dos blocos (dataset, banco): etapa write do bloco "*"."""
+    return metrics.timer("*", "write") if metrics is not None else nullcontext()
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
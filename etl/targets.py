@@ -0,0 +1,148 @@
+"""
+Destinos de carga além de arquivos: por enquanto, DuckDB.
+
+    python -m etl.run   --block all --input run.out --target duckdb://campanha.db
+    python -m etl.batch --inputs runs/ --outdir outputs --target duckdb://campanha.db
+
+Uma tabela tipada por tipo de bloco (run_header, sweeps, summary,
+averages, correlations, kspace, realspace). As tabelas de cada arquivo chegam como
+Arrow (etl.dataset.to_arrow: texto dictionary-encoded, índices int16) e
+entram num INSERT ... SELECT direto do Arrow, sem passar por CSV.
+
+source_file é o caminho absoluto da entrada (etl.manifest.source_key), como
+nas tabelas consolidadas do etl.batch: run0.out de diretórios diferentes não
+se sobrescrevem. Re-ingerir um arquivo faz upsert por source_file: as linhas
+antigas daquele arquivo saem de todas as tabelas dos blocos pedidos
+(BLOCK_TABLES; com --block all, de todas), mesmo das que agora não recebem
+nada (ex.: run refeito sem a seção (q)), e as novas entram, na mesma
+transação. Todas as tabelas levam os parâmetros do run (n, l, lambdax, iran)
+e as linhas entram ordenadas por eles, então os zonemaps do DuckDB podam
+varreduras como WHERE l = 400 AND lambdax BETWEEN 0.7 AND 0.8.
+run_header e sweeps têm chave primária (source_file[, sweep]).
+
+duckdb é dependência opcional: só é importado quando um destino duckdb:// é usado.
+"""
+
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from blocks.out_simulations.parser import RUN_PARAMS, LineHandler
+
+from .dataset import PARTITION_KEYS, run_params, to_arrow
+from .manifest import source_key, with_source
+
+SCHEME = "duckdb://"
+
+_PARAM_COLUMNS = [("n", "SMALLINT"), ("l", "INTEGER"), ("lambdax", "DOUBLE"), ("iran", "INTEGER")]
+_HEADER_INTS = {"tausk", "phonskip", "numtry", "istart"} | {k for k, t in RUN_PARAMS.items() if t is int}
+
+
+def _header_columns() -> List[Tuple[str, str]]:
+    cols = [("source_file", "VARCHAR")]
+    for key in LineHandler().header():
+        if key == "outname":
+            cols.append((key, "VARCHAR"))
+        elif key == "n":
+            cols.append((key, "SMALLINT"))
+        else:
+            cols.append((key, "INTEGER" if key in _HEADER_INTS else "DOUBLE"))
+    return cols
+
+
+# tabela -> (colunas tipadas, chave primária, ordem de inserção depois dos parâmetros)
+SCHEMAS: Dict[str, Tuple[List[Tuple[str, str]], Tuple[str, ...], Tuple[str, ...]]] = {
+    "run_header": (_header_columns(), ("source_file",), ("source_file",)),
+    "sweeps": ([("source_file", "VARCHAR"), ("sweep", "INTEGER"), ("asgn", "DOUBLE"),
+                ("asgnp", "DOUBLE"), ("accept_holstein", "DOUBLE"), ("redo_ratio_sweep", "DOUBLE"),
+                ("total_meas", "INTEGER"), ("nwrap", "INTEGER"), ("torth", "INTEGER")],
+               ("source_file", "sweep"), ("source_file", "sweep")),
+    "summary": ([("source_file", "VARCHAR"), ("name", "VARCHAR"), ("key", "VARCHAR"),
+                 ("value", "DOUBLE"), ("error", "DOUBLE")],
+                (), ("source_file", "key")),
+    "averages": ([("source_file", "VARCHAR"), ("name", "VARCHAR"), ("key", "VARCHAR"),
+                  ("value", "DOUBLE"), ("error", "DOUBLE")],
+                 (), ("source_file", "key")),
+    "correlations": ([("source_file", "VARCHAR"), ("name", "VARCHAR"), ("key", "VARCHAR"),
+                      ("value", "DOUBLE"), ("error", "DOUBLE")],
+                     (), ("source_file", "key")),
+    "kspace": ([("source_file", "VARCHAR"), ("block", "VARCHAR"), ("kx", "SMALLINT"), ("ky", "SMALLINT"),
+                ("value", "DOUBLE"), ("error", "DOUBLE")],
+               (), ("source_file", "block", "kx", "ky")),
+    "realspace": ([("source_file", "VARCHAR"), ("metric", "VARCHAR"), ("i", "SMALLINT"), ("j", "SMALLINT"),
+                   ("value", "DOUBLE"), ("err", "DOUBLE"), ("value_upup", "DOUBLE"), ("err_upup", "DOUBLE"),
+                   ("value_updn", "DOUBLE"), ("err_updn", "DOUBLE")],
+                  (), ("source_file", "metric", "i", "j")),
+}
+
+
+def parse_target(spec: str) -> str:
+    """"duckdb://caminho.db" -> "caminho.db" (":memory:" também vale)."""
+    if not spec.startswith(SCHEME) or not spec[len(SCHEME):]:
+        raise SystemExit(f"❌ Destino inválido: {spec} (use {SCHEME}caminho.db)")
+    return spec[len(SCHEME):]
+
+# bloco -> tabelas que ele alimenta (as que um re-ingest do bloco substitui)
+BLOCK_TABLES: Dict[str, Tuple[str, ...]] = {
+    "out_simulations": ("run_header", "sweeps"),
+    "summary": ("summary",),
+    "averages": ("averages",),
+    "correlations": ("correlations",),
+    "k_space_variables": ("kspace",),
+    "real_space_variables": ("realspace",),
+}
+
+
+class DuckDBTarget:
+    """Conexão com o banco e criação das tabelas; load() faz o upsert das tabelas de um arquivo."""
+
+    def __init__(self, path: str):
+        try:
+            import duckdb
+        except ImportError:
+            raise SystemExit("❌ O destino duckdb:// precisa do pacote duckdb (pip install duckdb)")
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.con = duckdb.connect(path)
+        for table, (cols, pk, _) in SCHEMAS.items():
+            names = {c for c, _ in cols}
+            cols = cols + [c for c in _PARAM_COLUMNS if c[0] not in names]
+            ddl = ", ".join(f'"{c}" {t}' for c, t in cols)
+            if pk:
+                ddl += f", PRIMARY KEY ({', '.join(pk)})"
+            self.con.execute(f"CREATE TABLE IF NOT EXISTS {table} ({ddl})")
+
+    def load(self, tables: Dict[str, object], input_path: str, block: str = "all") -> Dict[str, int]:
+        """
+        Upsert das tabelas ({tabela: DataFrame}, ver to_tables) de um arquivo, lidas
+        com `block` (nome do bloco ou 'all'). Retorna linhas por tabela.
+        """
+        params = run_params(tables, input_path)
+        source = source_key(input_path)
+        managed = list(SCHEMAS) if block == "all" else [*BLOCK_TABLES.get(block, ()), *tables]
+        counts: Dict[str, int] = {}
+        self.con.execute("BEGIN TRANSACTION")
+        try:
+            for table in dict.fromkeys(managed):
+                if table in SCHEMAS:
+                    self.con.execute(f"DELETE FROM {table} WHERE source_file = ?", [source])
+            for table, df in tables.items():
+                if table not in SCHEMAS or not len(df):
+                    continue
+                order = ", ".join([*PARTITION_KEYS, *SCHEMAS[table][2]])
+                self.con.register("_incoming", to_arrow(with_source(df, input_path), params))
+                self.con.execute(f"INSERT INTO {table} BY NAME SELECT * FROM _incoming ORDER BY {order}")
+                self.con.unregister("_incoming")
+                counts[table] = len(df)
+            self.con.execute("COMMIT")
+        except BaseException:
+            self.con.execute("ROLLBACK")
+            raise
+        return counts
+
+    def close(self) -> None:
+        self.con.close()
+
+
+def open_target(spec: str) -> DuckDBTarget:
+    return DuckDBTarget(parse_target(spec))
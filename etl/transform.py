@@ -0,0 +1,225 @@
+"""
+Transformadas entre espaço real e espaço k, em lote sobre muitos runs.
+
+As tabelas longas realspace (source_file, metric, i, j, value, err) e
+kspace (source_file, block, kx, ky, value, error) viram arrays densos
+(runs, n, n) com uma indexação vetorizada, sem pivot do pandas:
+
+    - funções de correlação impressas só na cunha irredutível 0 <= i <= j <= n/2
+      (xx Spin, density-density, bond-bond...) são expandidas pela simetria
+      da rede quadrada (x -> n-x, y -> n-y, x <-> y);
+    - blocos impressos na rede inteira (0 <= i, j < n) são usados direto.
+
+S(q) = sum_r cos(q.r) C(r), q = 2pi (kx, ky)/n, sai de um fft2 por lote, para
+todos os n x n momentos (inclusive os que o código não imprime). O erro
+propaga os erros da tabela como independentes por célula impressa: na
+cunha cada célula entra em vários r, então var S(q) = sum_c err_c² A_c(q)²,
+com A_c = Re fft2(órbita da célula c); na rede inteira isso se reduz a
+(sum err² + Re fft2(err²)(2q))/2.
+
+PAIRS diz qual bloco (q) é a transformada de qual métrica; check_pairs
+devolve, por run e bloco, o maior desvio absoluto e o maior desvio em
+sigmas em relação ao (q) impresso.
+
+    python -m etl.transform --outdir outputs
+"""
+
+import argparse
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# bloco (q) impresso -> métrica de espaço real de que ele é a transformada
+PAIRS = {
+    "Sxx(q)": "xx Spin correlation function",
+    "Scdw(q)": "density-density correlation function",
+    "Bond(q)": "bond-bond correlation function",
+}
+
+
+def _cell_index(n: int, symmetric: bool) -> Tuple[np.ndarray, np.ndarray]:
+    """Para cada sítio (x, y) da rede n x n, a célula impressa (i, j) que o representa."""
+    x, y = np.meshgrid(np.arange(n), np.arange(n), indexing="ij")
+    if not symmetric:
+        return x, y
+    a, b = np.minimum(x, n - x), np.minimum(y, n - y)
+    return np.minimum(a, b), np.maximum(a, b)
+
+
+def densify(runs: np.ndarray, i: np.ndarray, j: np.ndarray, value: np.ndarray,
+            error: np.ndarray, n_runs: int, n: int, symmetric: bool
+            ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Colunas de uma tabela longa (run já como inteiro 0..n_runs-1) ->
+    (dense, dense_err, cells, cells_err): as redes (n_runs, n, n) e as
+    grades impressas (n_runs, m, m). Células não impressas ficam NaN.
+    """
+    m = n // 2 + 1 if symmetric else n
+    cells = np.full((n_runs, m, m), np.nan)
+    cells_err = np.full((n_runs, m, m), np.nan)
+    cells[runs, i, j] = value
+    cells_err[runs, i, j] = error
+    ci, cj = _cell_index(n, symmetric)
+    return cells[:, ci, cj], cells_err[:, ci, cj], cells, cells_err
+
+
+def _orbit_weights(n: int) -> np.ndarray:
+    """A[c] = Re fft2(órbita da célula c da cunha): (m*m, n, n)."""
+    m = n // 2 + 1
+    ci, cj = _cell_index(n, True)
+    flat = (ci * m + cj).ravel()
+    masks = np.zeros((m * m, n * n))
+    masks[flat, np.arange(n * n)] = 1.0
+    return np.fft.fft2(masks.reshape(m * m, n, n)).real
+
+
+def structure_factor(dense: np.ndarray, cells_err: np.ndarray, symmetric: bool
+                     ) -> Tuple[np.ndarray, np.ndarray]:
+    """S(q) e seu erro para um lote (runs, n, n); `cells_err` são os erros impressos (runs, m, m)."""
+    n = dense.shape[-1]
+    s = np.fft.fft2(dense).real
+    err2 = np.nan_to_num(cells_err) ** 2
+    if symmetric:
+        a2 = _orbit_weights(n) ** 2
+        var = np.tensordot(err2.reshape(len(err2), -1), a2, axes=1)
+    else:
+        total = err2.sum(axis=(-2, -1))[:, None, None]
+        k = np.arange(n)
+        doubled = np.fft.fft2(err2).real[:, (2 * k) % n][:, :, (2 * k) % n]
+        var = (total + doubled) / 2
+    return s, np.sqrt(var)
+
+
+def _sq_batches(realspace, metric: str):
+    """Gera (sources, S, S_err, simétrico) de `metric`, um lote por tamanho de rede."""
+    import pandas as pd
+
+    d = realspace[(realspace["metric"] == metric) & realspace["value"].notna()]
+    if not len(d):
+        return
+    runs, sources = pd.factorize(d["source_file"].to_numpy())
+    i = d["i"].to_numpy(dtype=np.int64)
+    j = d["j"].to_numpy(dtype=np.int64)
+    value = d["value"].to_numpy(dtype=np.float64)
+    err = d["err"].to_numpy(dtype=np.float64)
+
+    # tamanho da rede por run: só a cunha (i <= j) -> n = 2*max; senão n = max+1
+    top = np.zeros(len(sources), dtype=np.int64)
+    np.maximum.at(top, runs, np.maximum(i, j))
+    lower = np.zeros(len(sources), dtype=bool)
+    lower[runs[i > j]] = True
+    sym = ~lower
+    n_run = np.where(sym, 2 * top, top + 1)
+
+    for n, symmetric in sorted(set(zip(n_run.tolist(), sym.tolist())), reverse=True):
+        chosen = np.flatnonzero((n_run == n) & (sym == symmetric))
+        remap = np.full(len(sources), -1)
+        remap[chosen] = np.arange(len(chosen))
+        r = remap[runs]
+        rows = r >= 0
+        dense, _, _, cells_err = densify(r[rows], i[rows], j[rows], value[rows], err[rows],
+                                         len(chosen), n, symmetric)
+        s, s_err = structure_factor(dense, cells_err, symmetric)
+        yield np.asarray(sources)[chosen], s, s_err, symmetric
+
+
+def sq_table(realspace, metrics=None):
+    """Tabela longa de S(q) calculado: source_file, metric, kx, ky, value, error (todos os q)."""
+    import pandas as pd
+
+    metrics = list(PAIRS.values()) if metrics is None else metrics
+    frames = []
+    for metric in metrics:
+        for sources, s, s_err, _ in _sq_batches(realspace, metric):
+            r, kx, ky = np.indices(s.shape)
+            frames.append(pd.DataFrame({
+                "source_file": sources[r.ravel()],
+                "metric": metric,
+                "kx": kx.ravel(), "ky": ky.ravel(),
+                "value": s.ravel(), "error": s_err.ravel(),
+            }))
+    if not frames:
+        return pd.DataFrame(columns=["source_file", "metric", "kx", "ky", "value", "error"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def check_pairs(realspace, kspace, pairs: Optional[Dict[str, str]] = None):
+    """
+    Compara, por run, cada bloco (q) impresso com o S(q) calculado da métrica
+    correspondente. Colunas: source_file, block, metric, n_q, max_abs_dev,
+    max_sigma_dev, kx_max, ky_max (q do maior desvio absoluto).
+    """
+    import pandas as pd
+
+    pairs = PAIRS if pairs is None else pairs
+    out = []
+    for block, metric in pairs.items():
+        k = kspace[kspace["block"] == block]
+        if not len(k):
+            continue
+        for sources, s, s_err, _ in _sq_batches(realspace, metric):
+            pos = pd.Index(sources)
+            kr = pos.get_indexer(k["source_file"].to_numpy())
+            n = s.shape[-1]
+            kx = k["kx"].to_numpy(dtype=np.int64)
+            ky = k["ky"].to_numpy(dtype=np.int64)
+            ok = (kr >= 0) & (kx < n) & (ky < n)
+            if not ok.any():
+                continue
+            kr, kx, ky = kr[ok], kx[ok], ky[ok]
+            dev = np.abs(k["value"].to_numpy()[ok] - s[kr, kx, ky])
+            sigma = np.hypot(np.nan_to_num(k["error"].to_numpy()[ok]), s_err[kr, kx, ky])
+            # run com célula faltando no espaço real: S(q) NaN, fica fora do relatório
+            fin = np.isfinite(dev)
+            kr, kx, ky, dev, sigma = kr[fin], kx[fin], ky[fin], dev[fin], sigma[fin]
+            if not len(dev):
+                continue
+            with np.errstate(divide="ignore", invalid="ignore"):
+                pull = np.where(sigma > 0, dev / sigma, np.where(dev > 0, np.inf, 0.0))
+            rows = pd.DataFrame({"r": kr, "dev": dev, "pull": pull, "kx": kx, "ky": ky})
+            worst = rows.loc[rows.groupby("r")["dev"].idxmax()]
+            summary = rows.groupby("r").agg(n_q=("dev", "size"), max_sigma_dev=("pull", "max"))
+            out.append(pd.DataFrame({
+                "source_file": sources[worst["r"].to_numpy()],
+                "block": block,
+                "metric": metric,
+                "n_q": summary.loc[worst["r"], "n_q"].to_numpy(),
+                "max_abs_dev": worst["dev"].to_numpy(),
+                "max_sigma_dev": summary.loc[worst["r"], "max_sigma_dev"].to_numpy(),
+                "kx_max": worst["kx"].to_numpy(),
+                "ky_max": worst["ky"].to_numpy(),
+            }))
+    cols = ["source_file", "block", "metric", "n_q", "max_abs_dev", "max_sigma_dev", "kx_max", "ky_max"]
+    return pd.concat(out, ignore_index=True) if out else pd.DataFrame(columns=cols)
+
+
+def main(argv: Optional[list] = None):
+    from .aggregate import load_table
+
+    parser = argparse.ArgumentParser(description="S(q) por FFT a partir do espaço real e checagem contra os blocos (q)")
+    parser.add_argument("--outdir", default="outputs", help="Saída do etl.batch (tabelas realspace e kspace)")
+    parser.add_argument("--dest", default=None, help="Diretório de saída (padrão: --outdir)")
+    parser.add_argument("--parquet", action="store_true", help="Salvar em Parquet ao invés de CSV")
+    args = parser.parse_args(argv)
+
+    try:
+        realspace = load_table(args.outdir, "realspace")
+        kspace = load_table(args.outdir, "kspace")
+    except FileNotFoundError as e:
+        raise SystemExit(f"❌ {e} (rode o etl.batch com --block all)")
+
+    dest = Path(args.dest or args.outdir)
+    dest.mkdir(parents=True, exist_ok=True)
+    ext = "parquet" if args.parquet else "csv"
+    for name, df in (("sq", sq_table(realspace)), ("sq_check", check_pairs(realspace, kspace))):
+        target = dest / f"{name}.{ext}"
+        if args.parquet:
+            df.to_parquet(target, index=False)
+        else:
+            df.to_csv(target, index=False)
+        print(f"[OK] {target}: {len(df)} linhas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+import re
+from pathlib import Path
+
+import pytest
+
+EXAMPLES = Path(__file__).resolve().parent.parent / "examples"
+
+
+@pytest.fixture(autouse=True)
+def _parse_cache(tmp_path_factory, monkeypatch):
+    """Cache de parse (blocks.cache) num diretório do teste, nunca em ~/.cache."""
+    from blocks import cache
+
+    directory = tmp_path_factory.mktemp("parse-cache")
+    monkeypatch.setenv("ETL_PARSE_CACHE", str(directory))
+    monkeypatch.setattr(cache, "CACHE_DIR", directory)
+    return directory
+
+
+def make_run(path: Path, iran: int, source: str = "example.out") -> Path:
+    """Cópia de um .out de examples/ com outra semente (iran): outro run, outra partição."""
+    text = (EXAMPLES / source).read_text()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(re.sub(r"(?m)^(\s*iran=\s*)-?\d+", rf"\g<1>{iran}", text, count=1))
+    return path
+
+
+@pytest.fixture
+def campaign(tmp_path):
+    """Dois run0.out (e um run1.out) em diretórios diferentes, como L400/ e L800/ numa campanha."""
+    return [
+        make_run(tmp_path / "camp" / "L400" / "run0.out", -147),
+        make_run(tmp_path / "camp" / "L400" / "run1.out", -148),
+        make_run(tmp_path / "camp" / "L800" / "run0.out", -200),
+    ]
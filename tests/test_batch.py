@@ -0,0 +1,105 @@
+import os
+
+import pytest
+
+from etl.batch import run_batch
+from etl.manifest import source_key
+
+
+def _per_source(table) -> dict:
+    counts = {}
+    for s in table.column("source_file").to_pylist():
+        counts[s] = counts.get(s, 0) + 1
+    return counts
+
+
+def _touch(path) -> None:
+    with open(path, "a") as f:
+        f.write("\n")
+
+
+def _per_source_df(df) -> dict:
+    return df.groupby("source_file").size().to_dict()
+
+
+def test_dataset_same_name_in_two_directories(campaign, tmp_path):
+    from etl.dataset import open_dataset
+
+    root = tmp_path / "ds"
+    inputs = [str(p) for p in campaign]
+    run_batch(inputs, "all", str(root), dataset=True, workers=1)
+    first = _per_source(open_dataset(str(root), "averages").to_table())
+    assert set(first) == {source_key(p) for p in inputs}
+
+    # só L400/run0.out muda: L800/run0.out é pulado e não pode perder os arquivos
+    _touch(campaign[0])
+    summary = run_batch(inputs, "all", str(root), dataset=True, workers=1)
+    assert summary["ok"] == 1 and summary["skipped"] == 2
+    for table in ("run_header", "averages", "kspace", "realspace"):
+        counts = _per_source(open_dataset(str(root), table).to_table())
+        assert set(counts) == {source_key(p) for p in inputs}, table
+    assert _per_source(open_dataset(str(root), "averages").to_table()) == first
+    assert len(os.listdir(root / "run_header" / "n=8" / "l=400" / "lambdax=0.7745966692")) == 3
+
+
+def test_file_without_run_header_fails(campaign, tmp_path):
+    import pandas as pd
+
+    bad = tmp_path / "camp" / "bad.out"
+    bad.write_text("garbage\n")
+    out = tmp_path / "out"
+    summary = run_batch([str(campaign[0]), str(bad)], "all", str(out), workers=1)
+    assert summary["ok"] == 1 and list(summary["failed"]) == [str(bad)]
+    assert list(pd.read_csv(out / "run_header.csv")["source_file"]) == [source_key(campaign[0])]
+
+    # não entra no manifest: é tentado de novo na próxima execução
+    summary = run_batch([str(campaign[0]), str(bad)], "all", str(out), workers=1)
+    assert summary["skipped"] == 1 and list(summary["failed"]) == [str(bad)]
+
+
+def test_consolidated_incremental_rerun(campaign, tmp_path):
+    import pandas as pd
+
+    out = tmp_path / "out"
+    inputs = [str(p) for p in campaign]
+    first = run_batch(inputs, "all", str(out), workers=1)
+    assert first["ok"] == 3 and not first["failed"]
+    header = pd.read_csv(out / "run_header.csv")
+    # run0.out de L400 e de L800: duas linhas, uma por caminho
+    assert sorted(header["source_file"]) == sorted(source_key(p) for p in inputs)
+    before = {t: pd.read_csv(out / f"{t}.csv") for t in ("summary", "kspace", "realspace")}
+
+    again = run_batch(inputs, "all", str(out), workers=1)
+    assert again["ok"] == 0 and again["skipped"] == 3
+
+    _touch(campaign[2])
+    redo = run_batch(inputs, "all", str(out), workers=1)
+    assert redo["ok"] == 1 and redo["skipped"] == 2
+    for table, old in before.items():
+        new = pd.read_csv(out / f"{table}.csv")
+        assert _per_source_df(new) == _per_source_df(old), table
+
+    full = run_batch(inputs, "all", str(out), workers=1, full=True)
+    assert full["ok"] == 3 and full["skipped"] == 0
+    assert len(pd.read_csv(out / "run_header.csv")) == 3
+
+
+def test_target_incremental_rerun(campaign, tmp_path):
+    duckdb = pytest.importorskip("duckdb")
+
+    db = tmp_path / "campanha.db"
+    inputs = [str(p) for p in campaign]
+    run_batch(inputs, "all", str(tmp_path / "state"), target=f"duckdb://{db}", workers=1)
+    _touch(campaign[0])
+    summary = run_batch(inputs, "all", str(tmp_path / "state"), target=f"duckdb://{db}", workers=1)
+    assert summary["ok"] == 1 and summary["skipped"] == 2
+
+    con = duckdb.connect(str(db))
+    try:
+        header = con.execute("SELECT source_file, iran FROM run_header ORDER BY iran").fetchall()
+        sweeps = dict(con.execute("SELECT source_file, count(*) FROM sweeps GROUP BY 1").fetchall())
+    finally:
+        con.close()
+    assert header == [(source_key(campaign[2]), -200), (source_key(campaign[1]), -148),
+                      (source_key(campaign[0]), -147)]
+    assert sorted(sweeps.values()) == [10, 10, 10]
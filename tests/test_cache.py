@@ -0,0 +1,45 @@
+import pandas
+import pytest
+
+from blocks import cache
+from blocks.summary import parser as summary
+
+from conftest import EXAMPLES
+
+SOURCE = str(EXAMPLES / "example.out")
+STALE = {"block": "summary", "count": 1,
+         "items": [{"name": "stale", "key": "stale", "value": 0.0, "error": None}]}
+
+
+@pytest.fixture(autouse=True)
+def _fresh_fingerprints():
+    cache.fingerprint.cache_clear()
+    cache._versions.cache_clear()
+    yield
+    cache.fingerprint.cache_clear()
+    cache._versions.cache_clear()
+
+
+def _bump(monkeypatch, target, attr, value):
+    monkeypatch.setattr(target, attr, value)
+    cache.fingerprint.cache_clear()
+    cache._versions.cache_clear()
+
+
+def test_hit_returns_the_stored_result():
+    digest = cache.source_digest(SOURCE)
+    assert cache.load("summary", summary.__name__, digest) is cache.MISS
+    first = summary.parse_file(SOURCE)
+    assert cache.load("summary", summary.__name__, digest) == first
+    assert summary.parse_file(SOURCE) == first
+
+
+@pytest.mark.parametrize("target, attr", [(summary, "PARSER_VERSION"), (pandas, "__version__")])
+def test_stale_entry_not_served_after_version_change(monkeypatch, target, attr):
+    # entrada gravada por um parser "antigo" com outra saída
+    cache.store("summary", summary.__name__, cache.source_digest(SOURCE), STALE)
+    assert summary.parse_file(SOURCE) == STALE
+
+    _bump(monkeypatch, target, attr, "changed")
+    fresh = summary.parse_file(SOURCE)
+    assert fresh != STALE and fresh["count"] > 1
@@ -0,0 +1,42 @@
+import csv
+import json
+
+from etl.follow import STATE_NAME, SWEEPS_NAME, load_state, poll_once
+from etl.manifest import source_key
+
+from conftest import EXAMPLES
+
+
+def _sweeps(outdir) -> list:
+    with open(outdir / SWEEPS_NAME, newline="") as f:
+        return [(r["source_file"], int(r["sweep"])) for r in csv.DictReader(f)]
+
+
+def test_resume_from_json_state_mid_sweep(tmp_path):
+    text = (EXAMPLES / "example.out").read_bytes()
+    cut = text.index(b"Total_meas=", text.index(b"Finished measurement sweep         1200"))
+    run = tmp_path / "runs" / "run0.out"
+    run.parent.mkdir()
+    run.write_bytes(text[:cut])  # job parado no meio do 3º registro de sweep
+    out = tmp_path / "live"
+    out.mkdir()
+
+    followers = {}
+    poll_once([str(run)], str(out), followers)
+    state = json.loads((out / STATE_NAME).read_text())
+    assert state["version"] and list(state["files"]) == [str(run.resolve())]
+
+    # processo reiniciado: só o JSON sobrevive
+    with open(run, "ab") as f:
+        f.write(text[cut:])
+    followers = load_state(str(out))
+    poll_once([str(run)], str(out), followers)
+    rows = _sweeps(out)
+    assert rows == [(source_key(run), 400 * (k + 1)) for k in range(10)]
+
+
+def test_state_of_another_version_is_not_reused(tmp_path):
+    out = tmp_path / "live"
+    out.mkdir()
+    (out / STATE_NAME).write_text(json.dumps({"version": -1, "files": {}}))
+    assert load_state(str(out)) is None
@@ -0,0 +1,25 @@
+import warnings
+
+from blocks.matrix import FLOAT, INT, PM, parse_table
+
+LAYOUT = (INT, INT, FLOAT, PM, FLOAT)
+
+
+def _fallback(line):
+    return None
+
+
+def test_bulk_path_without_warnings():
+    lines = [f"  {i}  {j}  0.{i}{j}E-01 +-  1.0E-03" for i in range(4) for j in range(4)]
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        kx, ky, value, error = parse_table(lines, LAYOUT, _fallback)
+    assert list(kx) == [i for i in range(4) for _ in range(4)]
+    assert value[5] == 0.011 and error.sum() == 16 * 1e-3
+
+
+def test_ragged_rows_are_not_reshaped():
+    # uma linha curta e uma longa somam os tokens certos: não podem virar duas linhas válidas
+    lines = ["0 0 1.0 +- 0.1", "0 1 +- 0.2", "1 0 2.0 7 +- 0.3"]
+    kx, ky, value, error = parse_table(lines, LAYOUT, _fallback)
+    assert list(zip(kx, ky, value, error)) == [(0, 0, 1.0, 0.1)]
@@ -0,0 +1,25 @@
+import csv
+import gzip
+
+from blocks import summary
+from blocks.reader import source_name, source_stem
+from etl.engine import run_etl
+
+from conftest import EXAMPLES
+
+
+def test_source_name_strips_compression():
+    assert source_name("runs/run2.out.gz") == "run2.out"
+    assert source_name("runs/run2.out") == "run2.out"
+    assert source_stem("runs/run2.out.zst") == "run2"
+
+
+def test_compressed_input_keeps_the_plain_name(tmp_path):
+    gz = tmp_path / "run2.out.gz"
+    gz.write_bytes(gzip.compress((EXAMPLES / "example.out").read_bytes()))
+    for table, df in run_etl(str(gz), None).items():
+        assert set(df["source_file"]) == {"run2.out"}, table
+
+    summary.run_etl(str(gz), str(tmp_path / "out"))
+    with open(tmp_path / "out" / "run2_summary.csv", newline="") as f:
+        assert {r["filename"] for r in csv.DictReader(f)} == {"run2.out"}
@@ -0,0 +1,31 @@
+import csv
+import io
+import sys
+
+import pytest
+
+from etl import run
+
+from conftest import EXAMPLES
+
+
+def _main(monkeypatch, *argv, stdin=None):
+    monkeypatch.setattr(sys, "argv", ["etl.run", *argv])
+    if stdin is not None:
+        monkeypatch.setattr(sys, "stdin", io.StringIO(stdin))
+    run.main()
+
+
+@pytest.mark.parametrize("name, stem", [(None, "stdin"), ("run7.out", "run7")])
+def test_stdin_input_is_named(monkeypatch, tmp_path, name, stem):
+    text = (EXAMPLES / "example.out").read_text()
+    extra = ["--name", name] if name else []
+    _main(monkeypatch, "--block", "summary", "--input", "-", *extra, "--outdir", str(tmp_path), stdin=text)
+    with open(tmp_path / f"{stem}_summary.csv", newline="") as f:
+        assert {r["filename"] for r in csv.DictReader(f)} == {name or "stdin"}
+
+
+def test_name_requires_stdin(monkeypatch, tmp_path):
+    with pytest.raises(SystemExit):
+        _main(monkeypatch, "--block", "summary", "--input", str(EXAMPLES / "example.out"),
+              "--name", "x.out", "--outdir", str(tmp_path))
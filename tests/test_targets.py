@@ -0,0 +1,27 @@
+import pytest
+
+from etl.engine import run_etl
+from etl.manifest import source_key
+
+duckdb = pytest.importorskip("duckdb")
+
+
+def test_same_name_in_two_directories_keep_their_rows(campaign, tmp_path):
+    from etl.targets import open_target
+
+    target = open_target(f"duckdb://{tmp_path / 'campanha.db'}")
+    try:
+        for path in campaign:
+            target.load(run_etl(str(path), None), str(path))
+        # re-ingerir L400/run0.out substitui só as linhas dele
+        target.load(run_etl(str(campaign[0]), None), str(campaign[0]))
+        rows = target.con.execute(
+            "SELECT source_file, iran FROM run_header ORDER BY iran").fetchall()
+        counts = dict(target.con.execute(
+            "SELECT source_file, count(*) FROM averages GROUP BY 1").fetchall())
+    finally:
+        target.close()
+    assert rows == [(source_key(campaign[2]), -200), (source_key(campaign[1]), -148),
+                    (source_key(campaign[0]), -147)]
+    assert set(counts) == {source_key(p) for p in campaign}
+    assert len(set(counts.values())) == 1